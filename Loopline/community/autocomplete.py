@@ -0,0 +1,263 @@
+# community/autocomplete.py
+"""
+In-process prefix index for @mention and user autocomplete.
+
+Every keystroke of the mention box used to run a search query. Instead,
+each process keeps a sorted list of (key, user_id) pairs, where the keys
+are the lowercased username and display name (and each word of the display
+name) of every active user. complete() finds the prefix range with bisect
+and walks it, so a lookup costs O(log n + matches) with no database access.
+
+The index is built on a background thread on first use; until that build
+finishes, lookups are answered with a database query, so no request waits
+for it. The User/UserProfile signals then update it on commit, so changes
+made in this process show up at once. Changes made by other processes
+reach it through a full rebuild, run in the background once the index is
+older than REBUILD_INTERVAL.
+
+Results are biased toward the caller's circle: the users they follow and
+their accepted connections, cached per user for CIRCLE_TTL seconds.
+"""
+
+import bisect
+import logging
+import threading
+import time
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.db.models import Q
+
+from .models import ConnectionRequest, Follow, UserProfile
+
+User = get_user_model()
+logger = logging.getLogger(__name__)
+
+REBUILD_INTERVAL = getattr(settings, "AUTOCOMPLETE_REBUILD_INTERVAL", 600)
+CIRCLE_TTL = getattr(settings, "AUTOCOMPLETE_CIRCLE_TTL", 60)
+# Set to False to build the first index inside the request that needs it
+# (e.g. in tests, where a background thread cannot see uncommitted users).
+BUILD_IN_BACKGROUND = getattr(settings, "AUTOCOMPLETE_BUILD_IN_BACKGROUND", True)
+
+# A short prefix can match most of the index; at most this many index
+# entries are walked per lookup.
+MAX_SCAN = 500
+
+
+def index_keys(username, display_name):
+    keys = {username.lower()}
+    if display_name:
+        display_name = display_name.lower().strip()
+        keys.add(display_name)
+        keys.update(display_name.split())
+    keys.discard("")
+    return keys
+
+
+class PrefixIndex:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._build_lock = threading.Lock()
+        self._keys = []  # sorted (key, user_id)
+        self._users = {}  # user_id -> {"username", "first_name", "last_name", "display_name", "picture"}
+        self._built_at = None
+        self._rebuilding = False
+
+    # --- Building ---
+
+    def _load(self):
+        rows = (
+            UserProfile.objects.filter(user__is_active=True)
+            .values_list(
+                "user_id", "user__username", "user__first_name", "user__last_name",
+                "display_name", "picture",
+            )
+            .iterator(chunk_size=5000)
+        )
+        users, keys = {}, []
+        for user_id, username, first_name, last_name, display_name, picture in rows:
+            users[user_id] = self._entry(username, first_name, last_name, display_name, picture)
+            keys.extend((key, user_id) for key in index_keys(username, display_name))
+        keys.sort()
+        return users, keys
+
+    def build(self):
+        users, keys = self._load()
+        with self._lock:
+            self._users, self._keys = users, keys
+            self._built_at = time.monotonic()
+            self._rebuilding = False
+
+    def _ensure_built(self):
+        """Starts a build when needed; returns True if lookups can use the index."""
+        if self._built_at is None:
+            if not BUILD_IN_BACKGROUND:
+                with self._build_lock:
+                    if self._built_at is None:
+                        self.build()
+                return True
+            self._build_in_background()
+            return False
+        if time.monotonic() - self._built_at > REBUILD_INTERVAL:
+            self._build_in_background()
+        return True
+
+    def _build_in_background(self):
+        with self._lock:
+            if self._rebuilding:
+                return
+            self._rebuilding = True
+        threading.Thread(target=self._run_build, name="autocomplete-rebuild", daemon=True).start()
+
+    def _run_build(self):
+        try:
+            self.build()
+        except Exception:
+            logger.exception("Building the autocomplete index failed")
+            with self._lock:
+                self._rebuilding = False
+        finally:
+            # Database connections are per thread; don't leak this one's.
+            connection.close()
+
+    def reset(self):
+        with self._lock:
+            self._keys, self._users, self._built_at = [], {}, None
+            self._rebuilding = False
+
+    @property
+    def is_built(self):
+        return self._built_at is not None
+
+    # --- Incremental updates ---
+
+    @staticmethod
+    def _entry(username, first_name, last_name, display_name, picture):
+        return {
+            "username": username,
+            "first_name": first_name,
+            "last_name": last_name,
+            "display_name": display_name,
+            "picture": picture or None,
+        }
+
+    def _remove_locked(self, user_id):
+        entry = self._users.pop(user_id, None)
+        if entry is None:
+            return
+        for key in index_keys(entry["username"], entry["display_name"]):
+            position = bisect.bisect_left(self._keys, (key, user_id))
+            if position < len(self._keys) and self._keys[position] == (key, user_id):
+                del self._keys[position]
+
+    def upsert(self, user_id, username, first_name, last_name, display_name, picture, is_active=True):
+        """Adds or replaces a user; inactive users are removed. No-op before the first build."""
+        if not self.is_built:
+            return
+        with self._lock:
+            self._remove_locked(user_id)
+            if not is_active:
+                return
+            self._users[user_id] = self._entry(username, first_name, last_name, display_name, picture)
+            for key in index_keys(username, display_name):
+                bisect.insort(self._keys, (key, user_id))
+
+    def remove(self, user_id):
+        with self._lock:
+            self._remove_locked(user_id)
+
+    # --- Lookups ---
+
+    def _matches(self, entry, prefix):
+        return any(key.startswith(prefix) for key in index_keys(entry["username"], entry["display_name"]))
+
+    def complete(self, prefix, limit=10, boost_ids=()):
+        """
+        Returns up to `limit` (user_id, entry) pairs whose username or display
+        name starts with `prefix`: users in `boost_ids` first, then the rest,
+        each group ordered by username.
+        """
+        prefix = prefix.lower().strip()
+        if not prefix:
+            return []
+        if not self._ensure_built():
+            return self._complete_from_db(prefix, limit, boost_ids)
+
+        with self._lock:
+            boosted = sorted(
+                (
+                    (self._users[user_id]["username"], user_id)
+                    for user_id in boost_ids
+                    if user_id in self._users and self._matches(self._users[user_id], prefix)
+                ),
+            )[:limit]
+            others = []
+            seen = {user_id for _, user_id in boosted}
+            position = bisect.bisect_left(self._keys, (prefix,))
+            for key, user_id in self._keys[position : position + MAX_SCAN]:
+                if not key.startswith(prefix):
+                    break
+                if user_id not in seen:
+                    seen.add(user_id)
+                    others.append((self._users[user_id]["username"], user_id))
+            others.sort()
+            ranked = [user_id for _, user_id in boosted + others][:limit]
+            return [(user_id, dict(self._users[user_id])) for user_id in ranked]
+
+    def _complete_from_db(self, prefix, limit, boost_ids):
+        """complete() with database queries, while the first build runs."""
+        matches = (
+            UserProfile.objects.filter(user__is_active=True)
+            .filter(
+                Q(user__username__istartswith=prefix)
+                | Q(display_name__istartswith=prefix)
+                | Q(display_name__icontains=f" {prefix}")
+            )
+            .order_by("user__username")
+            .values_list(
+                "user_id", "user__username", "user__first_name", "user__last_name",
+                "display_name", "picture",
+            )
+        )
+        rows = list(matches.filter(user_id__in=boost_ids)[:limit]) if boost_ids else []
+        if len(rows) < limit:
+            rows += matches.exclude(user_id__in=[row[0] for row in rows])[: limit - len(rows)]
+        return [(row[0], self._entry(*row[1:])) for row in rows]
+
+
+index = PrefixIndex()
+
+
+def circle_ids(user):
+    """IDs of the users `user` follows or is connected to (cached briefly)."""
+    key = f"autocomplete-circle:{user.pk}"
+    ids = cache.get(key)
+    if ids is None:
+        ids = set(Follow.objects.filter(follower=user).values_list("following_id", flat=True))
+        for sender_id, receiver_id in ConnectionRequest.objects.filter(
+            Q(sender=user) | Q(receiver=user), status="accepted"
+        ).values_list("sender_id", "receiver_id"):
+            ids.add(receiver_id if sender_id == user.pk else sender_id)
+        cache.set(key, ids, timeout=CIRCLE_TTL)
+    return ids
+
+
+def complete_users(user, prefix, limit=10):
+    return index.complete(prefix, limit=limit, boost_ids=circle_ids(user))
+
+
+def sync_user(user):
+    """Re-indexes `user` from the database (called on commit by the signals)."""
+    if not index.is_built:
+        return
+    profile = UserProfile.objects.filter(pk=user.pk).values_list("display_name", "picture").first()
+    if profile is None:
+        index.remove(user.pk)
+        return
+    display_name, picture = profile
+    index.upsert(
+        user.pk, user.username, user.first_name, user.last_name, display_name, picture,
+        is_active=user.is_active,
+    )
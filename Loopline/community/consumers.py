@@ -1,99 +1,270 @@
 # C:\Users\Vinay\Project\Loopline\community\consumers.py
 # --- FINAL FIX for Global and Private Channels ---
 
+import asyncio
 import json
+from functools import lru_cache
 from urllib.parse import parse_qs
-from asgiref.sync import async_to_sync
-from channels.generic.websocket import WebsocketConsumer
-from rest_framework.authtoken.models import Token
-from django.contrib.auth import get_user_model
-
-User = get_user_model()
-
-def get_user_from_token(token_key):
-    try:
-        token = Token.objects.get(key=token_key)
-        return token.user
-    except Token.DoesNotExist:
-        return None
-
-class UserActivityConsumer(WebsocketConsumer):
-    
+
+import msgpack
+from channels.db import database_sync_to_async
+from channels.generic.websocket import AsyncWebsocketConsumer
+from django.conf import settings
+from django.db.models import Q
+
+from . import instrumentation, presence
+from .models import Group, StatusPost
+from .realtime import group_topic_group, post_topic_group, user_group
+from .timeline import visible_post_filter
+
+# Clients may ask for events to be coalesced with ?coalesce_ms=<window>.
+DEFAULT_COALESCE_MS = getattr(settings, "WS_COALESCE_DEFAULT_MS", 0)
+MAX_COALESCE_MS = getattr(settings, "WS_COALESCE_MAX_MS", 1000)
+
+# How many topics (post_<id>, group_<slug>) one socket may subscribe to.
+MAX_TOPICS_PER_CONNECTION = getattr(settings, "WS_MAX_TOPICS_PER_CONNECTION", 50)
+
+# Clients offering this subprotocol get msgpack binary frames instead of JSON.
+MSGPACK_SUBPROTOCOL = "loopline.msgpack"
+
+# Event types of which only the most recent one in a window matters.
+LATEST_ONLY_EVENT_TYPES = {"notification_count"}
+
+
+@lru_cache(maxsize=256)
+def json_text_to_msgpack(text):
+    # Every msgpack socket in this process that receives the same event
+    # shares one conversion.
+    return msgpack.packb(json.loads(text))
+
+
+@database_sync_to_async
+def resolve_topic(topic, user):
+    """
+    Maps a client topic name to its channel-layer group, or returns None if
+    the topic is malformed or the user may not see it (private groups).
+    """
+    kind, _, key = topic.partition('_')
+    if kind == 'post' and key.isdigit():
+        visible = StatusPost.objects.filter(pk=int(key)).filter(visible_post_filter(user))
+        return post_topic_group(key) if visible.exists() else None
+    if kind == 'group' and key:
+        group_id = (
+            Group.objects.filter(slug=key)
+            .filter(Q(privacy_level='public') | Q(members=user))
+            .values_list('id', flat=True)
+            .first()
+        )
+        return group_topic_group(group_id) if group_id else None
+    return None
+
+
+def coalesce_events(events):
+    """
+    Merges the events buffered during one window into the list that is sent
+    as a single 'batch' frame:
+
+    - all 'new_post' events collapse into one 'new_posts' event holding the
+      post IDs (newest first), which the client can hydrate with a single
+      posts/batch/ request; posts deleted in the same window are left out;
+    - of the count updates in LATEST_ONLY_EVENT_TYPES only the last is kept;
+    - everything else is passed through in order.
+    """
+    deleted_ids = {
+        event["payload"]["post_id"] for event in events if event.get("type") == "post_deleted"
+    }
+    new_post_ids = []
+    latest_only = {}
+    merged = []
+    for event in events:
+        event_type = event.get("type")
+        if event_type == "new_post":
+            post_id = event["payload"]["id"]
+            if post_id not in deleted_ids and post_id not in new_post_ids:
+                new_post_ids.append(post_id)
+        elif event_type in LATEST_ONLY_EVENT_TYPES:
+            latest_only[event_type] = event
+        else:
+            merged.append(event)
+
+    if new_post_ids:
+        merged.insert(0, {"type": "new_posts", "payload": {"post_ids": new_post_ids[::-1]}})
+    merged.extend(latest_only.values())
+    return merged
+
+
+class UserActivityConsumer(AsyncWebsocketConsumer):
+    """
+    One socket per browser tab. The user comes from TokenAuthMiddleware
+    (scope["user"]), so connecting costs no extra query, and every handler is
+    async, so an idle socket holds no worker thread.
+    """
+
     # [FIX] Define group names as class attributes for clarity and reuse
     GLOBAL_GROUP_NAME = "global_notifications"
 
-    def connect(self):
-        query_string = self.scope['query_string'].decode('utf-8')
-        query_params = parse_qs(query_string)
-        token_key = query_params.get('token', [None])[0]
-        
-        if token_key is None:
-            self.close()
-            return
-            
-        user = get_user_from_token(token_key)
-        
-        if user is None:
-            self.close()
+    async def connect(self):
+        user = self.scope.get('user')
+        if user is None or not user.is_authenticated:
+            await self.close()
             return
 
-        self.scope['user'] = user
-        
         # [FIX] Keep track of the user-specific group name
-        self.user_group_name = f'user_{user.id}'
-        
-        # [FIX] Subscribe the user to THEIR PRIVATE group
-        async_to_sync(self.channel_layer.group_add)(
-            self.user_group_name,
-            self.channel_name
-        )
-        
-        # [FIX] Subscribe the user to THE GLOBAL group as well
-        async_to_sync(self.channel_layer.group_add)(
-            self.GLOBAL_GROUP_NAME,
-            self.channel_name
-        )
-        
-        self.accept()
-        print(f"CONSUMER-DEBUG: User '{user.username}' CONNECTED. Joined groups: '{self.user_group_name}' and '{self.GLOBAL_GROUP_NAME}'.\n")
+        self.user_id = user.id
+        self.user_group_name = user_group(user.id)
+
+        # [FIX] Subscribe the user to THEIR PRIVATE group and THE GLOBAL group
+        await self.channel_layer.group_add(self.user_group_name, self.channel_name)
+        await self.channel_layer.group_add(self.GLOBAL_GROUP_NAME, self.channel_name)
+
+        self.coalesce_window = self.get_coalesce_window()
+        self.pending_events = []
+        self.flush_task = None
+        self.use_msgpack = MSGPACK_SUBPROTOCOL in self.scope.get('subprotocols', [])
+        self.topics = {}  # client topic name -> channel-layer group
 
-    def disconnect(self, close_code):
+        # Mark the user online only once their group can receive events.
+        self.presence_epoch = await presence.connection_opened(self.user_id)
+        self.heartbeat_task = asyncio.create_task(self.send_heartbeats())
+
+        await self.accept(subprotocol=MSGPACK_SUBPROTOCOL if self.use_msgpack else None)
+        instrumentation.incr("ws_connections_opened_total")
+
+    async def disconnect(self, close_code):
         # [FIX] Unsubscribe from both groups on disconnect
         if hasattr(self, 'user_group_name'):
-            async_to_sync(self.channel_layer.group_discard)(
-                self.user_group_name,
-                self.channel_name
-            )
-        
-        # Always unsubscribe from the global group
-        async_to_sync(self.channel_layer.group_discard)(
-            self.GLOBAL_GROUP_NAME,
-            self.channel_name
-        )
-        print(f"CONSUMER-DEBUG: User '{self.scope['user'].username}' DISCONNECTED.")
+            instrumentation.incr("ws_connections_closed_total")
+            self.heartbeat_task.cancel()
+            if self.flush_task:
+                self.flush_task.cancel()
+            await presence.connection_closed(self.user_id)
+            for group_name in self.topics.values():
+                await self.channel_layer.group_discard(group_name, self.channel_name)
+            await self.channel_layer.group_discard(self.user_group_name, self.channel_name)
+            await self.channel_layer.group_discard(self.GLOBAL_GROUP_NAME, self.channel_name)
+
+    async def send_heartbeats(self):
+        # Keeps the user's presence key alive for as long as the socket is.
+        while True:
+            await asyncio.sleep(presence.HEARTBEAT_INTERVAL)
+            self.presence_epoch = await presence.heartbeat(self.user_id, self.presence_epoch)
+
+    async def receive(self, text_data=None, bytes_data=None):
+        """
+        Handles client requests:
+        {"action": "subscribe" | "unsubscribe", "topic": "post_<id>" | "group_<slug>"}
+        """
+        try:
+            if bytes_data is not None:
+                request = msgpack.unpackb(bytes_data)
+            else:
+                request = json.loads(text_data or '')
+            action, topic = request['action'], str(request['topic'])
+        except (ValueError, KeyError, TypeError, msgpack.UnpackException):
+            await self.send_error('Expected {"action": ..., "topic": ...}.')
+            return
+
+        if action == 'subscribe':
+            await self.subscribe(topic)
+        elif action == 'unsubscribe':
+            await self.unsubscribe(topic)
+        else:
+            await self.send_error(f"Unknown action '{action}'.", topic)
+
+    async def subscribe(self, topic):
+        if topic not in self.topics:
+            if len(self.topics) >= MAX_TOPICS_PER_CONNECTION:
+                await self.send_error(
+                    f'At most {MAX_TOPICS_PER_CONNECTION} topics per connection.', topic
+                )
+                return
+            group_name = await resolve_topic(topic, self.scope['user'])
+            if group_name is None:
+                await self.send_error('Unknown topic.', topic)
+                return
+            self.topics[topic] = group_name
+            await self.channel_layer.group_add(group_name, self.channel_name)
+        await self.send_encoded(json.dumps({'type': 'subscribed', 'topic': topic}))
+
+    async def unsubscribe(self, topic):
+        group_name = self.topics.pop(topic, None)
+        if group_name:
+            await self.channel_layer.group_discard(group_name, self.channel_name)
+        await self.send_encoded(json.dumps({'type': 'unsubscribed', 'topic': topic}))
 
+    async def send_error(self, detail, topic=None):
+        await self.send_encoded(json.dumps({'type': 'error', 'detail': detail, 'topic': topic}))
+
+    def get_coalesce_window(self):
+        """The client's coalescing window in seconds; 0 sends every event at once."""
+        query_params = parse_qs(self.scope.get('query_string', b'').decode('utf-8'))
+        try:
+            window_ms = int(query_params.get('coalesce_ms', [DEFAULT_COALESCE_MS])[0])
+        except ValueError:
+            window_ms = DEFAULT_COALESCE_MS
+        return max(0, min(window_ms, MAX_COALESCE_MS)) / 1000
+
+    async def send_encoded(self, text):
+        """Sends JSON text as-is, or as msgpack if the client negotiated it."""
+        frame_format = 'msgpack' if self.use_msgpack else 'json'
+        try:
+            if self.use_msgpack:
+                await self.send(bytes_data=json_text_to_msgpack(text))
+            else:
+                await self.send(text_data=text)
+        except Exception:
+            instrumentation.incr("ws_send_failures_total", format=frame_format)
+            raise
+        instrumentation.incr("ws_frames_sent_total", format=frame_format)
+
+    async def push(self, event, legacy_key):
+        """
+        Forwards a channel-layer event to the client. Events built with
+        realtime.encode_event() carry pre-encoded 'text'; older ones carry
+        the client message as a dict under `legacy_key`.
+        """
+        text = event.get('text')
+        if not self.coalesce_window:
+            await self.send_encoded(text if text is not None else json.dumps(event[legacy_key]))
+            return
+        self.pending_events.append(json.loads(text) if text is not None else event[legacy_key])
+        if self.flush_task is None:
+            self.flush_task = asyncio.create_task(self.flush_after_window())
+
+    async def flush_after_window(self):
+        await asyncio.sleep(self.coalesce_window)
+        events, self.pending_events, self.flush_task = self.pending_events, [], None
+        await self.send_encoded(json.dumps({'type': 'batch', 'events': coalesce_events(events)}))
 
     # --- EXISTING METHOD: Handles receiving notification events from signals ---
-    def send_notification(self, event):
-        message_data = event['message']
-        # The frontend now expects a flat structure, so we send the inner message directly
-        self.send(text_data=json.dumps(message_data))
-        print(f"!!! CONSUMER-DEBUG: Sent 'new_notification' to browser for group '{self.user_group_name}'")
+    async def send_notification(self, event):
+        # The frontend expects a flat structure, so we send the inner message directly
+        await self.push(event, 'message')
 
     # --- EXISTING METHOD: Handles receiving new post events from signals ---
-    def send_live_post(self, event):
-        message_data = event['message']
-        # The frontend now expects a flat structure, so we send the inner message directly
-        self.send(text_data=json.dumps(message_data))
-        print(f"!!! CONSUMER-DEBUG: Sent 'new_post' to browser for group '{self.user_group_name}'")
+    async def send_live_post(self, event):
+        # The frontend expects a flat structure, so we send the inner message directly
+        await self.push(event, 'message')
+
+    # --- Handles events sent to subscribed topics (post_<id>, group_<slug>) ---
+    async def send_topic_event(self, event):
+        await self.push(event, 'message')
+
+    # --- Sent to the user's sockets when they leave or are removed from a group ---
+    async def recheck_topics(self, event):
+        """
+        Topic access is checked at subscribe time, so a removed member would
+        keep receiving a private group's events. Drop every subscription
+        the user may no longer see.
+        """
+        for topic in list(self.topics):
+            if await resolve_topic(topic, self.scope['user']) is None:
+                await self.unsubscribe(topic)
 
     # --- [FIX] NEW GENERIC METHOD: Handles global broadcast events ---
-    def broadcast_message(self, event):
+    async def broadcast_message(self, event):
         """
         Handles any message sent to the global group.
         It forwards the 'payload' of the message directly to the client.
-        This is what our post_delete signal uses.
         """
-        payload = event['payload']
-        self.send(text_data=json.dumps(payload))
-        print(f"!!! CONSUMER-DEBUG: BROADCASTED event of type '{payload.get('type')}' to ALL connected clients.")
\ No newline at end of file
+        await self.push(event, 'payload')
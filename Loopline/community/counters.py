@@ -0,0 +1,152 @@
+# community/counters.py
+"""
+Denormalized like/comment counters on StatusPost and Comment, and the
+member_count of Group.
+
+The signal handlers call adjust_like_count / adjust_comment_count /
+adjust_member_count, which use a single F() UPDATE so concurrent writers
+never lose increments. Removals from a group go through
+refresh_member_counts instead, because the m2m "remove" signal also lists
+users who were not members. The reconcile_* helpers recompute the counters
+from their source tables in set-based batches and are used by the
+reconcile_counters command.
+"""
+
+from django.contrib.contenttypes.models import ContentType
+from django.db.models import Count, F, IntegerField, OuterRef, Q, Subquery
+from django.db.models.functions import Coalesce
+
+from .models import Comment, Group, Like, StatusPost
+
+# Models that carry a like_count column, keyed by model class.
+LIKEABLE_MODELS = (StatusPost, Comment)
+
+
+def _adjust(model, pk, field, delta):
+    queryset = model.objects.filter(pk=pk)
+    if delta < 0:
+        # Never go below zero, even if the counter has drifted.
+        queryset = queryset.filter(**{f"{field}__gte": -delta})
+    queryset.update(**{field: F(field) + delta})
+
+
+def adjust_like_count(content_type_id, object_id, delta):
+    """
+    Adds delta to the like_count of the liked object, if it has one.
+    """
+    model = ContentType.objects.get_for_id(content_type_id).model_class()
+    if model in LIKEABLE_MODELS:
+        _adjust(model, object_id, "like_count", delta)
+
+
+def adjust_comment_count(content_type_id, object_id, delta):
+    """
+    Adds delta to the comment_count of the commented StatusPost.
+    """
+    if content_type_id == ContentType.objects.get_for_model(StatusPost).id:
+        _adjust(StatusPost, object_id, "comment_count", delta)
+
+
+def adjust_member_count(group_ids, delta):
+    """
+    Adds delta to the member_count of each group in group_ids.
+    """
+    for group_id in group_ids:
+        _adjust(Group, group_id, "member_count", delta)
+
+
+def _count_subquery(queryset, group_by="object_id"):
+    return Coalesce(
+        Subquery(
+            queryset.order_by()
+            .values(group_by)
+            .annotate(total=Count("id"))
+            .values("total"),
+            output_field=IntegerField(),
+        ),
+        0,
+    )
+
+
+def _reconcile(model, counters, batch_size):
+    """
+    Walks `model` in primary-key ranges and rewrites every counter that no
+    longer matches its source table. `counters` maps field name to the
+    correlated count expression. Returns the number of repaired rows.
+    """
+    drift_q = Q()
+    for field in counters:
+        drift_q |= ~Q(**{field: F(f"actual_{field}")})
+
+    repaired = 0
+    last_pk = 0
+    while True:
+        batch_pks = list(
+            model.objects.filter(pk__gt=last_pk)
+            .order_by("pk")
+            .values_list("pk", flat=True)[:batch_size]
+        )
+        if not batch_pks:
+            return repaired
+        last_pk = batch_pks[-1]
+
+        drifted = (
+            model.objects.filter(pk__gte=batch_pks[0], pk__lte=last_pk)
+            .annotate(
+                **{f"actual_{field}": expr for field, expr in counters.items()}
+            )
+            .filter(drift_q)
+            .values("pk")
+        )
+        repaired += model.objects.filter(pk__in=drifted).update(**counters)
+
+
+def reconcile_post_counters(batch_size=1000):
+    post_type = ContentType.objects.get_for_model(StatusPost)
+    return _reconcile(
+        StatusPost,
+        {
+            "like_count": _count_subquery(
+                Like.objects.filter(content_type=post_type, object_id=OuterRef("pk"))
+            ),
+            "comment_count": _count_subquery(
+                Comment.objects.filter(
+                    content_type=post_type, object_id=OuterRef("pk")
+                )
+            ),
+        },
+        batch_size,
+    )
+
+
+def reconcile_comment_counters(batch_size=1000):
+    comment_type = ContentType.objects.get_for_model(Comment)
+    return _reconcile(
+        Comment,
+        {
+            "like_count": _count_subquery(
+                Like.objects.filter(
+                    content_type=comment_type, object_id=OuterRef("pk")
+                )
+            ),
+        },
+        batch_size,
+    )
+
+
+def _member_count_subquery():
+    return _count_subquery(
+        Group.members.through.objects.filter(group_id=OuterRef("pk")),
+        group_by="group_id",
+    )
+
+
+def refresh_member_counts(group_ids):
+    """
+    Recounts the member_count of the given groups from the membership table.
+    """
+    Group.objects.filter(pk__in=group_ids).update(member_count=_member_count_subquery())
+
+
+def reconcile_group_counters(batch_size=1000):
+    return _reconcile(Group, {"member_count": _member_count_subquery()}, batch_size)
@@ -0,0 +1,136 @@
+# community/engagement.py
+"""
+Throttled live engagement counters for posts.
+
+Likes, comments and poll votes only mark their post as "dirty". Once per
+ENGAGEMENT_UPDATE_INTERVAL a background thread takes the dirty set, reads
+the current like count, comment count and poll tallies of all of those posts
+in two queries, and sends one 'engagement' event per post to the post_<id>
+topic (see consumers.py). However many writes a hot post gets, its viewers
+receive at most one update per interval.
+
+The event carries absolute values read at send time rather than summed
+deltas, so a lost or duplicated signal can never make clients drift.
+A cache key per post keeps the bound when several processes serve writes:
+a post that was just announced elsewhere stays dirty until the next tick.
+"""
+
+import logging
+import math
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import close_old_connections
+from django.db.models import Count
+
+from .models import PollVote, StatusPost
+from .realtime import dispatcher, encode_event, post_topic_group
+
+logger = logging.getLogger(__name__)
+
+UPDATE_INTERVAL = getattr(settings, "ENGAGEMENT_UPDATE_INTERVAL", 1.0)
+
+THROTTLE_KEY_PREFIX = "engagement-sent"
+
+
+def build_engagement_events(post_ids):
+    """
+    Returns {post_id: channel-layer message} with the current counters of
+    the given posts.
+    """
+    posts = StatusPost.objects.filter(pk__in=post_ids).values_list(
+        "pk", "like_count", "comment_count", "poll__id"
+    )
+    tallies = {}
+    for poll_id, option_id, votes in (
+        PollVote.objects.filter(poll__post_id__in=post_ids)
+        .values("poll_id", "option_id")
+        .annotate(votes=Count("id"))
+        .values_list("poll_id", "option_id", "votes")
+    ):
+        tallies.setdefault(poll_id, {})[option_id] = votes
+
+    events = {}
+    for post_id, like_count, comment_count, poll_id in posts:
+        payload = {
+            "post_id": post_id,
+            "like_count": like_count,
+            "comment_count": comment_count,
+        }
+        if poll_id:
+            option_votes = tallies.get(poll_id, {})
+            payload["poll"] = {
+                "id": poll_id,
+                "option_votes": {str(option_id): votes for option_id, votes in option_votes.items()},
+                "total_votes": sum(option_votes.values()),
+            }
+        events[post_id] = encode_event(
+            "send_topic_event", {"type": "engagement", "payload": payload}
+        )
+    return events
+
+
+class EngagementAggregator:
+    def __init__(self):
+        self._dirty = set()
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def mark(self, post_id):
+        with self._lock:
+            self._dirty.add(post_id)
+        self._ensure_worker()
+
+    def _ensure_worker(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._thread = threading.Thread(
+                target=self._run, name="engagement-aggregator", daemon=True
+            )
+            self._thread.start()
+
+    def _run(self):
+        while True:
+            time.sleep(UPDATE_INTERVAL)
+            close_old_connections()
+            try:
+                self.flush()
+            except Exception:
+                logger.exception("Sending engagement updates failed")
+
+    def flush(self):
+        """
+        Sends one update for every dirty post that was not announced during
+        the last interval. Returns the IDs of the posts that were sent.
+        """
+        with self._lock:
+            post_ids, self._dirty = self._dirty, set()
+        if not post_ids:
+            return []
+
+        due, deferred = [], []
+        for post_id in post_ids:
+            throttle_key = f"{THROTTLE_KEY_PREFIX}:{post_id}"
+            if cache.add(throttle_key, 1, timeout=math.ceil(UPDATE_INTERVAL)):
+                due.append(post_id)
+            else:
+                deferred.append(post_id)
+        if deferred:
+            with self._lock:
+                self._dirty.update(deferred)
+
+        for post_id, message in build_engagement_events(due).items():
+            dispatcher.enqueue([post_topic_group(post_id)], message)
+        return due
+
+
+aggregator = EngagementAggregator()
+
+
+def mark_post_engaged(post_id):
+    aggregator.mark(post_id)
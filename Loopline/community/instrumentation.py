@@ -0,0 +1,123 @@
+# community/instrumentation.py
+"""
+In-process counters and histograms for the realtime pipeline.
+
+    instrumentation.incr("realtime_group_sends_total", 12)
+    instrumentation.observe("realtime_fanout_width", len(recipients))
+    instrumentation.sampled_debug(logger, "Notification created for %s", user_id)
+
+Metrics are kept per process and exported in the Prometheus text format by
+the metrics/realtime/ endpoint. When METRICS_ENABLED is False, incr() and
+observe() return after a single boolean check, so call sites can stay on
+hot paths.
+
+sampled_debug() replaces the old per-event print() calls: it logs at DEBUG
+level, and only for a REALTIME_DEBUG_SAMPLE_RATE fraction of calls.
+"""
+
+import bisect
+import logging
+import random
+import threading
+
+from django.conf import settings
+
+ENABLED = getattr(settings, "METRICS_ENABLED", False)
+DEBUG_SAMPLE_RATE = getattr(settings, "REALTIME_DEBUG_SAMPLE_RATE", 0.01)
+
+# Upper bounds of the histogram buckets. The same buckets serve sizes
+# (fan-out width) and durations in milliseconds.
+BUCKETS = (1, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000, 50000)
+
+_lock = threading.Lock()
+_counters = {}  # (name, labels) -> value
+_histograms = {}  # (name, labels) -> [bucket counts..., +Inf count, sum]
+
+
+def _labels_key(labels):
+    return tuple(sorted(labels.items()))
+
+
+def incr(name, value=1, **labels):
+    if not ENABLED:
+        return
+    key = (name, _labels_key(labels))
+    with _lock:
+        _counters[key] = _counters.get(key, 0) + value
+
+
+def observe(name, value, **labels):
+    if not ENABLED:
+        return
+    key = (name, _labels_key(labels))
+    index = bisect.bisect_left(BUCKETS, value)
+    with _lock:
+        histogram = _histograms.get(key)
+        if histogram is None:
+            histogram = _histograms[key] = [0] * (len(BUCKETS) + 2)
+        histogram[index] += 1
+        histogram[-1] += value
+
+
+def sampled_debug(logger, message, *args):
+    if logger.isEnabledFor(logging.DEBUG) and random.random() < DEBUG_SAMPLE_RATE:
+        logger.debug(message, *args)
+
+
+def reset():
+    with _lock:
+        _counters.clear()
+        _histograms.clear()
+
+
+def snapshot():
+    """Returns {"counters": {...}, "histograms": {...}} keyed by rendered series name."""
+    with _lock:
+        counters = dict(_counters)
+        histograms = {key: list(values) for key, values in _histograms.items()}
+    return {
+        "counters": {_series(name, labels): value for (name, labels), value in counters.items()},
+        "histograms": {
+            _series(name, labels): {
+                "buckets": dict(zip([*map(str, BUCKETS), "+Inf"], values[:-1])),
+                "count": sum(values[:-1]),
+                "sum": values[-1],
+            }
+            for (name, labels), values in histograms.items()
+        },
+    }
+
+
+def _series(name, labels, extra=()):
+    labels = [*labels, *extra]
+    if not labels:
+        return name
+    rendered = ",".join(f'{key}="{value}"' for key, value in labels)
+    return f"{name}{{{rendered}}}"
+
+
+def render_prometheus():
+    with _lock:
+        counters = sorted(_counters.items())
+        histograms = sorted((key, list(values)) for key, values in _histograms.items())
+
+    lines = []
+    for name in sorted({name for (name, _), _ in counters}):
+        lines.append(f"# TYPE {name} counter")
+        lines.extend(
+            f"{_series(name, labels)} {value}"
+            for (series_name, labels), value in counters
+            if series_name == name
+        )
+    for name in sorted({name for (name, _), _ in histograms}):
+        lines.append(f"# TYPE {name} histogram")
+        for (series_name, labels), values in histograms:
+            if series_name != name:
+                continue
+            cumulative = 0
+            for bound, count in zip([*map(str, BUCKETS), "+Inf"], values[:-1]):
+                cumulative += count
+                lines.append(f"{_series(name + '_bucket', labels, [('le', bound)])} {cumulative}")
+            lines.append(f"{_series(name + '_sum', labels)} {values[-1]}")
+            lines.append(f"{_series(name + '_count', labels)} {cumulative}")
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,194 @@
+# community/management/commands/benchmark_post_search.py
+"""
+Compares the old icontains post search with the full-text search engine
+(community/search.py) on a large, seeded table.
+
+    python manage.py benchmark_post_search --posts 3000000
+    python manage.py benchmark_post_search --posts 0 --queries "remote hiring" python
+
+Posts are generated inside Postgres (generate_series over a fixed
+vocabulary), so seeding millions takes minutes rather than hours. Each
+query is timed the way the search endpoint runs it: COUNT for the paginator
+plus the first page (and, for full-text search, the page's headlines).
+The report is printed and saved as JSON under --output-dir. Point it at a
+scratch database; the seeded posts are removed afterwards unless --keep is
+given.
+"""
+
+import json
+import os
+import statistics
+import subprocess
+import time
+from datetime import datetime, timezone
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import connection
+
+from community.models import StatusPost
+from community.search import SEARCH_CONFIG, headlines_for, search_posts
+from community.timeline import visible_post_filter
+
+from .benchmark_ws_connections import percentile
+
+User = get_user_model()
+
+AUTHOR_USERNAME = "searchbench_author"
+
+VOCABULARY = (
+    "team project remote hiring python django postgres design product launch "
+    "startup career interview manager engineer frontend backend cloud data "
+    "analytics marketing sales growth community event meetup conference talk "
+    "workshop mentor intern graduate research paper release feature bug fix "
+    "performance latency cache index query search ranking feed group message "
+    "coffee weekend travel office hybrid onsite salary promotion feedback "
+    "learning course certificate open source contribution review deadline"
+).split()
+
+DEFAULT_QUERIES = ["python", "remote hiring", "conference talk", "zebra"]
+
+
+class Command(BaseCommand):
+    help = "Benchmarks icontains vs. full-text post search on seeded data."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--posts", type=int, default=1_000_000, help="Posts to seed (0 to reuse).")
+        parser.add_argument("--queries", nargs="+", default=DEFAULT_QUERIES)
+        parser.add_argument("--runs", type=int, default=5, help="Timed runs per query and engine.")
+        parser.add_argument("--page-size", type=int, default=10)
+        parser.add_argument("--label", default="run")
+        parser.add_argument("--output-dir", default="benchmarks/results")
+        parser.add_argument("--keep", action="store_true", help="Keep the seeded posts.")
+
+    def handle(self, *args, **options):
+        author, _ = User.objects.get_or_create(username=AUTHOR_USERNAME)
+        if options["posts"]:
+            self.stdout.write(self.style.NOTICE(f"Seeding {options['posts']} posts..."))
+            self.seed(author, options["posts"])
+        total_posts = StatusPost.objects.count()
+
+        try:
+            results = {
+                "label": options["label"],
+                "started_at": datetime.now(timezone.utc).isoformat(),
+                "git_revision": self.git_revision(),
+                "total_posts": total_posts,
+                "queries": {
+                    query: {
+                        engine: self.time_engine(engine, query, author, options)
+                        for engine in ("icontains", "fulltext")
+                    }
+                    for query in options["queries"]
+                },
+            }
+        finally:
+            if not options["keep"]:
+                self.stdout.write(self.style.NOTICE("Removing seeded posts..."))
+                self.remove_seeded(author)
+
+        self.report(results)
+        self.save(results, options)
+
+    def seed(self, author, count):
+        table = StatusPost._meta.db_table
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"""
+                INSERT INTO {table} (author_id, content, created_at, updated_at, like_count, comment_count)
+                SELECT
+                    %(author)s,
+                    (
+                        SELECT string_agg(
+                            (%(words)s::text[])[1 + floor(random() * %(vocabulary)s)::int], ' '
+                        )
+                        FROM generate_series(1, 8 + series.n %% 24)
+                    ),
+                    now() - series.n * interval '1 second',
+                    now(),
+                    0,
+                    0
+                FROM generate_series(1, %(count)s) AS series(n)
+                """,
+                {"author": author.pk, "words": list(VOCABULARY), "vocabulary": len(VOCABULARY), "count": count},
+            )
+            cursor.execute(
+                f"""
+                UPDATE {table}
+                SET search_vector =
+                    setweight(to_tsvector(%(config)s, coalesce(content, '')), 'A')
+                    || setweight(to_tsvector(%(config)s, %(username)s), 'B')
+                WHERE author_id = %(author)s AND search_vector IS NULL
+                """,
+                {"config": SEARCH_CONFIG, "username": author.username, "author": author.pk},
+            )
+            cursor.execute(f"ANALYZE {table}")
+
+    def remove_seeded(self, author):
+        # One DELETE instead of author.delete(), whose cascade would load
+        # every seeded post into memory first. The seeded posts have no
+        # likes, comments or other dependent rows.
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"DELETE FROM {StatusPost._meta.db_table} WHERE author_id = %s", [author.pk]
+            )
+        author.delete()
+
+    def run_icontains(self, query, viewer, page_size):
+        queryset = (
+            StatusPost.objects.filter(content__icontains=query)
+            .filter(visible_post_filter(viewer))
+            .order_by("-created_at")
+        )
+        return queryset.count(), list(queryset[:page_size])
+
+    def run_fulltext(self, query, viewer, page_size):
+        queryset = search_posts(StatusPost.objects.all(), query, viewer)
+        page = list(queryset[:page_size])
+        headlines_for(page, query)
+        return queryset.count(), page
+
+    def time_engine(self, engine, query, viewer, options):
+        run = getattr(self, f"run_{engine}")
+        run(query, viewer, options["page_size"])  # Warm-up.
+        timings, matches = [], 0
+        for _ in range(options["runs"]):
+            started = time.perf_counter()
+            matches, _ = run(query, viewer, options["page_size"])
+            timings.append((time.perf_counter() - started) * 1000)
+        timings.sort()
+        return {
+            "matches": matches,
+            "mean_ms": round(statistics.mean(timings), 2),
+            "p50_ms": round(percentile(timings, 0.50), 2),
+            "p95_ms": round(percentile(timings, 0.95), 2),
+        }
+
+    def git_revision(self):
+        try:
+            return subprocess.run(
+                ["git", "rev-parse", "--short", "HEAD"],
+                capture_output=True,
+                text=True,
+                check=True,
+            ).stdout.strip()
+        except (OSError, subprocess.CalledProcessError):
+            return None
+
+    def report(self, results):
+        self.stdout.write(f"\nPosts in table: {results['total_posts']}")
+        for query, engines in results["queries"].items():
+            self.stdout.write(f"\n{query!r}")
+            for engine, summary in engines.items():
+                self.stdout.write(
+                    f"{engine:>12}: {summary['matches']} matches | p50 {summary['p50_ms']} ms | "
+                    f"p95 {summary['p95_ms']} ms"
+                )
+
+    def save(self, results, options):
+        os.makedirs(options["output_dir"], exist_ok=True)
+        stamp = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%SZ")
+        path = os.path.join(options["output_dir"], f"post-search-{options['label']}-{stamp}.json")
+        with open(path, "w") as output_file:
+            json.dump(results, output_file, indent=2)
+        self.stdout.write(self.style.SUCCESS(f"\nResults saved to {path}"))
@@ -0,0 +1,155 @@
+# community/management/commands/benchmark_ws_connections.py
+"""
+Measures how many concurrent /ws/activity/ sockets one server process holds.
+
+Start a single server process, e.g.
+
+    daphne -b 127.0.0.1 -p 8000 config.asgi:application
+
+then run this command against it. Sockets are opened in steps and kept open;
+the run stops at the first step where sockets fail to connect or drop. With
+--server-pid, the server's resident memory and thread count are sampled after
+each step (Linux only). Run it once on the old and once on the new code to
+compare. Raise the open-file limit (ulimit -n) on both sides first.
+"""
+
+import asyncio
+import json
+import time
+from urllib.parse import urlencode, urlparse
+
+from autobahn.asyncio.websocket import WebSocketClientFactory, WebSocketClientProtocol
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework.authtoken.models import Token
+
+User = get_user_model()
+
+
+class BenchmarkClientProtocol(WebSocketClientProtocol):
+    def onOpen(self):
+        if not self.factory.opened.done():
+            self.factory.opened.set_result(True)
+
+    def onClose(self, wasClean, code, reason):
+        if not self.factory.opened.done():
+            self.factory.opened.set_result(False)
+        self.factory.closed = True
+
+
+def read_process_status(pid):
+    """Returns (rss_kib, threads) of a local process, from /proc."""
+    values = {}
+    with open(f"/proc/{pid}/status") as status_file:
+        for line in status_file:
+            name, _, value = line.partition(":")
+            values[name] = value.split()[0] if value.split() else ""
+    return int(values.get("VmRSS", 0)), int(values.get("Threads", 0))
+
+
+def percentile(sorted_values, fraction):
+    if not sorted_values:
+        return None
+    index = min(len(sorted_values) - 1, int(round(fraction * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+class Command(BaseCommand):
+    help = "Opens WebSocket connections in steps until the server stops accepting them."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--url", default="ws://127.0.0.1:8000/ws/activity/")
+        parser.add_argument("--username", required=True, help="User whose token the sockets use.")
+        parser.add_argument("--max-connections", type=int, default=10000)
+        parser.add_argument("--step", type=int, default=500, help="Sockets opened per step.")
+        parser.add_argument("--hold", type=float, default=2.0, help="Seconds to wait after each step.")
+        parser.add_argument("--timeout", type=float, default=10.0, help="Per-socket connect timeout.")
+        parser.add_argument("--server-pid", type=int, help="Sample this process's memory and threads.")
+        parser.add_argument("--output", help="Also write the results as JSON to this file.")
+
+    def handle(self, *args, **options):
+        try:
+            user = User.objects.get(username=options["username"])
+        except User.DoesNotExist:
+            raise CommandError(f"User '{options['username']}' does not exist.")
+        token, _ = Token.objects.get_or_create(user=user)
+
+        results = asyncio.run(self.run_benchmark(token.key, options))
+
+        for step in results["steps"]:
+            self.stdout.write(
+                f"{step['open']:>7} open | failed {step['failed']:>5} | "
+                f"p95 connect {step['connect_p95_ms']} ms | "
+                f"server rss {step.get('server_rss_mib', '-')} MiB, "
+                f"threads {step.get('server_threads', '-')}"
+            )
+        self.stdout.write(self.style.SUCCESS(f"\nMax sockets held: {results['max_held']}"))
+
+        if options["output"]:
+            with open(options["output"], "w") as output_file:
+                json.dump(results, output_file, indent=2)
+            self.stdout.write(f"Results written to {options['output']}")
+
+    async def open_socket(self, loop, url, host, port, timeout):
+        factory = WebSocketClientFactory(url)
+        factory.protocol = BenchmarkClientProtocol
+        factory.opened = loop.create_future()
+        factory.closed = False
+        started = time.perf_counter()
+        try:
+            transport, _ = await asyncio.wait_for(
+                loop.create_connection(factory, host, port), timeout
+            )
+            opened = await asyncio.wait_for(factory.opened, timeout)
+        except (OSError, asyncio.TimeoutError):
+            return None, None
+        if not opened:
+            transport.close()
+            return None, None
+        return (transport, factory), (time.perf_counter() - started) * 1000
+
+    async def run_benchmark(self, token_key, options):
+        loop = asyncio.get_running_loop()
+        parsed = urlparse(options["url"])
+        url = f"{options['url']}?{urlencode({'token': token_key})}"
+        host, port = parsed.hostname, parsed.port or 80
+
+        sockets, steps, max_held = [], [], 0
+        try:
+            while len(sockets) < options["max_connections"]:
+                batch = min(options["step"], options["max_connections"] - len(sockets))
+                attempts = await asyncio.gather(
+                    *(
+                        self.open_socket(loop, url, host, port, options["timeout"])
+                        for _ in range(batch)
+                    )
+                )
+                latencies = sorted(latency for _, latency in attempts if latency is not None)
+                sockets.extend(socket for socket, _ in attempts if socket is not None)
+                await asyncio.sleep(options["hold"])
+
+                still_open = [socket for socket in sockets if not socket[1].closed]
+                step = {
+                    "attempted": batch,
+                    "failed": batch - len(latencies),
+                    "dropped": len(sockets) - len(still_open),
+                    "open": len(still_open),
+                    "connect_p50_ms": round(percentile(latencies, 0.50) or 0, 2),
+                    "connect_p95_ms": round(percentile(latencies, 0.95) or 0, 2),
+                    "connect_p99_ms": round(percentile(latencies, 0.99) or 0, 2),
+                }
+                if options["server_pid"]:
+                    rss_kib, threads = read_process_status(options["server_pid"])
+                    step["server_rss_mib"] = round(rss_kib / 1024, 1)
+                    step["server_threads"] = threads
+                steps.append(step)
+
+                sockets = still_open
+                max_held = max(max_held, len(sockets))
+                if step["failed"] or step["dropped"]:
+                    break
+        finally:
+            for transport, _ in sockets:
+                transport.close()
+
+        return {"url": options["url"], "max_held": max_held, "steps": steps}
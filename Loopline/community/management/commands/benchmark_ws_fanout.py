@@ -0,0 +1,258 @@
+# community/management/commands/benchmark_ws_fanout.py
+"""
+End-to-end load test for the realtime pipeline.
+
+Opens N simulated sockets in-process (through config.asgi, so the real
+TokenAuthMiddleware, UserActivityConsumer, presence registry and dispatcher
+are exercised), gives one author F followers (the first N of them online),
+then creates posts and notifications through the ORM and times every
+delivery from the ORM write to the socket.
+
+    python manage.py benchmark_ws_fanout --consumers 10000 --followers 50000 --posts 5
+    python manage.py benchmark_ws_fanout --layer redis --label after-presence
+
+The report (latency percentiles, throughput, memory per connection,
+dispatcher stats) is printed and saved as JSON under --output-dir so runs
+can be compared. The command writes real rows: point it at a scratch
+database. Its users are removed afterwards unless --keep is given.
+"""
+
+import asyncio
+import json
+import os
+import subprocess
+import time
+import tracemalloc
+from datetime import datetime, timezone
+
+from channels.db import database_sync_to_async
+from channels.layers import channel_layers
+from channels.testing import WebsocketCommunicator
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from rest_framework.authtoken.models import Token
+
+from community import realtime
+from community.models import Follow, Notification, StatusPost
+
+from .benchmark_ws_connections import percentile
+
+User = get_user_model()
+
+USERNAME_PREFIX = "wsbench_"
+
+
+class Command(BaseCommand):
+    help = "Measures realtime fan-out latency and throughput with simulated sockets."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--consumers", type=int, default=1000, help="Open sockets.")
+        parser.add_argument(
+            "--followers",
+            type=int,
+            help="Followers of the author (default: --consumers). Followers beyond "
+            "--consumers have no socket, which exercises the presence filter.",
+        )
+        parser.add_argument("--posts", type=int, default=5)
+        parser.add_argument("--notifications", type=int, default=200)
+        parser.add_argument("--layer", choices=["memory", "redis"], default="memory")
+        parser.add_argument("--timeout", type=float, default=60.0, help="Max seconds to wait for deliveries.")
+        parser.add_argument("--label", default="run")
+        parser.add_argument("--output-dir", default="benchmarks/results")
+        parser.add_argument("--keep", action="store_true", help="Keep the benchmark users.")
+
+    def handle(self, *args, **options):
+        options["followers"] = max(options["followers"] or options["consumers"], options["consumers"])
+        self.configure_channel_layer(options["layer"])
+
+        self.stdout.write(self.style.NOTICE("Creating users..."))
+        author, tokens = self.create_users(options)
+        try:
+            results = asyncio.run(self.run_benchmark(author, tokens, options))
+        finally:
+            if not options["keep"]:
+                User.objects.filter(username__startswith=USERNAME_PREFIX).delete()
+
+        self.report(results)
+        self.save(results, options)
+
+    def configure_channel_layer(self, layer):
+        if layer == "memory":
+            settings.CHANNEL_LAYERS = {
+                "default": {
+                    "BACKEND": "channels.layers.InMemoryChannelLayer",
+                    "CONFIG": {"capacity": 1000},
+                }
+            }
+            # The in-memory layer is bound to one event loop, so send inline.
+            realtime.DISPATCH_IN_BACKGROUND = False
+        channel_layers.backends = {}
+
+    def create_users(self, options):
+        User.objects.filter(username__startswith=USERNAME_PREFIX).delete()
+        author = User.objects.create_user(username=f"{USERNAME_PREFIX}author", password="unused")
+        User.objects.bulk_create(
+            User(username=f"{USERNAME_PREFIX}{index}") for index in range(options["followers"])
+        )
+        follower_ids = list(
+            User.objects.filter(username__startswith=USERNAME_PREFIX)
+            .exclude(pk=author.pk)
+            .order_by("pk")
+            .values_list("pk", flat=True)
+        )
+        Follow.objects.bulk_create(
+            Follow(follower_id=follower_id, following=author) for follower_id in follower_ids
+        )
+        online_ids = follower_ids[: options["consumers"]]
+        Token.objects.bulk_create(Token(user_id=user_id, key=Token.generate_key()) for user_id in online_ids)
+        tokens = dict(Token.objects.filter(user_id__in=online_ids).values_list("user_id", "key"))
+        return author, tokens
+
+    async def run_benchmark(self, author, tokens, options):
+        # Imported here so the channel layer settings above are already in place.
+        from config.asgi import application
+
+        arrivals = {}  # (kind, object id) -> list of arrival times
+
+        async def listen(communicator):
+            while True:
+                try:
+                    message = json.loads(await communicator.receive_from(timeout=3600))
+                except asyncio.TimeoutError:
+                    continue
+                received_at = time.perf_counter()
+                if message.get("type") == "new_post":
+                    key = ("post", message["payload"]["id"])
+                elif message.get("type") == "new_notification":
+                    key = ("notification", message["payload"]["id"])
+                else:
+                    continue
+                arrivals.setdefault(key, []).append(received_at)
+
+        # --- Connect ---
+        tracemalloc.start()
+        memory_before, _ = tracemalloc.get_traced_memory()
+        connect_started = time.perf_counter()
+        communicators = []
+        for user_id, key in tokens.items():
+            communicator = WebsocketCommunicator(application, f"/ws/activity/?token={key}")
+            connected, _ = await communicator.connect()
+            if connected:
+                communicators.append(communicator)
+        connect_seconds = time.perf_counter() - connect_started
+        memory_after, _ = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        listeners = [asyncio.create_task(listen(communicator)) for communicator in communicators]
+
+        # --- Produce ---
+        sent_at, expected = {}, 0
+        produce_started = time.perf_counter()
+        for index in range(options["posts"]):
+            created_at = time.perf_counter()
+            post = await database_sync_to_async(StatusPost.objects.create)(
+                author=author, content=f"Benchmark post {index}"
+            )
+            sent_at[("post", post.id)] = created_at
+            expected += len(communicators)
+
+        online_ids = list(tokens)
+        for index in range(options["notifications"]):
+            recipient_id = online_ids[index % len(online_ids)]
+            created_at = time.perf_counter()
+            notification = await database_sync_to_async(Notification.objects.create)(
+                recipient_id=recipient_id,
+                actor=author,
+                verb="benchmarked you",
+                notification_type=Notification.FOLLOW,
+            )
+            sent_at[("notification", notification.id)] = created_at
+            expected += 1
+        produce_seconds = time.perf_counter() - produce_started
+
+        # --- Wait for deliveries ---
+        deadline = time.perf_counter() + options["timeout"]
+        while sum(len(times) for times in arrivals.values()) < expected:
+            if time.perf_counter() >= deadline:
+                break
+            await asyncio.sleep(0.05)
+
+        for listener in listeners:
+            listener.cancel()
+        for communicator in communicators:
+            await communicator.disconnect()
+
+        latencies = {"post": [], "notification": []}
+        last_arrival = produce_started
+        for key, times in arrivals.items():
+            if key in sent_at:
+                latencies[key[0]].extend((arrival - sent_at[key]) * 1000 for arrival in times)
+                last_arrival = max(last_arrival, *times)
+        delivered = sum(len(values) for values in latencies.values())
+        total_seconds = last_arrival - produce_started
+
+        return {
+            "label": options["label"],
+            "started_at": datetime.now(timezone.utc).isoformat(),
+            "git_revision": self.git_revision(),
+            "parameters": {
+                key: options[key]
+                for key in ("consumers", "followers", "posts", "notifications", "layer")
+            },
+            "connected": len(communicators),
+            "connect_seconds": round(connect_seconds, 3),
+            "memory_per_connection_kib": round(
+                (memory_after - memory_before) / max(len(communicators), 1) / 1024, 2
+            ),
+            "produce_seconds": round(produce_seconds, 3),
+            "expected_deliveries": expected,
+            "delivered": delivered,
+            "throughput_per_second": round(delivered / total_seconds, 1) if total_seconds else None,
+            "latency_ms": {
+                kind: self.summarize(sorted(values)) for kind, values in latencies.items()
+            },
+            "dispatcher": realtime.get_dispatch_stats(),
+        }
+
+    def summarize(self, values):
+        return {
+            "count": len(values),
+            "p50": round(percentile(values, 0.50) or 0, 2),
+            "p95": round(percentile(values, 0.95) or 0, 2),
+            "p99": round(percentile(values, 0.99) or 0, 2),
+            "max": round(values[-1], 2) if values else 0,
+        }
+
+    def git_revision(self):
+        try:
+            return subprocess.run(
+                ["git", "rev-parse", "--short", "HEAD"],
+                capture_output=True,
+                text=True,
+                check=True,
+            ).stdout.strip()
+        except (OSError, subprocess.CalledProcessError):
+            return None
+
+    def report(self, results):
+        self.stdout.write(
+            f"\nSockets: {results['connected']} in {results['connect_seconds']}s "
+            f"(~{results['memory_per_connection_kib']} KiB each)"
+        )
+        self.stdout.write(
+            f"Delivered {results['delivered']}/{results['expected_deliveries']} "
+            f"at {results['throughput_per_second']} msg/s"
+        )
+        for kind, summary in results["latency_ms"].items():
+            self.stdout.write(
+                f"{kind:>12}: p50 {summary['p50']} ms | p95 {summary['p95']} ms | "
+                f"p99 {summary['p99']} ms | max {summary['max']} ms"
+            )
+
+    def save(self, results, options):
+        os.makedirs(options["output_dir"], exist_ok=True)
+        stamp = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%SZ")
+        path = os.path.join(options["output_dir"], f"fanout-{options['label']}-{stamp}.json")
+        with open(path, "w") as output_file:
+            json.dump(results, output_file, indent=2)
+        self.stdout.write(self.style.SUCCESS(f"\nResults saved to {path}"))
@@ -0,0 +1,45 @@
+# community/management/commands/rebuild_timelines.py
+
+from django.core.management.base import BaseCommand
+from django.contrib.auth import get_user_model
+from community.timeline import rebuild_timeline
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = "Backfills (or repairs) the precomputed home timeline of every user."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--username",
+            action="append",
+            dest="usernames",
+            help="Only rebuild the timeline of this user. Can be repeated.",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=500,
+            help="How many users to load from the database at a time.",
+        )
+
+    def handle(self, *args, **options):
+        users = User.objects.order_by("id")
+        if options["usernames"]:
+            users = users.filter(username__in=options["usernames"])
+
+        self.stdout.write(self.style.NOTICE("Rebuilding home timelines..."))
+
+        rebuilt_users, written_entries = 0, 0
+        for user in users.iterator(chunk_size=options["batch_size"]):
+            written_entries += rebuild_timeline(user)
+            rebuilt_users += 1
+            if rebuilt_users % options["batch_size"] == 0:
+                self.stdout.write(f" > {rebuilt_users} timelines rebuilt...")
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"\nFinished. Rebuilt {rebuilt_users} timeline(s) with {written_entries} entries."
+            )
+        )
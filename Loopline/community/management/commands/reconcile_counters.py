@@ -0,0 +1,43 @@
+# community/management/commands/reconcile_counters.py
+
+from django.core.management.base import BaseCommand
+from community.counters import (
+    reconcile_comment_counters,
+    reconcile_group_counters,
+    reconcile_post_counters,
+)
+from community.notifications import reconcile_unread_counts
+
+
+class Command(BaseCommand):
+    help = "Recomputes drifted like/comment/member counters and cached unread-notification counts."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=1000,
+            help="How many rows to check per UPDATE statement.",
+        )
+
+    def handle(self, *args, **options):
+        batch_size = options["batch_size"]
+
+        self.stdout.write(self.style.NOTICE("Reconciling post counters..."))
+        fixed_posts = reconcile_post_counters(batch_size=batch_size)
+
+        self.stdout.write(self.style.NOTICE("Reconciling comment counters..."))
+        fixed_comments = reconcile_comment_counters(batch_size=batch_size)
+
+        self.stdout.write(self.style.NOTICE("Reconciling group member counts..."))
+        fixed_groups = reconcile_group_counters(batch_size=batch_size)
+
+        self.stdout.write(self.style.NOTICE("Reconciling unread notification counts..."))
+        fixed_unread = reconcile_unread_counts(batch_size=batch_size)
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"\nFinished. Repaired {fixed_posts} post(s), {fixed_comments} comment(s), "
+                f"{fixed_groups} group(s) and {fixed_unread} unread count(s)."
+            )
+        )
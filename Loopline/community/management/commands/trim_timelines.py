@@ -0,0 +1,35 @@
+# community/management/commands/trim_timelines.py
+
+from django.core.management.base import BaseCommand
+
+from community.models import TimelineEntry
+from community.timeline import TIMELINE_MAX_LENGTH, trim_timelines
+
+
+class Command(BaseCommand):
+    help = f"Cuts every home timeline down to its newest {TIMELINE_MAX_LENGTH} entries."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=1000,
+            help="How many timeline owners to check at a time.",
+        )
+
+    def handle(self, *args, **options):
+        owner_ids = (
+            TimelineEntry.objects.order_by("owner_id")
+            .values_list("owner_id", flat=True)
+            .distinct()
+        )
+
+        trimmed, last_owner_id = 0, 0
+        while True:
+            batch = list(owner_ids.filter(owner_id__gt=last_owner_id)[: options["batch_size"]])
+            if not batch:
+                break
+            trimmed += trim_timelines(batch)
+            last_owner_id = batch[-1]
+
+        self.stdout.write(self.style.SUCCESS(f"Finished. Removed {trimmed} timeline entries."))
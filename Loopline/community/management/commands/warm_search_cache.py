@@ -0,0 +1,50 @@
+# community/management/commands/warm_search_cache.py
+
+import time
+
+from django.core.cache import caches
+from django.core.cache.backends.locmem import LocMemCache
+from django.core.management.base import BaseCommand, CommandError
+
+from community.search_cache import RESULT_TTL, TOP_QUERIES, warm_popular_searches
+from community.views import CachedSearchPagination
+
+
+class Command(BaseCommand):
+    help = "Refills the cached first page of the most searched user and content queries."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--top",
+            type=int,
+            default=TOP_QUERIES,
+            help="How many of the most searched queries of each kind to warm.",
+        )
+        parser.add_argument(
+            "--page-size",
+            type=int,
+            default=CachedSearchPagination.page_size,
+            help="Page size of the warmed pages (the search endpoints' default).",
+        )
+        parser.add_argument(
+            "--interval",
+            type=float,
+            help=(
+                "Keep running and warm every INTERVAL seconds. Use less than "
+                f"the cache TTL ({RESULT_TTL}s) so popular pages never expire."
+            ),
+        )
+
+    def handle(self, *args, **options):
+        if isinstance(caches["default"], LocMemCache):
+            raise CommandError(
+                "The default cache is per-process memory, so this command cannot see the "
+                "search registry of the web processes or warm their caches. Set CACHE_URL "
+                "to a cache shared by all processes."
+            )
+        while True:
+            warmed = warm_popular_searches(options["page_size"], limit=options["top"])
+            self.stdout.write(self.style.SUCCESS(f"Warmed {warmed} search page(s)."))
+            if not options["interval"]:
+                return
+            time.sleep(options["interval"])
@@ -1,17 +1,55 @@
 # community/middleware.py
 
+import hashlib
+from urllib.parse import parse_qs
+
 from channels.db import database_sync_to_async
+from django.conf import settings
 from django.contrib.auth.models import AnonymousUser
+from django.core.cache import cache
 from rest_framework.authtoken.models import Token
-from urllib.parse import parse_qs
+
+# How long a resolved token -> user lookup is reused. Deleting a token (e.g.
+# on logout) or saving its user drops the entry right away; see signals.py.
+TOKEN_USER_CACHE_TTL = getattr(settings, "WS_TOKEN_USER_CACHE_TTL", 300)
+
+
+def token_cache_key(token_key):
+    # Tokens are credentials, so only a digest of them ends up in the cache.
+    return f"ws-token-user:{hashlib.sha256(token_key.encode()).hexdigest()}"
+
+
+def invalidate_token_cache(token_keys):
+    token_keys = [key for key in token_keys if key]
+    if token_keys:
+        cache.delete_many([token_cache_key(key) for key in token_keys])
+
 
 @database_sync_to_async
-def get_user(token_key):
+def get_user_from_db(token_key):
     try:
         token = Token.objects.select_related('user').get(key=token_key)
-        return token.user
     except Token.DoesNotExist:
+        return None
+    return token.user
+
+
+async def get_user(token_key):
+    """
+    Resolves a DRF token to its user, reusing cached lookups. Unknown
+    tokens are not cached, so they cannot be used to fill the cache.
+    """
+    if not token_key:
         return AnonymousUser()
+    key = token_cache_key(token_key)
+    user = await cache.aget(key)
+    if user is None:
+        user = await get_user_from_db(token_key)
+        if user is None:
+            return AnonymousUser()
+        await cache.aset(key, user, timeout=TOKEN_USER_CACHE_TTL)
+    return user if user.is_active else AnonymousUser()
+
 
 class TokenAuthMiddleware:
     """
@@ -33,4 +71,4 @@ class TokenAuthMiddleware:
             scope['user'] = AnonymousUser()
 
         # Continue with the connection
-        return await self.inner(scope, receive, send)
\ No newline at end of file
+        return await self.inner(scope, receive, send)
@@ -0,0 +1,74 @@
+# Generated by Django 5.2 on 2026-10-17 10:00
+
+from django.db import migrations, models
+from django.db.models import Count, IntegerField, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def backfill_counters(apps, schema_editor):
+    ContentType = apps.get_model("contenttypes", "ContentType")
+    StatusPost = apps.get_model("community", "StatusPost")
+    Comment = apps.get_model("community", "Comment")
+    Like = apps.get_model("community", "Like")
+
+    def count_of(queryset):
+        return Coalesce(
+            Subquery(
+                queryset.order_by()
+                .values("object_id")
+                .annotate(total=Count("id"))
+                .values("total"),
+                output_field=IntegerField(),
+            ),
+            0,
+        )
+
+    post_type = ContentType.objects.filter(
+        app_label="community", model="statuspost"
+    ).first()
+    comment_type = ContentType.objects.filter(
+        app_label="community", model="comment"
+    ).first()
+
+    if post_type:
+        StatusPost.objects.update(
+            like_count=count_of(
+                Like.objects.filter(content_type=post_type, object_id=OuterRef("pk"))
+            ),
+            comment_count=count_of(
+                Comment.objects.filter(content_type=post_type, object_id=OuterRef("pk"))
+            ),
+        )
+    if comment_type:
+        Comment.objects.update(
+            like_count=count_of(
+                Like.objects.filter(content_type=comment_type, object_id=OuterRef("pk"))
+            )
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("community", "0006_timelineentry"),
+        ("contenttypes", "0002_remove_content_type_name"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="statuspost",
+            name="like_count",
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name="statuspost",
+            name="comment_count",
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name="comment",
+            name="like_count",
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.RunPython(backfill_counters, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,45 @@
+# Generated by Django 5.2 on 2026-10-17 12:00
+
+from django.db import migrations, models
+from django.db.models import F
+from django.db.models.functions import JSONArray
+
+
+def backfill_latest_actors(apps, schema_editor):
+    Notification = apps.get_model("community", "Notification")
+    Notification.objects.update(latest_actor_ids=JSONArray(F("actor_id")))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("community", "0007_statuspost_like_count_statuspost_comment_count_and_more"),
+        ("contenttypes", "0002_remove_content_type_name"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="notification",
+            name="actor_count",
+            field=models.PositiveIntegerField(default=1),
+        ),
+        migrations.AddField(
+            model_name="notification",
+            name="latest_actor_ids",
+            field=models.JSONField(blank=True, default=list),
+        ),
+        migrations.AddIndex(
+            model_name="notification",
+            index=models.Index(
+                condition=models.Q(("is_read", False)),
+                fields=[
+                    "recipient",
+                    "notification_type",
+                    "target_content_type",
+                    "target_object_object_id",
+                ],
+                name="notification_aggregate_idx",
+            ),
+        ),
+        migrations.RunPython(backfill_latest_actors, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 5.2 on 2026-10-17 14:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("community", "0008_notification_actor_count_notification_latest_actor_ids_and_more"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="notification",
+            index=models.Index(
+                fields=["recipient", "-timestamp", "-id"], name="notification_inbox_idx"
+            ),
+        ),
+    ]
@@ -0,0 +1,47 @@
+# Generated by Django 5.2 on 2026-10-17 15:00
+
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+from django.conf import settings
+from django.db import migrations
+
+
+def backfill_search_vectors(apps, schema_editor):
+    StatusPost = apps.get_model("community", "StatusPost")
+    User = StatusPost._meta.get_field("author").related_model
+    # Same text search configuration as community.search.SEARCH_CONFIG, so
+    # backfilled vectors match the queries and the vectors written on save.
+    config = getattr(settings, "SEARCH_CONFIG", "english")
+    schema_editor.execute(
+        f"""
+        UPDATE {StatusPost._meta.db_table} AS post
+        SET search_vector =
+            setweight(to_tsvector(%s::regconfig, coalesce(post.content, '')), 'A')
+            || setweight(to_tsvector(%s::regconfig, author.username), 'B')
+        FROM {User._meta.db_table} AS author
+        WHERE author.id = post.author_id
+        """,
+        [config, config],
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("community", "0009_notification_inbox_idx"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="statuspost",
+            name="search_vector",
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.RunPython(backfill_search_vectors, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name="statuspost",
+            index=django.contrib.postgres.indexes.GinIndex(
+                fields=["search_vector"], name="statuspost_search_idx"
+            ),
+        ),
+    ]
@@ -0,0 +1,50 @@
+# Generated by Django 5.2 on 2026-10-17 16:00
+
+import django.contrib.postgres.indexes
+from django.contrib.postgres.operations import TrigramExtension
+from django.db import migrations, models
+
+
+def backfill_search_documents(apps, schema_editor):
+    UserProfile = apps.get_model("community", "UserProfile")
+    User = UserProfile._meta.get_field("user").related_model
+    schema_editor.execute(
+        f"""
+        UPDATE {UserProfile._meta.db_table} AS profile
+        SET search_document = lower(concat_ws(
+            ' ',
+            nullif(account.username, ''),
+            nullif(account.first_name, ''),
+            nullif(account.last_name, ''),
+            nullif(profile.display_name, ''),
+            nullif(profile.headline, '')
+        ))
+        FROM {User._meta.db_table} AS account
+        WHERE account.id = profile.user_id
+        """
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("community", "0010_statuspost_search_vector"),
+    ]
+
+    operations = [
+        TrigramExtension(),
+        migrations.AddField(
+            model_name="userprofile",
+            name="search_document",
+            field=models.TextField(blank=True, default="", editable=False),
+        ),
+        migrations.RunPython(backfill_search_documents, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name="userprofile",
+            index=django.contrib.postgres.indexes.GinIndex(
+                fields=["search_document"],
+                name="userprofile_people_trgm_idx",
+                opclasses=["gin_trgm_ops"],
+            ),
+        ),
+    ]
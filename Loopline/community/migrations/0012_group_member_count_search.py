@@ -0,0 +1,62 @@
+# Generated by Django 5.2 on 2026-10-17 17:00
+
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+from django.conf import settings
+from django.db import migrations, models
+
+
+def backfill_groups(apps, schema_editor):
+    Group = apps.get_model("community", "Group")
+    Membership = Group._meta.get_field("members").remote_field.through
+    # Same text search configuration as community.search.SEARCH_CONFIG.
+    config = getattr(settings, "SEARCH_CONFIG", "english")
+    schema_editor.execute(
+        f"""
+        UPDATE {Group._meta.db_table} AS grp
+        SET
+            member_count = (
+                SELECT count(*) FROM {Membership._meta.db_table} AS membership
+                WHERE membership.group_id = grp.id
+            ),
+            search_vector =
+                setweight(to_tsvector(%s::regconfig, coalesce(grp.name, '')), 'A')
+                || setweight(to_tsvector(%s::regconfig, coalesce(grp.description, '')), 'B')
+        """,
+        [config, config],
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("community", "0011_userprofile_search_document"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="group",
+            name="member_count",
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name="group",
+            name="search_vector",
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.RunPython(backfill_groups, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name="group",
+            index=django.contrib.postgres.indexes.GinIndex(
+                fields=["search_vector"], name="group_search_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="group",
+            index=django.contrib.postgres.indexes.GinIndex(
+                fields=["name"],
+                name="group_name_trgm_idx",
+                opclasses=["gin_trgm_ops"],
+            ),
+        ),
+    ]
@@ -0,0 +1,35 @@
+# Generated by Django 5.2 on 2026-10-17 18:00
+
+import django.contrib.postgres.fields
+from django.db import migrations, models
+
+
+def backfill_actor_ids(apps, schema_editor):
+    Notification = apps.get_model("community", "Notification")
+    schema_editor.execute(
+        f"""
+        UPDATE {Notification._meta.db_table}
+        SET actor_ids = ARRAY(
+            SELECT DISTINCT value::integer
+            FROM jsonb_array_elements_text(latest_actor_ids || to_jsonb(actor_id)) AS value
+        )
+        """
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("community", "0012_group_member_count_search"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="notification",
+            name="actor_ids",
+            field=django.contrib.postgres.fields.ArrayField(
+                base_field=models.PositiveIntegerField(), blank=True, default=list, size=None
+            ),
+        ),
+        migrations.RunPython(backfill_actor_ids, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,103 @@
+# Generated by Django 5.2 on 2026-10-17 19:00
+
+from datetime import timedelta
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+def backfill_notification_actors(apps, schema_editor):
+    """
+    Records the actors of unread like/follow aggregates from the rows that
+    produced them: the current likers of the target, the followers gained
+    within the aggregation window, and the actors the aggregate names.
+    actor_count is left as it is.
+    """
+    Notification = apps.get_model("community", "Notification")
+    NotificationActor = apps.get_model("community", "NotificationActor")
+    Like = apps.get_model("community", "Like")
+    Follow = apps.get_model("community", "Follow")
+    window = timedelta(seconds=getattr(settings, "NOTIFICATION_AGGREGATION_WINDOW", 24 * 60 * 60))
+    notifications = Notification._meta.db_table
+    actors = NotificationActor._meta.db_table
+    users = Notification._meta.get_field("actor").related_model._meta.db_table
+
+    schema_editor.execute(
+        f"""
+        INSERT INTO {actors} (notification_id, actor_id)
+        SELECT notification.id, actor.id
+        FROM {notifications} AS notification
+        CROSS JOIN LATERAL (
+            SELECT notification.actor_id AS id
+            UNION
+            SELECT value::integer
+            FROM jsonb_array_elements_text(notification.latest_actor_ids) AS value
+            UNION
+            SELECT liked.user_id
+            FROM {Like._meta.db_table} AS liked
+            WHERE notification.notification_type = 'like'
+              AND liked.content_type_id = notification.target_content_type_id
+              AND liked.object_id = notification.target_object_object_id
+              AND liked.user_id <> notification.recipient_id
+            UNION
+            SELECT follow.follower_id
+            FROM {Follow._meta.db_table} AS follow
+            WHERE notification.notification_type = 'follow'
+              AND follow.following_id = notification.recipient_id
+              AND follow.created_at BETWEEN notification.timestamp - %s AND notification.timestamp
+        ) AS actor
+        WHERE notification.is_read = false
+          AND notification.notification_type IN ('like', 'follow')
+          AND EXISTS (SELECT 1 FROM {users} AS account WHERE account.id = actor.id)
+        ON CONFLICT DO NOTHING
+        """,
+        [window],
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("community", "0013_notification_actor_ids"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="NotificationActor",
+            fields=[
+                ("id", models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                (
+                    "actor",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="+",
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+                (
+                    "notification",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="actor_links",
+                        to="community.notification",
+                    ),
+                ),
+            ],
+            options={
+                "constraints": [
+                    models.UniqueConstraint(
+                        fields=("notification", "actor"), name="unique_notification_actor"
+                    )
+                ],
+            },
+        ),
+        # Before the backfill: altering a table is not allowed once the
+        # transaction has pending foreign key checks.
+        migrations.RemoveField(
+            model_name="notification",
+            name="actor_ids",
+        ),
+        migrations.RunPython(backfill_notification_actors, migrations.RunPython.noop),
+    ]
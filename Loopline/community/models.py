@@ -2,6 +2,8 @@ import os
 from django.db import models
 from django.conf import settings
 from django.contrib.postgres.fields import ArrayField
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVectorField
 from django.contrib.contenttypes.fields import GenericForeignKey, GenericRelation
 from django.contrib.contenttypes.models import ContentType
 from django.core.exceptions import ValidationError
@@ -106,6 +108,19 @@ class UserProfile(models.Model):
         "StatusPost", related_name="saved_by", blank=True
     )
 
+    # Lowercased username, names, display name and headline in one column,
+    # trigram-indexed for people search; see community/search.py.
+    search_document = models.TextField(blank=True, default="", editable=False)
+
+    class Meta:
+        indexes = [
+            GinIndex(
+                fields=["search_document"],
+                opclasses=["gin_trgm_ops"],
+                name="userprofile_people_trgm_idx",
+            ),
+        ]
+
     def __str__(self):
         try:
             return self.user.username
@@ -167,7 +182,38 @@ class ConnectionRequest(models.Model):
         return f"{self.sender.username} -> {self.receiver.username} ({self.status})"
 
 
-class StatusPost(models.Model):
+class CounterFieldsMixin:
+    """
+    Keeps full saves from writing back denormalized counters.
+
+    The counters listed in COUNTER_FIELDS only change through F() updates
+    (see community/counters.py), so the value on an instance loaded earlier
+    may be stale. save() without update_fields on an existing row writes
+    every other loaded column and leaves the counters as the database has
+    them. Pass update_fields explicitly to write a counter.
+    """
+
+    COUNTER_FIELDS = ()
+
+    def save(self, *args, **kwargs):
+        if (
+            not self._state.adding
+            and not args
+            and not kwargs.get("force_insert")
+            and kwargs.get("update_fields") is None
+        ):
+            deferred = self.get_deferred_fields()
+            kwargs["update_fields"] = [
+                field.name
+                for field in self._meta.concrete_fields
+                if not field.primary_key
+                and field.name not in self.COUNTER_FIELDS
+                and field.attname not in deferred
+            ]
+        super().save(*args, **kwargs)
+
+
+class StatusPost(CounterFieldsMixin, models.Model):
     author = models.ForeignKey(
         User, on_delete=models.CASCADE, related_name="status_posts"
     )
@@ -187,6 +233,17 @@ class StatusPost(models.Model):
     updated_at = models.DateTimeField(auto_now=True)
     likes = GenericRelation("Like", related_query_name="statuspost_likes")
 
+    # Denormalized counters, kept current with F() updates from the Like and
+    # Comment signals (see community/counters.py). The reconcile_counters
+    # command repairs any drift.
+    like_count = models.PositiveIntegerField(default=0)
+    comment_count = models.PositiveIntegerField(default=0)
+    COUNTER_FIELDS = ("like_count", "comment_count")
+
+    # Full-text search document (content + author username), written by the
+    # post_save signal; see community/search.py.
+    search_vector = SearchVectorField(null=True, editable=False)
+
     # --- REMOVED in favor of PostMedia model ---
     # image = models.ImageField(upload_to='post_images/', null=True, blank=True)
     # video = models.FileField(upload_to='post_videos/', null=True, blank=True)
@@ -194,6 +251,9 @@ class StatusPost(models.Model):
 
     class Meta:
         ordering = ["-created_at"]
+        indexes = [
+            GinIndex(fields=["search_vector"], name="statuspost_search_idx"),
+        ]
 
     def clean(self):
         """
@@ -236,7 +296,43 @@ class PostMedia(models.Model):
 # --- END NEW MODEL ---
 
 
-class Group(models.Model):
+class TimelineEntry(models.Model):
+    """
+    A precomputed slot in a user's home feed.
+
+    Rows are written when a StatusPost is created (fan-out-on-write) and are
+    trimmed to settings.TIMELINE_MAX_LENGTH per owner. Privacy is NOT stored
+    here; it is applied when the feed is read so group membership changes
+    never leave stale visibility behind.
+    """
+
+    owner = models.ForeignKey(
+        User, on_delete=models.CASCADE, related_name="timeline_entries"
+    )
+    post = models.ForeignKey(
+        StatusPost, on_delete=models.CASCADE, related_name="timeline_entries"
+    )
+    # Copied from the post so trimming never has to join StatusPost.
+    created_at = models.DateTimeField()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["owner", "post"], name="unique_timeline_entry"
+            )
+        ]
+        indexes = [
+            models.Index(
+                fields=["owner", "-created_at", "-post"],
+                name="timeline_owner_recent_idx",
+            ),
+        ]
+
+    def __str__(self):
+        return f"Timeline of User ID {self.owner_id}: Post ID {self.post_id}"
+
+
+class Group(CounterFieldsMixin, models.Model):
     name = models.CharField(
         max_length=150
     )  # MODIFICATION: unique=True has been removed.
@@ -264,8 +360,26 @@ class Group(models.Model):
         help_text="Defines who can view content and how users can join.",
     )
 
+    # Denormalized number of members, kept current by the membership signals
+    # (see community/counters.py). The reconcile_counters command repairs any
+    # drift.
+    member_count = models.PositiveIntegerField(default=0, editable=False)
+    COUNTER_FIELDS = ("member_count",)
+
+    # Full-text search document (name + description), written by the
+    # post_save signal; see community/search.py.
+    search_vector = SearchVectorField(null=True, editable=False)
+
     class Meta:
         ordering = ["-created_at"]
+        indexes = [
+            GinIndex(fields=["search_vector"], name="group_search_idx"),
+            GinIndex(
+                fields=["name"],
+                opclasses=["gin_trgm_ops"],
+                name="group_name_trgm_idx",
+            ),
+        ]
 
     def __str__(self):
         return self.name
@@ -367,7 +481,7 @@ class GroupBlock(models.Model):
         return f"{self.user.username} blocked from {self.group.name}"
 
 
-class Comment(models.Model):
+class Comment(CounterFieldsMixin, models.Model):
     author = models.ForeignKey(User, on_delete=models.CASCADE, related_name="comments")
     content = models.TextField()
     created_at = models.DateTimeField(auto_now_add=True)
@@ -379,6 +493,9 @@ class Comment(models.Model):
         "self", on_delete=models.CASCADE, blank=True, null=True, related_name="replies"
     )
     likes = GenericRelation("Like", related_query_name="comment_likes")
+    # Denormalized, see StatusPost.like_count.
+    like_count = models.PositiveIntegerField(default=0)
+    COUNTER_FIELDS = ("like_count",)
 
     class Meta:
         ordering = ["created_at"]
@@ -497,11 +614,30 @@ class Notification(models.Model):
     target = GenericForeignKey("target_content_type", "target_object_object_id")
     timestamp = models.DateTimeField(auto_now_add=True)
     is_read = models.BooleanField(default=False)
+    # Aggregation ("X and N others liked your post", see notifications.py).
+    # `actor` is the most recent actor; these fields describe the whole group.
+    actor_count = models.PositiveIntegerField(default=1)
+    latest_actor_ids = models.JSONField(default=list, blank=True)
 
     class Meta:
         ordering = ["-timestamp"]
         indexes = [
             models.Index(fields=["recipient", "is_read", "-timestamp"]),
+            models.Index(
+                fields=[
+                    "recipient",
+                    "notification_type",
+                    "target_content_type",
+                    "target_object_object_id",
+                ],
+                condition=models.Q(is_read=False),
+                name="notification_aggregate_idx",
+            ),
+            # Keyset pagination of the inbox (see NotificationKeysetPagination).
+            models.Index(
+                fields=["recipient", "-timestamp", "-id"],
+                name="notification_inbox_idx",
+            ),
         ]
 
     def __str__(self):
@@ -513,6 +649,30 @@ class Notification(models.Model):
         return f"To: {self.recipient.username} - {' '.join(parts)} - {status}"
 
 
+class NotificationActor(models.Model):
+    """
+    One distinct actor of an aggregated notification, so a repeat (e.g.
+    unlike and like again) is not counted twice in actor_count.
+    """
+
+    notification = models.ForeignKey(
+        Notification, on_delete=models.CASCADE, related_name="actor_links"
+    )
+    actor = models.ForeignKey(
+        settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name="+"
+    )
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["notification", "actor"], name="unique_notification_actor"
+            )
+        ]
+
+    def __str__(self):
+        return f"Actor {self.actor_id} of notification {self.notification_id}"
+
+
 class Conversation(models.Model):
     participants = models.ManyToManyField(User, related_name="conversations")
     created_at = models.DateTimeField(auto_now_add=True)
@@ -0,0 +1,381 @@
+# community/notifications.py
+"""
+Notification writes with aggregation.
+
+Likes and follows on the same target collapse into one unread "aggregate"
+notification per recipient ("Ann and 24 others liked your post") instead of
+one row per actor. An event joins the aggregate if it has the same type and
+target and the aggregate is unread and younger than AGGREGATION_WINDOW;
+otherwise a new notification is started.
+
+The aggregate keeps the latest actor in `actor`, the number of distinct
+actors in `actor_count` and the most recent actors in `latest_actor_ids`,
+newest first. Distinct actors are rows of NotificationActor, unique per
+(notification, actor), so an actor who unlikes and likes again is counted
+once without rewriting an ever-growing list on the aggregate row.
+
+A new row is pushed over the socket as before. Growing an aggregate pushes a
+'notification_updated' event at most once per UPDATE_PUSH_INTERVAL, so a
+viral post does not mean one push per like; growth inside an interval is
+sent by one trailing push when the interval ends.
+
+The unread badge count is kept as a counter in the cache instead of running
+COUNT(*) on every poll. Creating an unread notification, marking
+notifications read and deleting unread ones adjust it (on commit) with an
+atomic incr, and the new value is pushed to the recipient as a
+'notification_count' event. A missing counter is rebuilt from the database
+on the next read. reconcile_unread_counts(), run by the reconcile_counters
+command, repairs counters that drifted, e.g. after a race between a rebuild
+and a concurrent incr. The counter is only shared between processes when
+CACHE_URL points them at the same cache; with the default per-process
+memory cache each process keeps (and reconciles) its own copy.
+
+with_related_objects() and resolve_latest_actors() load everything a page
+of NotificationSerializer output touches in a constant number of queries:
+actors with their profiles, the generic target/action_object batched per
+content type (including what their __str__ reads), and the latest actors
+of aggregates.
+"""
+
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.contrib.contenttypes.models import ContentType
+from django.core.cache import cache
+from django.contrib.auth import get_user_model
+from django.contrib.contenttypes.prefetch import GenericPrefetch
+from django.db import transaction
+from django.db.models import Count
+from django.utils import timezone
+
+from . import instrumentation
+from .models import (
+    Comment, Follow, GroupJoinRequest, Like, Notification, NotificationActor, StatusPost,
+)
+from .presence import is_online
+from .realtime import broadcast_to_users, dispatcher, encode_event
+
+User = get_user_model()
+
+AGGREGATED_TYPES = getattr(
+    settings, "NOTIFICATION_AGGREGATED_TYPES", (Notification.LIKE, Notification.FOLLOW)
+)
+AGGREGATION_WINDOW = timedelta(
+    seconds=getattr(settings, "NOTIFICATION_AGGREGATION_WINDOW", 24 * 60 * 60)
+)
+LATEST_ACTORS = getattr(settings, "NOTIFICATION_LATEST_ACTORS", 3)
+UPDATE_PUSH_INTERVAL = getattr(settings, "NOTIFICATION_UPDATE_PUSH_INTERVAL", 30)
+UNREAD_COUNT_TTL = getattr(settings, "NOTIFICATION_UNREAD_COUNT_TTL", 24 * 60 * 60)
+
+
+def create_notification(recipient, actor, verb, notification_type, action_object=None, target=None):
+    """
+    Records a notification, folding it into a matching aggregate when its
+    type is aggregated. Returns the created or updated Notification.
+    """
+    if notification_type not in AGGREGATED_TYPES:
+        return Notification.objects.create(
+            recipient=recipient, actor=actor, verb=verb,
+            notification_type=notification_type,
+            action_object=action_object, target=target,
+        )
+
+    target_content_type = ContentType.objects.get_for_model(target) if target is not None else None
+    with transaction.atomic():
+        aggregate = (
+            Notification.objects.select_for_update()
+            .filter(
+                recipient=recipient,
+                notification_type=notification_type,
+                target_content_type=target_content_type,
+                target_object_object_id=target.pk if target is not None else None,
+                is_read=False,
+                timestamp__gte=timezone.now() - AGGREGATION_WINDOW,
+            )
+            .order_by("-timestamp")
+            .first()
+        )
+        if aggregate is None:
+            notification = Notification.objects.create(
+                recipient=recipient, actor=actor, verb=verb,
+                notification_type=notification_type,
+                action_object=action_object, target=target,
+                latest_actor_ids=[actor.pk],
+            )
+            NotificationActor.objects.create(notification=notification, actor=actor)
+            return notification
+
+        _, is_new_actor = NotificationActor.objects.get_or_create(
+            notification=aggregate, actor=actor
+        )
+        if is_new_actor:
+            aggregate.actor_count += 1
+        aggregate.latest_actor_ids = [
+            actor.pk,
+            *(actor_id for actor_id in aggregate.latest_actor_ids if actor_id != actor.pk),
+        ][:LATEST_ACTORS]
+        aggregate.actor = actor
+        aggregate.verb = verb
+        aggregate.action_object = action_object
+        aggregate.timestamp = timezone.now()
+        aggregate.save(update_fields=[
+            "actor", "actor_count", "latest_actor_ids", "verb",
+            "action_object_content_type", "action_object_object_id", "timestamp",
+        ])
+
+    push_aggregate_update(aggregate)
+    return aggregate
+
+
+def announce_bulk_created(notifications):
+    """
+    Does for bulk_create()d notifications what the post_save handlers do for
+    single ones: on commit, pushes each one to its recipient in a single
+    batch for the dispatcher, then counts them as unread.
+    """
+    if not notifications:
+        return
+    instrumentation.incr(
+        "notifications_created_total", len(notifications),
+        type=notifications[0].notification_type,
+    )
+
+    def enqueue():
+        # Imported here to avoid a circular import with serializers.py.
+        from .serializers import NotificationSerializer
+
+        for notification in notifications:
+            dispatcher.enqueue(
+                [],
+                encode_event("send_notification", {
+                    "type": "new_notification",
+                    "payload": NotificationSerializer(notification).data,
+                }),
+                user_ids=[notification.recipient_id],
+            )
+
+    # Registered before the counter updates so that, as with single rows,
+    # recipients get the notification before its 'notification_count'.
+    transaction.on_commit(enqueue)
+
+    unread_by_recipient = {}
+    for notification in notifications:
+        if not notification.is_read:
+            unread_by_recipient[notification.recipient_id] = (
+                unread_by_recipient.get(notification.recipient_id, 0) + 1
+            )
+    for recipient_id, delta in unread_by_recipient.items():
+        change_unread_count(recipient_id, delta)
+
+
+def _aggregate_update_event(notification):
+    # Imported here to avoid a circular import with serializers.py.
+    from .serializers import NotificationSerializer
+
+    return encode_event("send_notification", {
+        "type": "notification_updated",
+        "payload": NotificationSerializer(notification).data,
+    })
+
+
+def push_aggregate_update(notification):
+    """
+    Pushes the grown aggregate at most once per UPDATE_PUSH_INTERVAL. Growth
+    inside the interval is not lost: a trailing push with the latest state
+    is scheduled for the moment the interval ends.
+    """
+    key = f"notification-push:{notification.pk}"
+    if cache.add(key, time.time(), timeout=UPDATE_PUSH_INTERVAL):
+        broadcast_to_users([notification.recipient_id], lambda: _aggregate_update_event(notification))
+        return
+
+    pushed_at = cache.get(key) or time.time()
+    delay = max(UPDATE_PUSH_INTERVAL - (time.time() - pushed_at), 0)
+    notification_id = notification.pk
+    transaction.on_commit(lambda: dispatcher.enqueue_later(
+        key, delay, lambda: push_latest_aggregate(notification_id)
+    ))
+
+
+def push_latest_aggregate(notification_id):
+    """The trailing push of push_aggregate_update, with the current row."""
+    notification = (
+        Notification.objects.select_related("actor__profile")
+        .filter(pk=notification_id, is_read=False)
+        .first()
+    )
+    if notification is None:
+        return
+    # Counts as a push: further growth waits for the next interval.
+    cache.set(f"notification-push:{notification_id}", time.time(), timeout=UPDATE_PUSH_INTERVAL)
+    dispatcher.enqueue([], _aggregate_update_event(notification), user_ids=[notification.recipient_id])
+
+
+# --- Unread counter ---
+
+
+def unread_count_key(user_id):
+    return f"notifications-unread:{user_id}"
+
+
+def count_unread(user_id):
+    """Counts unread notifications in the database (the source of truth)."""
+    return Notification.objects.filter(recipient_id=user_id, is_read=False).count()
+
+
+def get_unread_count(user_id):
+    count = cache.get(unread_count_key(user_id))
+    if count is None:
+        count = count_unread(user_id)
+        cache.add(unread_count_key(user_id), count, timeout=UNREAD_COUNT_TTL)
+    return count
+
+
+def change_unread_count(user_id, delta):
+    """
+    Adds `delta` to the user's unread counter once the current transaction
+    commits and pushes the new value to their sockets.
+    """
+    if not delta:
+        return
+
+    def apply():
+        try:
+            count = cache.incr(unread_count_key(user_id), delta)
+        except ValueError:
+            # Not cached; the next read counts from the database.
+            count = None
+        else:
+            if count < 0:
+                cache.delete(unread_count_key(user_id))
+                count = None
+        push_unread_count(user_id, count)
+
+    transaction.on_commit(apply)
+
+
+def push_unread_count(user_id, count=None):
+    if not is_online(user_id):
+        return
+    if count is None:
+        # Counted without seeding the cache: this runs in on_commit callbacks,
+        # and increments of the same commit that are still queued would be
+        # applied on top of a counter rebuilt now.
+        count = count_unread(user_id)
+    dispatcher.enqueue(
+        [],
+        encode_event("send_notification", {
+            "type": "notification_count",
+            "payload": {"unread_count": count},
+        }),
+        user_ids=[user_id],
+    )
+
+
+def mark_as_read(user, queryset):
+    """
+    Marks the unread notifications of `user` in `queryset` as read and
+    returns how many changed.
+    """
+    updated = queryset.filter(recipient=user, is_read=False).update(is_read=True)
+    change_unread_count(user.pk, -updated)
+    return updated
+
+
+def reconcile_unread_counts(batch_size=1000):
+    """
+    Walks users in primary-key ranges and rewrites every cached unread
+    counter that no longer matches the database. Users without a cached
+    counter are skipped. Returns the number of repaired counters.
+    """
+    repaired = 0
+    last_pk = 0
+    while True:
+        user_ids = list(
+            User.objects.filter(pk__gt=last_pk)
+            .order_by("pk")
+            .values_list("pk", flat=True)[:batch_size]
+        )
+        if not user_ids:
+            return repaired
+        last_pk = user_ids[-1]
+
+        cached = cache.get_many([unread_count_key(user_id) for user_id in user_ids])
+        if not cached:
+            continue
+        cached_ids = [user_id for user_id in user_ids if unread_count_key(user_id) in cached]
+        actual = dict(
+            Notification.objects.filter(recipient_id__in=cached_ids, is_read=False)
+            .order_by()
+            .values("recipient_id")
+            .annotate(total=Count("id"))
+            .values_list("recipient_id", "total")
+        )
+        drifted = {
+            user_id: actual.get(user_id, 0)
+            for user_id in cached_ids
+            if cached[unread_count_key(user_id)] != actual.get(user_id, 0)
+        }
+        if drifted:
+            cache.set_many(
+                {unread_count_key(user_id): count for user_id, count in drifted.items()},
+                timeout=UNREAD_COUNT_TTL,
+            )
+            for user_id, count in drifted.items():
+                push_unread_count(user_id, count)
+            repaired += len(drifted)
+
+
+# --- Page reads ---
+
+
+def _generic_querysets():
+    """
+    Per-content-type querysets for a notification's target/action_object,
+    joined with whatever GenericRelatedObjectSerializer (via __str__) and
+    get_context_snippet read from them.
+    """
+    posts = StatusPost.objects.select_related("author")
+    comments = Comment.objects.select_related("author").prefetch_related(
+        GenericPrefetch("content_object", [StatusPost.objects.select_related("author")])
+    )
+    likes = Like.objects.select_related("user").prefetch_related(
+        GenericPrefetch(
+            "content_object",
+            [
+                StatusPost.objects.select_related("author"),
+                Comment.objects.select_related("author").prefetch_related(
+                    GenericPrefetch("content_object", [StatusPost.objects.select_related("author")])
+                ),
+            ],
+        )
+    )
+    follows = Follow.objects.select_related("follower", "following")
+    join_requests = GroupJoinRequest.objects.select_related("user", "group")
+    return [posts, comments, likes, follows, join_requests]
+
+
+def with_related_objects(queryset):
+    return queryset.select_related("actor__profile").prefetch_related(
+        GenericPrefetch("target", _generic_querysets()),
+        GenericPrefetch("action_object", _generic_querysets()),
+    )
+
+
+def resolve_latest_actors(notifications):
+    """
+    Returns serializer context for a page of notifications:
+    latest_actors_by_id maps every ID in their latest_actor_ids to a User
+    (with profile), fetched in one query.
+    """
+    known = {notification.actor_id: notification.actor for notification in notifications}
+    missing = {
+        actor_id
+        for notification in notifications
+        for actor_id in notification.latest_actor_ids or ()
+        if actor_id not in known
+    }
+    if missing:
+        known.update(User.objects.select_related("profile").in_bulk(missing))
+    return {"latest_actors_by_id": known}
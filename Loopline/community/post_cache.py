@@ -0,0 +1,141 @@
+# community/post_cache.py
+"""
+Cache for the viewer-independent part of StatusPostSerializer output.
+
+A post's author card, media, group summary, poll options and counts are the
+same for every viewer, so they are cached per post as a "fragment". Each
+fragment stores a version token built from the post's updated_at, its
+denormalized counters and the author's profile; a fragment whose token no
+longer matches is treated as a miss. Signals (see signals.py) also delete
+fragments outright when media, polls, votes, likes or comments change.
+
+The viewer-specific fields (is_liked_by_user, is_saved, poll.user_vote) are
+never cached; they are computed per request and merged on top.
+"""
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import ObjectDoesNotExist
+
+FRAGMENT_TTL = getattr(settings, "POST_FRAGMENT_CACHE_TTL", 300)
+
+KEY_PREFIX = "post-fragment"
+HITS_KEY = f"{KEY_PREFIX}:stats:hits"
+MISSES_KEY = f"{KEY_PREFIX}:stats:misses"
+
+VIEWER_FIELDS = ("is_liked_by_user", "is_saved")
+VIEWER_POLL_FIELDS = ("user_vote",)
+
+
+def fragment_key(post_id):
+    return f"{KEY_PREFIX}:{post_id}"
+
+
+def fragment_version(post, request=None):
+    """
+    A token that changes whenever the cached representation could change.
+    The request host is included because media and avatar URLs are absolute.
+    """
+    try:
+        profile_version = post.author.profile.updated_at.timestamp()
+    except ObjectDoesNotExist:
+        profile_version = None
+    host = f"{request.scheme}://{request.get_host()}" if request else ""
+    return (
+        post.updated_at.timestamp(),
+        post.like_count,
+        post.comment_count,
+        profile_version,
+        host,
+    )
+
+
+def invalidate_post_fragments(post_ids):
+    post_ids = [post_id for post_id in post_ids if post_id]
+    if post_ids:
+        cache.delete_many([fragment_key(post_id) for post_id in post_ids])
+
+
+def _bump(key, amount):
+    if not amount:
+        return
+    try:
+        cache.incr(key, amount)
+    except ValueError:
+        if not cache.add(key, amount, timeout=None):
+            cache.incr(key, amount)
+
+
+def get_fragment_cache_stats():
+    stats = cache.get_many([HITS_KEY, MISSES_KEY])
+    hits, misses = stats.get(HITS_KEY, 0), stats.get(MISSES_KEY, 0)
+    lookups = hits + misses
+    return {
+        "hits": hits,
+        "misses": misses,
+        "hit_ratio": round(hits / lookups, 4) if lookups else None,
+    }
+
+
+def _strip_viewer_fields(representation):
+    fragment = {
+        field: value
+        for field, value in representation.items()
+        if field not in VIEWER_FIELDS
+    }
+    if fragment.get("poll"):
+        fragment["poll"] = {
+            field: value
+            for field, value in fragment["poll"].items()
+            if field not in VIEWER_POLL_FIELDS
+        }
+    return fragment
+
+
+def _overlay_viewer_fields(serializer, post, fragment):
+    # Imported here to avoid a circular import with serializers.py.
+    from .serializers import PollSerializer
+
+    representation = dict(fragment)
+    representation["is_liked_by_user"] = serializer.get_is_liked_by_user(post)
+    representation["is_saved"] = serializer.get_is_saved(post)
+    if representation.get("poll"):
+        poll_serializer = PollSerializer(context=serializer.context)
+        representation["poll"] = {
+            **representation["poll"],
+            "user_vote": poll_serializer.get_user_vote(post.poll),
+        }
+    return representation
+
+
+def render_posts(serializer, posts):
+    """
+    Serializes a page of posts with `serializer` (a StatusPostSerializer),
+    reusing cached fragments where possible. All fragments for the page are
+    fetched with one multi-get and all misses are stored with one multi-set.
+    """
+    request = serializer.context.get("request")
+    cached = cache.get_many([fragment_key(post.pk) for post in posts])
+
+    results, to_store, hits = [], {}, 0
+    for post in posts:
+        key = fragment_key(post.pk)
+        version = fragment_version(post, request)
+        entry = cached.get(key)
+
+        if entry and entry["version"] == version:
+            hits += 1
+            results.append(_overlay_viewer_fields(serializer, post, entry["data"]))
+        else:
+            representation = serializer.to_representation(post)
+            to_store[key] = {
+                "version": version,
+                "data": _strip_viewer_fields(representation),
+            }
+            results.append(representation)
+
+    if to_store:
+        cache.set_many(to_store, timeout=FRAGMENT_TTL)
+    _bump(HITS_KEY, hits)
+    _bump(MISSES_KEY, len(posts) - hits)
+    return results
@@ -0,0 +1,121 @@
+# community/presence.py
+"""
+Which users currently have at least one open activity socket.
+
+Each online user has one cache key holding their number of open sockets.
+UserActivityConsumer increments it on connect, decrements it on disconnect
+and, while connected, refreshes its expiry every HEARTBEAT_INTERVAL seconds.
+If a server process dies without running disconnect(), its heartbeats stop
+and the key simply expires after PRESENCE_TTL seconds.
+
+A second key holds the user's presence epoch. Each socket remembers the
+epoch it registered under; when the count expires or is evicted while
+sockets stay open, the next heartbeat starts a new epoch, and every socket
+that sees an epoch other than its own counts itself again. The count is
+rebuilt from all open sockets rather than reset to 1, so closing one of
+them does not mark the user offline. (Losing only the epoch key makes the
+sockets count themselves twice; that overcount just keeps the user online
+up to PRESENCE_TTL after their last socket closes.)
+
+The realtime dispatcher asks online_user_ids() for a whole recipient list
+in one multi-get and skips the rest, so events for users without a socket
+never reach the channel layer.
+
+Presence lives in the Django cache, so web and WebSocket processes must share
+it (set CACHE_URL) unless a single process serves both. That is why it is
+only enabled by default when CACHE_URL is set: with per-process memory, the
+web process would see every user as offline.
+"""
+
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+
+PRESENCE_ENABLED = getattr(settings, "PRESENCE_ENABLED", bool(getattr(settings, "CACHE_URL", None)))
+PRESENCE_TTL = getattr(settings, "PRESENCE_TTL", 90)
+HEARTBEAT_INTERVAL = getattr(settings, "PRESENCE_HEARTBEAT_INTERVAL", 30)
+
+KEY_PREFIX = "presence"
+
+# Recipient lists are looked up in slices of this size.
+LOOKUP_BATCH_SIZE = 1000
+
+
+def presence_key(user_id):
+    return f"{KEY_PREFIX}:{user_id}"
+
+
+def epoch_key(user_id):
+    return f"{KEY_PREFIX}-epoch:{user_id}"
+
+
+async def _register(user_id):
+    """Counts one more socket for the user; returns the current epoch."""
+    key = presence_key(user_id)
+    if not await cache.aadd(key, 1, timeout=PRESENCE_TTL):
+        try:
+            await cache.aincr(key)
+        except ValueError:
+            # Expired between add() and incr().
+            await cache.aset(key, 1, timeout=PRESENCE_TTL)
+        await cache.atouch(key, PRESENCE_TTL)
+
+    key = epoch_key(user_id)
+    if not await cache.aadd(key, time.time_ns(), timeout=PRESENCE_TTL):
+        await cache.atouch(key, PRESENCE_TTL)
+    return await cache.aget(key)
+
+
+async def connection_opened(user_id):
+    """Registers a socket. Returns the epoch to pass to heartbeat()."""
+    return await _register(user_id)
+
+
+async def connection_closed(user_id):
+    key = presence_key(user_id)
+    try:
+        remaining = await cache.adecr(key)
+    except ValueError:
+        return
+    if remaining <= 0:
+        await cache.adelete(key)
+
+
+async def heartbeat(user_id, epoch):
+    """
+    Keeps the user's presence alive for one socket registered under
+    `epoch`. Returns the epoch the socket is registered under afterwards.
+    """
+    if not await cache.atouch(presence_key(user_id), PRESENCE_TTL):
+        # The count expired (e.g. the cache was flushed) while the socket
+        # stayed open. Start a new epoch so the user's other sockets count
+        # themselves again on their next heartbeat.
+        await cache.adelete(epoch_key(user_id))
+        return await _register(user_id)
+    if await cache.aget(epoch_key(user_id)) != epoch:
+        return await _register(user_id)
+    await cache.atouch(epoch_key(user_id), PRESENCE_TTL)
+    return epoch
+
+
+def online_user_ids(user_ids):
+    """
+    Returns the subset of `user_ids` with at least one open socket.
+    """
+    user_ids = list(user_ids)
+    if not PRESENCE_ENABLED:
+        return set(user_ids)
+
+    online = set()
+    for start in range(0, len(user_ids), LOOKUP_BATCH_SIZE):
+        batch = user_ids[start : start + LOOKUP_BATCH_SIZE]
+        found = cache.get_many([presence_key(user_id) for user_id in batch])
+        online.update(
+            user_id for user_id in batch if found.get(presence_key(user_id), 0) > 0
+        )
+    return online
+
+
+def is_online(user_id):
+    return user_id in online_user_ids([user_id])
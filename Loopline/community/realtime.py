@@ -0,0 +1,299 @@
+# community/realtime.py
+"""
+Deferred dispatcher for channel-layer broadcasts.
+
+Signal handlers used to call async_to_sync(channel_layer.group_send) once per
+recipient while the request was still running. A post by an author with many
+followers blocked the response for seconds, and a rolled-back transaction
+could still push events about rows that never existed.
+
+Now handlers call broadcast() or broadcast_to_users(), which:
+  1. wait for transaction.on_commit, so only committed data is announced;
+  2. build the message once (it may be a callable, evaluated on commit);
+  3. put one event on an in-process queue and return at once.
+
+A daemon worker thread drains the queue in batches. It drops recipients
+without an open socket (see presence.py) and runs the group sends for a
+whole batch concurrently on its own, long-lived event loop. Queue depth,
+dispatch lag and failures are tracked by get_dispatch_stats().
+
+Set REALTIME_DISPATCH_IN_BACKGROUND = False to send inline right after commit
+(e.g. with the in-memory channel layer, which is bound to one event loop).
+"""
+
+import asyncio
+import json
+import logging
+import queue
+import threading
+import time
+
+from asgiref.sync import async_to_sync
+from channels.layers import get_channel_layer
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import connections, transaction
+
+from . import instrumentation
+from .presence import online_user_ids
+
+logger = logging.getLogger(__name__)
+
+DISPATCH_IN_BACKGROUND = getattr(settings, "REALTIME_DISPATCH_IN_BACKGROUND", True)
+
+# Maximum number of events the worker takes off the queue in one batch.
+BATCH_MAX_EVENTS = getattr(settings, "REALTIME_BATCH_MAX_EVENTS", 100)
+
+# Maximum number of group_send calls in flight at once.
+SEND_CONCURRENCY = getattr(settings, "REALTIME_SEND_CONCURRENCY", 200)
+
+
+def user_group(user_id):
+    """The channel-layer group every socket of a user joins."""
+    return f"user_{user_id}"
+
+
+def post_topic_group(post_id):
+    """The channel-layer group of sockets subscribed to topic 'post_<id>'."""
+    return f"topic.post.{post_id}"
+
+
+def group_topic_group(group_id):
+    """
+    The channel-layer group of sockets subscribed to topic 'group_<slug>'.
+    Keyed by ID because slugs can exceed the 100-character group name limit.
+    """
+    return f"topic.group.{group_id}"
+
+
+def encode_event(handler, client_message):
+    """
+    Builds a channel-layer message for the consumer method `handler` that
+    carries `client_message` already encoded as compact JSON text. Encoding
+    happens once per broadcast; consumers forward the text as-is instead of
+    running json.dumps for every socket.
+    """
+    return {
+        "type": handler,
+        "text": json.dumps(client_message, cls=DjangoJSONEncoder, separators=(",", ":")),
+    }
+
+
+class BroadcastDispatcher:
+    def __init__(self):
+        self._queue = queue.Queue()
+        self._start_lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+        self._thread = None
+        self._loop = None
+        self._timers_lock = threading.Lock()
+        self._timers = {}
+        self._stats = {
+            "dispatched_events": 0,
+            "sent_messages": 0,
+            "failed_messages": 0,
+            "skipped_offline": 0,
+            "last_lag_ms": None,
+            "max_lag_ms": None,
+        }
+
+    # --- Producer side (request threads) ---
+
+    def enqueue(self, group_names, message, user_ids=()):
+        """
+        Queues `message` for `group_names` and for the personal groups of
+        `user_ids`; the latter are only sent to users who are online.
+        """
+        event = (time.monotonic(), group_names, user_ids, message)
+        instrumentation.incr("realtime_events_enqueued_total", handler=message.get("type"))
+        instrumentation.observe("realtime_fanout_width", len(group_names) + len(user_ids))
+        if not DISPATCH_IN_BACKGROUND:
+            async_to_sync(self._dispatch)(self._resolve_recipients([event]))
+            return
+        self._ensure_worker()
+        self._queue.put(event)
+
+    def enqueue_later(self, key, delay, send):
+        """
+        Calls `send` (which enqueues its own events, or does other work
+        that must stay off the request thread) on a timer thread after
+        `delay` seconds. Only one call per `key` is pending at a time; later
+        calls for the same key are dropped, so `send` should read the latest
+        state when it runs.
+        """
+        with self._timers_lock:
+            if key in self._timers:
+                return
+            timer = threading.Timer(delay, self._run_later, args=(key, send))
+            timer.daemon = True
+            self._timers[key] = timer
+        timer.start()
+
+    def _run_later(self, key, send):
+        with self._timers_lock:
+            self._timers.pop(key, None)
+        try:
+            send()
+        except Exception:
+            logger.exception("Deferred realtime send %s failed", key)
+        finally:
+            # Database connections are per thread; don't leak this one's.
+            connections.close_all()
+
+    def _ensure_worker(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._start_lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._thread = threading.Thread(
+                target=self._run, name="realtime-dispatcher", daemon=True
+            )
+            self._thread.start()
+
+    # --- Consumer side (worker thread) ---
+
+    def _next_batch(self):
+        events = [self._queue.get()]
+        while len(events) < BATCH_MAX_EVENTS:
+            try:
+                events.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return events
+
+    def _resolve_recipients(self, events):
+        """
+        Turns events into (enqueued_at, group_names, message) with one
+        presence lookup for all user recipients of the batch.
+        """
+        all_user_ids = {user_id for _, _, user_ids, _ in events for user_id in user_ids}
+        online = online_user_ids(all_user_ids) if all_user_ids else set()
+
+        resolved = []
+        for enqueued_at, group_names, user_ids, message in events:
+            groups = [*group_names, *(user_group(user_id) for user_id in user_ids if user_id in online)]
+            resolved.append((enqueued_at, groups, message))
+        skipped = sum(
+            1 for _, _, user_ids, _ in events for user_id in user_ids if user_id not in online
+        )
+        with self._stats_lock:
+            self._stats["skipped_offline"] += skipped
+        instrumentation.incr("realtime_recipients_skipped_offline_total", skipped)
+        return resolved
+
+    def _run(self):
+        # One loop for the worker's lifetime, so the channel layer can keep
+        # its connection pool instead of reconnecting for every batch.
+        self._loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self._loop)
+        while True:
+            events = self._next_batch()
+            try:
+                self._loop.run_until_complete(
+                    self._dispatch(self._resolve_recipients(events))
+                )
+            except Exception:
+                logger.exception("Realtime dispatch of %d events failed", len(events))
+            finally:
+                for _ in events:
+                    self._queue.task_done()
+
+    async def _dispatch(self, events):
+        channel_layer = get_channel_layer()
+        sends = [
+            (group_name, message)
+            for _, group_names, message in events
+            for group_name in group_names
+        ]
+
+        failed = 0
+        send_started = time.monotonic()
+        for start in range(0, len(sends), SEND_CONCURRENCY):
+            chunk = sends[start : start + SEND_CONCURRENCY]
+            results = await asyncio.gather(
+                *(channel_layer.group_send(group, message) for group, message in chunk),
+                return_exceptions=True,
+            )
+            for (group, _), result in zip(chunk, results):
+                if isinstance(result, Exception):
+                    failed += 1
+                    logger.warning("group_send to %s failed: %r", group, result)
+
+        finished = time.monotonic()
+        instrumentation.incr("realtime_group_sends_total", len(sends) - failed)
+        instrumentation.incr("realtime_group_send_failures_total", failed)
+        instrumentation.observe("realtime_batch_send_ms", (finished - send_started) * 1000)
+        for enqueued_at, _, _ in events:
+            instrumentation.observe("realtime_delivery_lag_ms", (finished - enqueued_at) * 1000)
+
+        lag_ms = (finished - min(event[0] for event in events)) * 1000
+        with self._stats_lock:
+            stats = self._stats
+            stats["dispatched_events"] += len(events)
+            stats["sent_messages"] += len(sends) - failed
+            stats["failed_messages"] += failed
+            stats["last_lag_ms"] = round(lag_ms, 2)
+            stats["max_lag_ms"] = round(max(lag_ms, stats["max_lag_ms"] or 0), 2)
+
+    # --- Introspection ---
+
+    def stats(self):
+        with self._stats_lock:
+            stats = dict(self._stats)
+        stats["queue_depth"] = self._queue.qsize()
+        stats["worker_alive"] = self._thread is not None and self._thread.is_alive()
+        return stats
+
+    def flush(self, timeout=5.0):
+        """
+        Blocks until every queued event has been sent, or `timeout` seconds
+        pass. Returns True if the queue was drained.
+        """
+        deadline = time.monotonic() + timeout
+        while self._queue.unfinished_tasks:
+            if time.monotonic() >= deadline:
+                return False
+            time.sleep(0.005)
+        return True
+
+
+dispatcher = BroadcastDispatcher()
+
+
+def broadcast(group_names, message):
+    """
+    Sends `message` to every group in `group_names` once the current
+    transaction commits. `message` may be a callable returning the message;
+    it is then built at commit time, when related rows (media, polls...)
+    saved later in the same transaction are visible too.
+    """
+    group_names = list(group_names)
+    if not group_names:
+        return
+
+    def enqueue():
+        dispatcher.enqueue(group_names, message() if callable(message) else message)
+
+    transaction.on_commit(enqueue)
+
+
+def broadcast_to_users(user_ids, message):
+    """
+    Like broadcast(), for the personal groups of `user_ids`. Users without
+    an open socket are skipped at dispatch time.
+    """
+    user_ids = list(user_ids)
+    if not user_ids:
+        return
+
+    def enqueue():
+        dispatcher.enqueue(
+            [], message() if callable(message) else message, user_ids=user_ids
+        )
+
+    transaction.on_commit(enqueue)
+
+
+def get_dispatch_stats():
+    return dispatcher.stats()
@@ -0,0 +1,228 @@
+# community/search.py
+"""
+Postgres full-text search over StatusPost.
+
+Each post stores a `search_vector` (its content, weight A, and its author's
+username, weight B) covered by a GIN index. The vector is written by the
+post_save signal whenever the content may have changed, and rewritten for
+all of an author's posts when they change their username.
+
+search_posts() matches a websearch-style query ("exact phrase", -exclude,
+or) against the index and orders by ts_rank. Headlines (ts_headline) are
+expensive, so headlines_for() computes them only for the page being
+returned, in a separate query.
+
+People search uses pg_trgm instead: UserProfile.search_document holds the
+lowercased username, first/last name, display name and headline in one
+trigram-indexed column, kept current by the User and UserProfile signals.
+search_people() matches it by word similarity (typo tolerant) or substring,
+both served by the same GIN index, and ranks username prefixes first, then
+by similarity. Run it inside word_similarity_threshold(), which sets the
+match threshold for the current transaction.
+
+Group discovery combines both: Group.search_vector (name, weight A, and
+description, weight B) takes whole words, and a trigram index on the name
+takes partial words and typos. Matches are ordered by relevance scaled by
+activity, using the denormalized member_count, so the list never touches the
+membership table.
+"""
+
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.postgres.search import (
+    SearchHeadline,
+    SearchQuery,
+    SearchRank,
+    SearchVector,
+    TrigramWordSimilarity,
+)
+from django.db import connection, transaction
+from django.db.models import Case, F, IntegerField, Q, Value, When
+from django.db.models.functions import Ln
+from rest_framework.filters import SearchFilter
+
+from .models import Group, StatusPost, UserProfile
+from .timeline import visible_post_filter
+
+User = get_user_model()
+
+SEARCH_CONFIG = getattr(settings, "SEARCH_CONFIG", "english")
+
+# pg_trgm's default of 0.6 misses most typos in short names.
+WORD_SIMILARITY_THRESHOLD = getattr(settings, "PEOPLE_SEARCH_SIMILARITY_THRESHOLD", 0.3)
+
+# How much a larger group is boosted: the relevance is multiplied by
+# 1 + weight * ln(1 + member_count).
+GROUP_ACTIVITY_WEIGHT = getattr(settings, "GROUP_SEARCH_ACTIVITY_WEIGHT", 0.1)
+
+# User fields that are part of UserProfile.search_document.
+PEOPLE_SEARCH_USER_FIELDS = ("username", "first_name", "last_name")
+
+HEADLINE_OPTIONS = {
+    "start_sel": "<mark>",
+    "stop_sel": "</mark>",
+    "max_words": 35,
+    "min_words": 15,
+    "max_fragments": 2,
+}
+
+
+def post_search_vector(username):
+    """The expression stored in StatusPost.search_vector for an author."""
+    return SearchVector("content", weight="A", config=SEARCH_CONFIG) + SearchVector(
+        Value(username), weight="B", config=SEARCH_CONFIG
+    )
+
+
+def update_search_vector(post):
+    StatusPost.objects.filter(pk=post.pk).update(
+        search_vector=post_search_vector(post.author.username)
+    )
+
+
+def update_search_vectors_for_author(user):
+    StatusPost.objects.filter(author=user).update(
+        search_vector=post_search_vector(user.username)
+    )
+
+
+def search_query(text):
+    return SearchQuery(text, search_type="websearch", config=SEARCH_CONFIG)
+
+
+def rank_posts(queryset, text):
+    """Filters `queryset` to the posts matching `text`, best match first."""
+    query = search_query(text)
+    return (
+        queryset.filter(search_vector=query)
+        .annotate(search_rank=SearchRank(F("search_vector"), query))
+        .order_by("-search_rank", "-created_at", "-id")
+    )
+
+
+def search_posts(queryset, text, user):
+    """
+    Filters `queryset` to the posts matching `text` that `user` may see
+    (the feed privacy rule), best match first.
+    """
+    return rank_posts(queryset, text).filter(visible_post_filter(user))
+
+
+def headlines_for(posts, text):
+    """Returns {post_id: highlighted snippet of the content} for `posts`."""
+    post_ids = [post.pk for post in posts]
+    if not post_ids:
+        return {}
+    return dict(
+        StatusPost.objects.filter(pk__in=post_ids)
+        .annotate(
+            headline=SearchHeadline(
+                "content", search_query(text), config=SEARCH_CONFIG, **HEADLINE_OPTIONS
+            )
+        )
+        .values_list("pk", "headline")
+    )
+
+
+class PostFullTextSearchFilter(SearchFilter):
+    """
+    Drop-in for SearchFilter on StatusPost lists: ?search= goes through the
+    full-text index (and the privacy rule) instead of icontains scans.
+    """
+
+    def filter_queryset(self, request, queryset, view):
+        text = request.query_params.get(self.search_param, "").strip()
+        if not text:
+            return queryset
+        return search_posts(queryset, text, request.user)
+
+
+# --- People search ---
+
+
+def people_search_document(user, profile):
+    parts = [getattr(user, field) for field in PEOPLE_SEARCH_USER_FIELDS]
+    parts += [profile.display_name, profile.headline]
+    return " ".join(part for part in parts if part).lower()
+
+
+def refresh_people_search_document(user):
+    """Rewrites the search document of `user`'s profile after a User change."""
+    profile = UserProfile.objects.filter(pk=user.pk).only("display_name", "headline").first()
+    if profile is not None:
+        UserProfile.objects.filter(pk=user.pk).update(
+            search_document=people_search_document(user, profile)
+        )
+
+
+@contextmanager
+def word_similarity_threshold(value=WORD_SIMILARITY_THRESHOLD):
+    with transaction.atomic():
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT set_config('pg_trgm.word_similarity_threshold', %s, true)", [str(value)]
+            )
+        yield
+
+
+def search_people(text):
+    """Users matching `text`, username prefixes first, then by similarity."""
+    text = text.strip().lower()
+    return (
+        User.objects.filter(
+            Q(profile__search_document__trigram_word_similar=text)
+            | Q(profile__search_document__contains=text)
+        )
+        .annotate(
+            priority=Case(
+                When(username__istartswith=text, then=Value(1)),
+                default=Value(2),
+                output_field=IntegerField(),
+            ),
+            similarity=TrigramWordSimilarity(text, "profile__search_document"),
+        )
+        .order_by("priority", "-similarity", "username")
+    )
+
+
+# --- Group search ---
+
+
+def group_search_vector():
+    """The expression stored in Group.search_vector."""
+    return SearchVector("name", weight="A", config=SEARCH_CONFIG) + SearchVector(
+        "description", weight="B", config=SEARCH_CONFIG
+    )
+
+
+def update_group_search_vector(group):
+    Group.objects.filter(pk=group.pk).update(search_vector=group_search_vector())
+
+
+def search_groups(queryset, text):
+    """
+    Filters `queryset` to the groups matching `text`, best match first:
+    relevance (full-text rank plus name similarity) weighted by member_count.
+    """
+    query = search_query(text)
+    return (
+        queryset.filter(Q(search_vector=query) | Q(name__trigram_word_similar=text))
+        .annotate(
+            relevance=SearchRank(F("search_vector"), query) + TrigramWordSimilarity(text, "name"),
+            search_score=F("relevance")
+            * (1 + GROUP_ACTIVITY_WEIGHT * Ln(F("member_count") + 1)),
+        )
+        .order_by("-search_score", "-member_count", "-created_at", "-id")
+    )
+
+
+class GroupSearchFilter(SearchFilter):
+    """?search= on group lists, served by the Group search indexes."""
+
+    def filter_queryset(self, request, queryset, view):
+        text = request.query_params.get(self.search_param, "").strip()
+        if not text:
+            return queryset
+        return search_groups(queryset, text)
@@ -0,0 +1,258 @@
+# community/search_cache.py
+"""
+Shared cache of search result IDs for search/users/ and search/content/.
+
+Many users type the same queries, so each result page is cached as the
+list of matching IDs for the normalized query (lowercased, whitespace
+collapsed), the page number and the page size. The IDs are computed
+without any viewer-specific filtering, so one entry serves every viewer:
+the views load the page's rows by ID and apply the viewer's privacy rule
+afterwards. A page can then hold fewer rows than page_size, but never a
+row the viewer may not see.
+
+Entries live for RESULT_TTL seconds. Writing content that matches a query
+makes its entries stale sooner: each query has a version number in its
+cache keys, and saving a post (or a profile, for people search) bumps the
+versions of the searched queries that match the old or the new text. The
+matching is done against the registry of recently searched queries in one
+SQL statement. Versions are bumped at once and again on commit, so a search
+that ran in between and cached the pre-commit results is dropped as well.
+
+The registry doubles as the popularity tracker: each search increments a
+hit counter for its query, and warm_popular_searches() (run by the
+warm_search_cache command) recomputes the first page of the TOP_QUERIES most
+searched queries so they are always served from the cache.
+
+All of this state is in the Django cache, so it is only shared between
+processes (and the warm_search_cache command only works) when CACHE_URL
+points them at the same cache. With the default per-process memory cache
+each web process caches and invalidates its own pages, and writes made by
+other processes only show up after RESULT_TTL.
+"""
+
+import hashlib
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection, transaction
+
+from .models import StatusPost, UserProfile
+from .search import (
+    SEARCH_CONFIG,
+    WORD_SIMILARITY_THRESHOLD,
+    rank_posts,
+    search_people,
+    word_similarity_threshold,
+)
+
+POSTS = "posts"
+PEOPLE = "people"
+
+RESULT_TTL = getattr(settings, "SEARCH_CACHE_TTL", 60)
+TOP_QUERIES = getattr(settings, "SEARCH_CACHE_TOP_QUERIES", 50)
+
+# At most this many distinct queries are tracked per kind; the least
+# searched ones are dropped first.
+TRACKED_QUERIES = 1000
+# Hit counters and the registry expire after a day without searches, so
+# popularity reflects recent traffic.
+TRACKING_TTL = 24 * 60 * 60
+
+
+def normalize_query(text):
+    return " ".join((text or "").lower().split())
+
+
+def _digest(text):
+    return hashlib.sha1(text.encode()).hexdigest()
+
+
+def _version_key(kind, digest):
+    return f"search-version:{kind}:{digest}"
+
+
+def _hits_key(kind, digest):
+    return f"search-hits:{kind}:{digest}"
+
+
+def _registry_key(kind):
+    return f"search-queries:{kind}"
+
+
+def _page_key(kind, digest, page_number, page_size):
+    version = cache.get(_version_key(kind, digest), 0)
+    return f"search-page:{kind}:{digest}:{version}:{page_number}:{page_size}"
+
+
+# --- Result pages ---
+
+
+def _post_ids(text, offset, limit):
+    queryset = rank_posts(StatusPost.objects.all(), text)
+    return list(queryset.values_list("pk", flat=True)[offset : offset + limit])
+
+
+def _people_ids(text, offset, limit):
+    with word_similarity_threshold():
+        return list(search_people(text).values_list("pk", flat=True)[offset : offset + limit])
+
+
+ENGINES = {POSTS: _post_ids, PEOPLE: _people_ids}
+
+
+def _fill(kind, text, page_number, page_size):
+    # The key (and so the version) is read before the query runs: a write
+    # that bumps the version meanwhile leaves this entry unreachable.
+    key = _page_key(kind, _digest(text), page_number, page_size)
+    offset = (page_number - 1) * page_size
+    ids = ENGINES[kind](text, offset, page_size + 1)
+    entry = (ids[:page_size], len(ids) > page_size)
+    cache.set(key, entry, timeout=RESULT_TTL)
+    return entry
+
+
+def get_page_ids(kind, text, page_number, page_size):
+    """
+    Returns (ids, has_next) for one page of results for `text`, in rank
+    order and unfiltered by privacy, from the cache when possible.
+    """
+    text = normalize_query(text)
+    if not text:
+        return [], False
+    record_search(kind, text)
+    entry = cache.get(_page_key(kind, _digest(text), page_number, page_size))
+    if entry is None:
+        entry = _fill(kind, text, page_number, page_size)
+    return entry
+
+
+# --- Popularity ---
+
+
+def tracked_queries(kind):
+    """{digest: normalized query} of the recently searched queries."""
+    return cache.get(_registry_key(kind)) or {}
+
+
+def record_search(kind, text):
+    digest = _digest(text)
+    try:
+        cache.incr(_hits_key(kind, digest))
+        return
+    except ValueError:
+        if not cache.add(_hits_key(kind, digest), 1, timeout=TRACKING_TTL):
+            # Another request started the counter first.
+            cache.incr(_hits_key(kind, digest))
+            return
+
+    registry = tracked_queries(kind)
+    registry[digest] = text
+    if len(registry) > TRACKED_QUERIES:
+        registry = {kept: registry[kept] for kept, _ in _by_hits(kind, registry)[:TRACKED_QUERIES]}
+    cache.set(_registry_key(kind), registry, timeout=TRACKING_TTL)
+
+
+def _by_hits(kind, registry):
+    """[(digest, hits)] of the registry, most searched first."""
+    hits = cache.get_many([_hits_key(kind, digest) for digest in registry])
+    return sorted(
+        ((digest, hits.get(_hits_key(kind, digest), 0)) for digest in registry),
+        key=lambda item: item[1],
+        reverse=True,
+    )
+
+
+def popular_queries(kind, limit=TOP_QUERIES):
+    registry = tracked_queries(kind)
+    return [registry[digest] for digest, hits in _by_hits(kind, registry)[:limit] if hits]
+
+
+def warm_popular_searches(page_size, limit=TOP_QUERIES):
+    """
+    Recomputes the first page of the most searched queries of each kind.
+    Returns the number of pages written.
+    """
+    warmed = 0
+    for kind in ENGINES:
+        for text in popular_queries(kind, limit):
+            _fill(kind, text, 1, page_size)
+            warmed += 1
+    return warmed
+
+
+# --- Invalidation ---
+
+
+def _bump(kind, texts):
+    for text in texts:
+        key = _version_key(kind, _digest(text))
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.add(key, 1, timeout=TRACKING_TTL)
+
+
+def invalidate(kind, texts):
+    """Makes the cached pages of `texts` stale, now and on commit."""
+    texts = set(texts)
+    if not texts:
+        return
+    _bump(kind, texts)
+    transaction.on_commit(lambda: _bump(kind, texts))
+
+
+def invalidate_all(kind):
+    invalidate(kind, tracked_queries(kind).values())
+
+
+def matching_post_queries(post_id):
+    """The tracked content queries that the stored document of the post matches."""
+    texts = list(tracked_queries(POSTS).values())
+    if not texts:
+        return set()
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"""
+            SELECT query
+            FROM unnest(%s::text[]) AS query, {StatusPost._meta.db_table} AS post
+            WHERE post.id = %s
+              AND post.search_vector @@ websearch_to_tsquery(%s::regconfig, query)
+            """,
+            [texts, post_id, SEARCH_CONFIG],
+        )
+        return {row[0] for row in cursor.fetchall()}
+
+
+def matching_people_queries(user_id=None, documents=()):
+    """
+    The tracked people queries that match the stored search document of
+    `user_id` or any of `documents`, by the rules of search_people().
+    """
+    texts = list(tracked_queries(PEOPLE).values())
+    if not texts:
+        return set()
+    documents = [document for document in documents if document]
+    if user_id is not None:
+        stored = (
+            UserProfile.objects.filter(pk=user_id)
+            .values_list("search_document", flat=True)
+            .first()
+        )
+        if stored:
+            documents.append(stored)
+    if not documents:
+        return set()
+    with connection.cursor() as cursor:
+        cursor.execute(
+            """
+            SELECT query
+            FROM unnest(%s::text[]) AS query
+            WHERE EXISTS (
+                SELECT 1 FROM unnest(%s::text[]) AS document
+                WHERE word_similarity(query, document) >= %s
+                   OR strpos(document, query) > 0
+            )
+            """,
+            [texts, documents, WORD_SIMILARITY_THRESHOLD],
+        )
+        return {row[0] for row in cursor.fetchall()}
@@ -2,9 +2,10 @@ import json
 from rest_framework import serializers, validators
 from django.contrib.auth import get_user_model
 from django.contrib.contenttypes.models import ContentType
-from django.db import transaction
+from django.db import models, transaction
 from django.db.models import Count
 from .utils import process_mentions
+from .post_cache import render_posts
 from dj_rest_auth.registration.serializers import RegisterSerializer
 from dj_rest_auth.serializers import PasswordResetConfirmSerializer
 from allauth.account.forms import SetPasswordForm as AllAuthSetPasswordForm
@@ -88,6 +89,11 @@ class PollSerializer(serializers.ModelSerializer):
         if not request or not request.user.is_authenticated:
             return None
 
+        # Batched by resolve_post_viewer_state for list responses.
+        viewer_poll_votes = self.context.get("viewer_poll_votes")
+        if viewer_poll_votes is not None:
+            return viewer_poll_votes.get(obj.id)
+
         vote = obj.votes.filter(user=request.user).first()
         return vote.option_id if vote else None
 
@@ -96,12 +102,20 @@ class PollSerializer(serializers.ModelSerializer):
         Optimize vote counting to avoid N+1 queries.
         We count all votes for all options in one go.
         """
-        vote_counts = {
-            item["id"]: item["count"]
-            for item in instance.options.annotate(count=Count("votes")).values(
-                "id", "count"
-            )
-        }
+        page_vote_counts = self.context.get("poll_vote_counts")
+        if page_vote_counts is not None:
+            # The whole page was tallied in one query; just pick this poll's options.
+            vote_counts = {
+                option.id: page_vote_counts.get(option.id, 0)
+                for option in instance.options.all()
+            }
+        else:
+            vote_counts = {
+                item["id"]: item["count"]
+                for item in instance.options.annotate(count=Count("votes")).values(
+                    "id", "count"
+                )
+            }
 
         self.context["vote_counts"] = vote_counts
         return super().to_representation(instance)
@@ -297,6 +311,8 @@ class NotificationSerializer(serializers.ModelSerializer):
 
     # --- 1. ADD THIS NEW FIELD ---
     context_snippet = serializers.SerializerMethodField()
+    # Aggregated notifications: "<actor> and <actor_count - 1> others ..."
+    latest_actors = serializers.SerializerMethodField()
 
     class Meta:
         model = Notification
@@ -311,9 +327,28 @@ class NotificationSerializer(serializers.ModelSerializer):
             "timestamp",
             "is_read",
             "context_snippet",
+            "actor_count",
+            "latest_actors",
         ]
         read_only_fields = fields
 
+    def get_latest_actors(self, obj: Notification):
+        """
+        The most recent actors of an aggregate, newest first. Plain
+        notifications (and rows older than aggregation) list just `actor`.
+        List views pass the actors of the whole page in the context (see
+        notifications.resolve_latest_actors).
+        """
+        actor_ids = obj.latest_actor_ids or [obj.actor_id]
+        by_id = self.context.get("latest_actors_by_id")
+        if actor_ids == [obj.actor_id]:
+            actors = [obj.actor]
+        else:
+            if by_id is None:
+                by_id = User.objects.select_related("profile").in_bulk(actor_ids)
+            actors = [by_id[actor_id] for actor_id in actor_ids if actor_id in by_id]
+        return UserSerializer(actors, many=True, context=self.context).data
+
     # --- 3. ADD THIS ENTIRE NEW METHOD INSIDE THE CLASS ---
     # --- FINAL, PERFECTED REPLACEMENT ---
     def get_context_snippet(self, obj: Notification) -> str | None:
@@ -581,6 +616,17 @@ class UserProfileUpdateSerializer(serializers.ModelSerializer):
 # In C:\Users\Vinay\Project\Loopline\community\serializers.py
 
 
+class StatusPostListSerializer(serializers.ListSerializer):
+    """
+    Serializes lists of posts through the per-post fragment cache
+    (see community/post_cache.py); only viewer fields are computed per request.
+    """
+
+    def to_representation(self, data):
+        posts = list(data.all() if isinstance(data, models.manager.BaseManager) else data)
+        return render_posts(self.child, posts)
+
+
 # --- REPLACEMENT FOR StatusPostSerializer ---
 class StatusPostSerializer(serializers.ModelSerializer):
 
@@ -619,6 +665,7 @@ class StatusPostSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = StatusPost
+        list_serializer_class = StatusPostListSerializer
         # 'group_id' has been removed from this list.
         fields = [
             "id",
@@ -786,10 +833,7 @@ class StatusPostSerializer(serializers.ModelSerializer):
                 for option_text in poll_data["options"]
             ]
             PollOption.objects.bulk_create(poll_options_to_create)
-        if post.content:
-            process_mentions(
-                actor=request.user, target_object=post, content_text=post.content
-            )
+        # Mentions are processed by the post_save signal (see utils.process_mentions).
         return post
 
     @transaction.atomic
@@ -849,18 +893,29 @@ class StatusPostSerializer(serializers.ModelSerializer):
             )
         return self.Meta.model.objects.get(pk=instance.pk)
 
+    # The viewer-specific getters below first look for page-level values that
+    # list views put in the context (see community/viewer_state.py) and only
+    # query per post when serializing a single object. Like and comment
+    # counts are denormalized columns (see community/counters.py).
+
     def get_is_saved(self, obj):
         request = self.context.get("request")
         if not request or not request.user.is_authenticated:
             return False
+        saved_post_ids = self.context.get("saved_post_ids")
+        if saved_post_ids is not None:
+            return obj.pk in saved_post_ids
         return obj.saved_by.filter(user=request.user).exists()
 
     def get_like_count(self, obj):
-        return obj.likes.count() if hasattr(obj, "likes") else 0
+        return obj.like_count
 
     def get_is_liked_by_user(self, obj):
         user = self.context.get("request").user
         if user and user.is_authenticated:
+            liked_post_ids = self.context.get("liked_post_ids")
+            if liked_post_ids is not None:
+                return obj.pk in liked_post_ids
             content_type = ContentType.objects.get_for_model(obj)
             return Like.objects.filter(
                 content_type=content_type, object_id=obj.pk, user=user
@@ -877,12 +932,7 @@ class StatusPostSerializer(serializers.ModelSerializer):
         return obj.__class__.__name__.lower()
 
     def get_comment_count(self, obj):
-        if obj and obj.pk:
-            content_type = ContentType.objects.get_for_model(obj)
-            return Comment.objects.filter(
-                content_type=content_type, object_id=obj.pk
-            ).count()
-        return 0
+        return obj.comment_count
 
 
 # --- END OF REPLACEMENT FOR StatusPostSerializer ---
@@ -977,7 +1027,7 @@ class FeedItemSerializer(serializers.Serializer):
 
 class GroupSerializer(serializers.ModelSerializer):
     creator = UserSerializer(read_only=True)
-    member_count = serializers.IntegerField(source="members.count", read_only=True)
+    # member_count is the denormalized Group column (see community/counters.py).
     membership_status = serializers.SerializerMethodField()
 
     # --- CHANGE 1: 'members' is now a SerializerMethodField ---
@@ -1011,21 +1061,35 @@ class GroupSerializer(serializers.ModelSerializer):
         # Check for a block record first. It's the highest priority status.
         # The related_name on the Group model for GroupBlock is likely 'blocked_users_info' or similar.
         # Let's use the explicit model query which is safer.
-        if GroupBlock.objects.filter(group=obj, user=user).exists():
+        # Group lists resolve these for the whole page (resolve_group_viewer_state).
+        blocked_group_ids = self.context.get("blocked_group_ids")
+        if blocked_group_ids is not None:
+            is_blocked = obj.pk in blocked_group_ids
+        else:
+            is_blocked = GroupBlock.objects.filter(group=obj, user=user).exists()
+        if is_blocked:
             return "blocked"
         # --- END OF FIX ---
 
-        if obj.creator == user:
+        if obj.creator_id == user.pk:
             return "creator"
 
-        if obj.members.filter(pk=user.pk).exists():
+        member_group_ids = self.context.get("member_group_ids")
+        if member_group_ids is not None:
+            is_member = obj.pk in member_group_ids
+        else:
+            is_member = obj.members.filter(pk=user.pk).exists()
+        if is_member:
             return "member"
 
-        if (
-            obj.privacy_level == "private"
-            and obj.join_requests.filter(user=user, status="pending").exists()
-        ):
-            return "pending"
+        if obj.privacy_level == "private":
+            pending_group_ids = self.context.get("pending_group_ids")
+            if pending_group_ids is not None:
+                is_pending = obj.pk in pending_group_ids
+            else:
+                is_pending = obj.join_requests.filter(user=user, status="pending").exists()
+            if is_pending:
+                return "pending"
 
         return "none"
 
@@ -1050,6 +1114,13 @@ class GroupSerializer(serializers.ModelSerializer):
         return []
 
 
+class GroupListSerializer(GroupSerializer):
+    """GroupSerializer for group lists: the member list is left out."""
+
+    class Meta(GroupSerializer.Meta):
+        fields = [field for field in GroupSerializer.Meta.fields if field != "members"]
+
+
 # =====================================================================================
 
 
@@ -1150,19 +1221,12 @@ class CommentSerializer(serializers.ModelSerializer):
         validated_data["content_type"] = content_type
         validated_data["object_id"] = object_id
 
-        # Create the comment instance
-        comment = Comment.objects.create(**validated_data)
-
-        # Now, process mentions in the comment's content
-        if comment.content:
-            process_mentions(
-                actor=request.user, target_object=comment, content_text=comment.content
-            )
-
-        return comment
+        # Create the comment instance. Mentions in its content are processed
+        # by the post_save signal (see utils.process_mentions).
+        return Comment.objects.create(**validated_data)
 
     def get_like_count(self, obj: Comment) -> int:
-        return obj.likes.count()
+        return obj.like_count
 
     def get_is_liked_by_user(self, obj: Comment) -> bool:
         request = self.context.get("request")
@@ -1,18 +1,43 @@
 # C:\Users\Vinay\Project\Loopline\community\signals.py
 # --- ADDED REAL-TIME POST DELETION SIGNAL (Corrected Model Name) ---
 
-import re
-from django.db.models.signals import post_save, post_delete # <--- ADD post_delete
+import logging
+from functools import cache as cache_result
+from django.db.models.signals import pre_save, post_save, pre_delete, post_delete, m2m_changed # <--- ADD post_delete
+from django.db.models import Q
 from django.dispatch import receiver
+from django.db import transaction
 from django.contrib.auth import get_user_model
 from django.contrib.contenttypes.models import ContentType
-from .models import UserProfile, Follow, Like, StatusPost, Notification, Comment, GroupJoinRequest 
+from .models import (
+    UserProfile, Follow, Like, StatusPost, Notification, Comment, GroupJoinRequest, PostMedia, Poll, PollOption, PollVote,
+    Group, GroupBlock, ConnectionRequest, Skill, Education, Experience, SocialLink,
+)
 
-from channels.layers import get_channel_layer
-from asgiref.sync import async_to_sync
 from .serializers import NotificationSerializer, LivePostSerializer
+from .timeline import fan_out_post, add_author_to_timeline, remove_author_from_timeline
+from .counters import adjust_like_count, adjust_comment_count, adjust_member_count, refresh_member_counts
+from .post_cache import invalidate_post_fragments
+from . import versions
+from .versions import bump_versions
+from .realtime import broadcast, broadcast_to_users, encode_event, group_topic_group, post_topic_group
+from .middleware import invalidate_token_cache
+from .engagement import mark_post_engaged
+from .notifications import change_unread_count, create_notification
+from .utils import process_mentions
+from . import autocomplete
+from . import search_cache
+from .search import (
+    PEOPLE_SEARCH_USER_FIELDS, people_search_document, refresh_people_search_document,
+    update_group_search_vector, update_search_vector, update_search_vectors_for_author,
+)
+from rest_framework.authtoken.models import Token
+
+from . import instrumentation
+from .instrumentation import sampled_debug
 
 User = get_user_model()
+logger = logging.getLogger(__name__)
 
 # =================================================================================
 # === NEW REAL-TIME POST DELETION SIGNAL ===
@@ -24,61 +49,51 @@ def post_deleted_signal(sender, instance, **kwargs):
     Handles the deletion of a StatusPost instance.
 
     Broadcasts a 'post_deleted' event to the author AND all of their followers,
-    ensuring real-time UI consistency across all relevant clients.
+    ensuring real-time UI consistency across all relevant clients. The event
+    is sent by the background dispatcher after the transaction commits.
     """
-    author = instance.author
-    if not author:
+    author_id = instance.author_id
+    if not author_id:
         return
 
-    channel_layer = get_channel_layer()
-    
-    # --- FIX #1: The payload is now correctly nested ---
-    # This now matches the structure your frontend EXPECTS.
-    message_to_send = {
-        'type': 'post_deleted',
-        'payload': {
-            'post_id': instance.id
-        }
-    }
-
-    # --- FIX #2: We find all relevant users (author + followers) ---
-    follower_ids = Follow.objects.filter(following=author).values_list('follower_id', flat=True)
-    recipient_user_ids = list(follower_ids) + [author.id]
-
-    # --- FIX #3: We broadcast to each user's personal group ---
-    # We will use the 'send_live_post' handler type for consistency,
-    # as this is a "live" update related to a post.
-    for user_id in recipient_user_ids:
-        async_to_sync(channel_layer.group_send)(
-            f"user_{user_id}",
-            {
-                'type': 'send_live_post', # Re-using the existing, correct handler type
-                'message': message_to_send
-            }
-        )
-    
-    print(f"!!! REAL-TIME (Post Deleted): Sent post_deleted signal for ID {instance.id} to {len(recipient_user_ids)} users !!!")
+    # The payload is nested the way the frontend expects. The recipients are
+    # looked up now, while the follow rows are certainly still there.
+    follower_ids = Follow.objects.filter(following_id=author_id).values_list('follower_id', flat=True)
+    recipient_user_ids = [*follower_ids, author_id]
+    broadcast_to_users(
+        recipient_user_ids,
+        # Re-using the existing, correct handler type
+        encode_event('send_live_post', {'type': 'post_deleted', 'payload': {'post_id': instance.id}}),
+    )
 # =================================================================================
 
 
 # =================================================================================
-# === CENTRALIZED REAL-TIME NOTIFICATION SIGNAL (Unchanged) ===
+# === CENTRALIZED REAL-TIME NOTIFICATION SIGNAL ===
 # =================================================================================
 @receiver(post_save, sender=Notification)
 def send_new_notification_signal(sender, instance, created, **kwargs):
-    if created:
-        serializer = NotificationSerializer(instance)
-        channel_layer = get_channel_layer()
-        group_name = f'user_{instance.recipient.id}'
-        message_data = {
-            'type': 'send_notification',
-            'message': {
-                'type': 'new_notification',
-                'payload': serializer.data
-            }
-        }
-        async_to_sync(channel_layer.group_send)(group_name, message_data)
-        print(f"!!! REAL-TIME (Notification Created): Sent '{instance.notification_type}' to group {group_name} !!!")
+    if not created: return
+    instrumentation.incr("notifications_created_total", type=instance.notification_type)
+    broadcast_to_users(
+        [instance.recipient_id],
+        lambda: encode_event('send_notification', {
+            'type': 'new_notification',
+            'payload': NotificationSerializer(instance).data
+        }),
+    )
+
+
+@receiver(post_save, sender=Notification, dispatch_uid="unread_count_notification_save_signal")
+def count_new_unread_notification(sender, instance, created, **kwargs):
+    if created and not instance.is_read:
+        change_unread_count(instance.recipient_id, 1)
+
+
+@receiver(post_delete, sender=Notification, dispatch_uid="unread_count_notification_delete_signal")
+def uncount_deleted_unread_notification(sender, instance, **kwargs):
+    if not instance.is_read:
+        change_unread_count(instance.recipient_id, -1)
 # =================================================================================
 
 
@@ -105,12 +120,12 @@ def create_like_notification(sender, instance, created, **kwargs):
             action_object_content_type=action_object_content_type,
             action_object_object_id=instance.id
         ).exists():
-            Notification.objects.create(
+            create_notification(
                 recipient=recipient, actor=liker, verb=verb,
                 notification_type=Notification.LIKE,
                 action_object=instance, target=notification_target
             )
-            print(f"Notification DB (Like): Created for {recipient.username}")
+            sampled_debug(logger, "Notification DB (Like): Recorded for %s", recipient.username)
 
 @receiver(post_save, sender=Follow, dispatch_uid="create_follow_notification_signal")
 def create_follow_notification(sender, instance, created, **kwargs):
@@ -123,11 +138,11 @@ def create_follow_notification(sender, instance, created, **kwargs):
             action_object_content_type=action_object_content_type,
             action_object_object_id=instance.id
         ).exists():
-            Notification.objects.create(
+            create_notification(
                 recipient=followed_user, actor=follower, verb="started following you",
                 notification_type=Notification.FOLLOW, action_object=instance
             )
-            print(f"Notification DB (Follow): Created for {followed_user.username}")
+            sampled_debug(logger, "Notification DB (Follow): Recorded for %s", followed_user.username)
 
 @receiver(post_save, sender=Comment, dispatch_uid="create_comment_reply_notification_signal")
 def create_comment_and_reply_notification(sender, instance, created, **kwargs):
@@ -137,8 +152,9 @@ def create_comment_and_reply_notification(sender, instance, created, **kwargs):
         recipient, verb, notification_type = instance.parent.author, "replied to your comment", Notification.REPLY
     else:
         recipient, verb, notification_type = post.author, "commented on your post", Notification.COMMENT
-    mentioned_usernames = set(re.findall(r'@(\w+)', instance.content or ''))
-    if recipient != commenter and recipient.username not in mentioned_usernames:
+    # A mention of the recipient is covered by this notification; see
+    # process_mentions().
+    if recipient != commenter:
         action_object_content_type = ContentType.objects.get_for_model(instance)
         if not Notification.objects.filter(
             recipient=recipient, actor=commenter,
@@ -150,35 +166,15 @@ def create_comment_and_reply_notification(sender, instance, created, **kwargs):
                 notification_type=notification_type,
                 action_object=instance, target=instance
             )
-            print(f"Notification DB ({notification_type}): Created for {recipient.username}")
+            sampled_debug(logger, "Notification DB (%s): Created for %s", notification_type, recipient.username)
 
 @receiver(post_save, sender=StatusPost, dispatch_uid="mention_handler_signal_post")
 @receiver(post_save, sender=Comment, dispatch_uid="mention_handler_signal_comment")
 def create_mention_notifications(sender, instance, created, **kwargs):
     if not created: return
-    actor, content_text = instance.author, instance.content or ""
-    mentioned_usernames = set(re.findall(r'@(\w+)', content_text))
-    if not mentioned_usernames: return
-    if sender is StatusPost: verb, target = "mentioned you in a post", instance
-    elif sender is Comment: verb, target = "mentioned you in a reply" if instance.parent else "mentioned you in a comment", instance.content_object
-    else: return
-    for username in mentioned_usernames:
-        try:
-            recipient = User.objects.get(username=username)
-            if recipient != actor:
-                action_object_content_type = ContentType.objects.get_for_model(instance)
-                if not Notification.objects.filter(
-                    recipient=recipient, actor=actor,
-                    action_object_content_type=action_object_content_type,
-                    action_object_object_id=instance.id
-                ).exists():
-                    Notification.objects.create(
-                        recipient=recipient, actor=actor, verb=verb,
-                        notification_type=Notification.MENTION,
-                        target=target, action_object=instance
-                    )
-                    print(f"Notification DB (Mention): Created for {recipient.username}")
-        except User.DoesNotExist: continue
+    notifications = process_mentions(instance.author, instance, instance.content)
+    if notifications:
+        sampled_debug(logger, "Notification DB (Mention): Created %s", len(notifications))
 
 @receiver(post_save, sender=GroupJoinRequest)
 def create_group_join_request_notification(sender, instance, created, **kwargs):
@@ -201,23 +197,319 @@ def create_group_join_request_notification(sender, instance, created, **kwargs):
             notification_type=Notification.GROUP_JOIN_REQUEST,
             target=group, action_object=join_request
         )
-        print(f"Notification DB (Group Join Request): Created for {group_owner.username}")
+        sampled_debug(logger, "Notification DB (Group Join Request): Created for %s", group_owner.username)
+
+# --- DENORMALIZED COUNTER SIGNALS ---
+@receiver(post_save, sender=Like, dispatch_uid="like_counter_increment_signal")
+def increment_like_count(sender, instance, created, **kwargs):
+    if not created: return
+    adjust_like_count(instance.content_type_id, instance.object_id, 1)
+
+@receiver(post_delete, sender=Like, dispatch_uid="like_counter_decrement_signal")
+def decrement_like_count(sender, instance, **kwargs):
+    adjust_like_count(instance.content_type_id, instance.object_id, -1)
+
+@receiver(post_save, sender=Comment, dispatch_uid="comment_counter_increment_signal")
+def increment_comment_count(sender, instance, created, **kwargs):
+    if not created: return
+    adjust_comment_count(instance.content_type_id, instance.object_id, 1)
+
+@receiver(post_delete, sender=Comment, dispatch_uid="comment_counter_decrement_signal")
+def decrement_comment_count(sender, instance, **kwargs):
+    adjust_comment_count(instance.content_type_id, instance.object_id, -1)
+
+# --- LIVE ENGAGEMENT COUNTER SIGNALS (throttled, see engagement.py) ---
+def announce_engagement(post_id):
+    transaction.on_commit(lambda: mark_post_engaged(post_id))
+
+@receiver(post_save, sender=Like, dispatch_uid="engagement_like_save_signal")
+@receiver(post_delete, sender=Like, dispatch_uid="engagement_like_delete_signal")
+@receiver(post_save, sender=Comment, dispatch_uid="engagement_comment_save_signal")
+@receiver(post_delete, sender=Comment, dispatch_uid="engagement_comment_delete_signal")
+def announce_post_engagement(sender, instance, **kwargs):
+    if kwargs.get('created') is False: return
+    if instance.content_type_id == ContentType.objects.get_for_model(StatusPost).id:
+        announce_engagement(instance.object_id)
+
+@receiver(post_save, sender=PollVote, dispatch_uid="engagement_vote_save_signal")
+@receiver(post_delete, sender=PollVote, dispatch_uid="engagement_vote_delete_signal")
+def announce_poll_engagement(sender, instance, **kwargs):
+    if kwargs.get('created') is False: return
+    post_id = Poll.objects.filter(pk=instance.poll_id).values_list("post_id", flat=True).first()
+    if post_id:
+        announce_engagement(post_id)
+
+# --- POST FRAGMENT CACHE / VERSION SIGNALS ---
+def mark_posts_changed(post_ids):
+    """Drops cached fragments and bumps the ETag versions of the given posts."""
+    post_ids = [post_id for post_id in post_ids if post_id]
+    invalidate_post_fragments(post_ids)
+    bump_versions(versions.POST, post_ids)
+
+@receiver(post_save, sender=StatusPost, dispatch_uid="post_fragment_post_save_signal")
+@receiver(post_delete, sender=StatusPost, dispatch_uid="post_fragment_post_delete_signal")
+def invalidate_fragment_for_post(sender, instance, **kwargs):
+    mark_posts_changed([instance.pk])
+
+@receiver(post_save, sender=PostMedia, dispatch_uid="post_fragment_media_save_signal")
+@receiver(post_delete, sender=PostMedia, dispatch_uid="post_fragment_media_delete_signal")
+@receiver(post_save, sender=Poll, dispatch_uid="post_fragment_poll_save_signal")
+@receiver(post_delete, sender=Poll, dispatch_uid="post_fragment_poll_delete_signal")
+def invalidate_fragment_for_post_child(sender, instance, **kwargs):
+    mark_posts_changed([instance.post_id])
+
+@receiver(post_save, sender=PollOption, dispatch_uid="post_fragment_option_save_signal")
+@receiver(post_delete, sender=PollOption, dispatch_uid="post_fragment_option_delete_signal")
+@receiver(post_save, sender=PollVote, dispatch_uid="post_fragment_vote_save_signal")
+@receiver(post_delete, sender=PollVote, dispatch_uid="post_fragment_vote_delete_signal")
+def invalidate_fragment_for_poll_child(sender, instance, **kwargs):
+    mark_posts_changed(Poll.objects.filter(pk=instance.poll_id).values_list("post_id", flat=True))
+
+@receiver(post_save, sender=Like, dispatch_uid="post_fragment_like_save_signal")
+@receiver(post_delete, sender=Like, dispatch_uid="post_fragment_like_delete_signal")
+@receiver(post_save, sender=Comment, dispatch_uid="post_fragment_comment_save_signal")
+@receiver(post_delete, sender=Comment, dispatch_uid="post_fragment_comment_delete_signal")
+def invalidate_fragment_for_engagement(sender, instance, **kwargs):
+    if instance.content_type_id == ContentType.objects.get_for_model(StatusPost).id:
+        mark_posts_changed([instance.object_id])
+
+@receiver(m2m_changed, sender=UserProfile.saved_posts.through, dispatch_uid="post_version_saved_signal")
+def bump_version_for_saved_posts(sender, instance, action, reverse, pk_set, **kwargs):
+    # Only is_saved changes, which is viewer state, so fragments stay valid.
+    if action not in ("post_add", "post_remove", "post_clear"): return
+    post_ids = [instance.pk] if reverse else (pk_set or instance.saved_posts.values_list("pk", flat=True))
+    bump_versions(versions.POST, post_ids)
+
+# --- PROFILE / GROUP / FOLLOW-GRAPH VERSION SIGNALS (used for ETags) ---
+@receiver(post_save, sender=User, dispatch_uid="profile_version_user_signal")
+@receiver(post_save, sender=UserProfile, dispatch_uid="profile_version_profile_signal")
+def bump_profile_version_for_user(sender, instance, **kwargs):
+    bump_versions(versions.PROFILE, [instance.pk])
+
+@receiver(post_save, sender=User, dispatch_uid="group_version_member_user_signal")
+@receiver(post_save, sender=UserProfile, dispatch_uid="group_version_member_profile_signal")
+def bump_group_versions_for_member_profile(sender, instance, created, update_fields=None, **kwargs):
+    # Group responses show the creator's and members' names and pictures.
+    if created or (update_fields is not None and set(update_fields) <= {"last_login"}): return
+    group_ids = (
+        Group.objects.filter(Q(members=instance.pk) | Q(creator_id=instance.pk))
+        .values_list("pk", flat=True).distinct()
+    )
+    bump_versions(versions.GROUP, group_ids)
+
+@receiver(post_save, sender=Skill, dispatch_uid="profile_version_skill_save_signal")
+@receiver(post_delete, sender=Skill, dispatch_uid="profile_version_skill_delete_signal")
+def bump_profile_version_for_skill(sender, instance, **kwargs):
+    bump_versions(versions.PROFILE, [instance.user_id])
+
+@receiver(post_save, sender=Education, dispatch_uid="profile_version_education_save_signal")
+@receiver(post_delete, sender=Education, dispatch_uid="profile_version_education_delete_signal")
+@receiver(post_save, sender=Experience, dispatch_uid="profile_version_experience_save_signal")
+@receiver(post_delete, sender=Experience, dispatch_uid="profile_version_experience_delete_signal")
+def bump_profile_version_for_history(sender, instance, **kwargs):
+    bump_versions(versions.PROFILE, [instance.user_profile_id])
+
+@receiver(post_save, sender=SocialLink, dispatch_uid="profile_version_link_save_signal")
+@receiver(post_delete, sender=SocialLink, dispatch_uid="profile_version_link_delete_signal")
+def bump_profile_version_for_link(sender, instance, **kwargs):
+    bump_versions(versions.PROFILE, [instance.profile_id])
+
+@receiver(post_save, sender=Follow, dispatch_uid="follow_graph_version_save_signal")
+@receiver(post_delete, sender=Follow, dispatch_uid="follow_graph_version_delete_signal")
+def bump_versions_for_follow(sender, instance, **kwargs):
+    # Both profiles show the relationship; only the follower's feed changes.
+    bump_versions(versions.PROFILE, [instance.follower_id, instance.following_id])
+    bump_versions(versions.FOLLOW_GRAPH, [instance.follower_id])
+
+@receiver(post_save, sender=ConnectionRequest, dispatch_uid="profile_version_connection_save_signal")
+@receiver(post_delete, sender=ConnectionRequest, dispatch_uid="profile_version_connection_delete_signal")
+def bump_profile_versions_for_connection(sender, instance, **kwargs):
+    bump_versions(versions.PROFILE, [instance.sender_id, instance.receiver_id])
+
+@receiver(post_save, sender=Group, dispatch_uid="group_version_save_signal")
+@receiver(post_delete, sender=Group, dispatch_uid="group_version_delete_signal")
+def bump_group_version(sender, instance, **kwargs):
+    bump_versions(versions.GROUP, [instance.pk])
+
+@receiver(post_save, sender=GroupJoinRequest, dispatch_uid="group_version_request_save_signal")
+@receiver(post_delete, sender=GroupJoinRequest, dispatch_uid="group_version_request_delete_signal")
+@receiver(post_save, sender=GroupBlock, dispatch_uid="group_version_block_save_signal")
+@receiver(post_delete, sender=GroupBlock, dispatch_uid="group_version_block_delete_signal")
+def bump_group_version_for_child(sender, instance, **kwargs):
+    bump_versions(versions.GROUP, [instance.group_id])
+
+@receiver(m2m_changed, sender=Group.members.through, dispatch_uid="group_version_members_signal")
+def bump_versions_for_membership(sender, instance, action, reverse, pk_set, **kwargs):
+    if action not in ("post_add", "post_remove", "pre_clear"): return
+    if reverse:
+        user_ids = [instance.pk]
+        group_ids = pk_set if pk_set is not None else instance.joined_groups.values_list("pk", flat=True)
+    else:
+        group_ids = [instance.pk]
+        user_ids = pk_set if pk_set is not None else instance.members.values_list("pk", flat=True)
+    bump_versions(versions.GROUP, group_ids)
+    # Private-group posts in the members' feeds appear or disappear.
+    bump_versions(versions.MEMBERSHIPS, user_ids)
+
+@receiver(m2m_changed, sender=Group.members.through, dispatch_uid="topic_access_members_signal")
+def recheck_topics_of_removed_members(sender, instance, action, reverse, pk_set, **kwargs):
+    # Their open sockets drop private group and post topics they lost access to.
+    if action not in ("post_remove", "pre_clear"): return
+    if reverse:
+        user_ids = [instance.pk]
+    else:
+        user_ids = pk_set if pk_set is not None else instance.members.values_list("pk", flat=True)
+    broadcast_to_users(user_ids, {"type": "recheck_topics"})
+
+# --- WEBSOCKET TOKEN CACHE SIGNALS ---
+@receiver(post_delete, sender=Token, dispatch_uid="ws_token_cache_token_delete_signal")
+def drop_cached_token_user(sender, instance, **kwargs):
+    # Covers ForcefulLogoutView, which deletes the user's token.
+    invalidate_token_cache([instance.key])
+
+@receiver(post_save, sender=User, dispatch_uid="ws_token_cache_user_save_signal")
+def drop_cached_token_users_for_user(sender, instance, created, **kwargs):
+    # The cached user may be stale (e.g. deactivated or renamed).
+    if created: return
+    invalidate_token_cache(Token.objects.filter(user=instance).values_list("key", flat=True))
+
+# --- HOME TIMELINE (FAN-OUT-ON-WRITE) SIGNALS ---
+@receiver(post_save, sender=StatusPost, dispatch_uid="timeline_fan_out_signal")
+def fan_out_post_to_timelines(sender, instance, created, **kwargs):
+    if not created: return
+    fan_out_post(instance)
+
+@receiver(post_save, sender=Follow, dispatch_uid="timeline_follow_signal")
+def add_followed_author_to_timeline(sender, instance, created, **kwargs):
+    if not created: return
+    add_author_to_timeline(instance.follower_id, instance.following_id)
+
+@receiver(post_delete, sender=Follow, dispatch_uid="timeline_unfollow_signal")
+def remove_unfollowed_author_from_timeline(sender, instance, **kwargs):
+    remove_author_from_timeline(instance.follower_id, instance.following_id)
 
 # --- OTHER SIGNALS ---
 @receiver(post_save, sender=StatusPost, dispatch_uid="live_post_to_followers_signal")
 def send_live_post_to_followers(sender, instance, created, **kwargs):
     if not created: return
-    author = instance.author
-    followers = Follow.objects.filter(following=author).select_related('follower')
-    if not followers: return
-    serializer = LivePostSerializer(instance)
-    channel_layer = get_channel_layer()
-    message_data = {
-        'type': 'send_live_post',
-        'message': {'type': 'new_post', 'payload': serializer.data}
-    }
-    for follow_relation in followers:
-        follower = follow_relation.follower
-        group_name = f'user_{follower.id}'
-        async_to_sync(channel_layer.group_send)(group_name, message_data)
-        print(f"!!! REAL-TIME (New Post): Sent post ID {instance.id} to group {group_name} for user {follower.username} !!!")
\ No newline at end of file
+    follower_ids = Follow.objects.filter(following_id=instance.author_id).values_list('follower_id', flat=True)
+    # Serialized on commit (once, however many audiences), so media and polls
+    # saved after the post are included.
+    build_event = cache_result(lambda: encode_event(
+        'send_live_post', {'type': 'new_post', 'payload': LivePostSerializer(instance).data}
+    ))
+    broadcast_to_users(follower_ids, build_event)
+    if instance.group_id:
+        # Everyone viewing the group feed, with a single group_send.
+        broadcast([group_topic_group(instance.group_id)], build_event)
+
+@receiver(post_save, sender=Comment, dispatch_uid="live_comment_to_post_topic_signal")
+def send_live_comment_to_post_topic(sender, instance, created, **kwargs):
+    if not created: return
+    if instance.content_type_id != ContentType.objects.get_for_model(StatusPost).id: return
+    broadcast(
+        [post_topic_group(instance.object_id)],
+        encode_event('send_topic_event', {
+            'type': 'new_comment',
+            'payload': {
+                'post_id': instance.object_id,
+                'comment_id': instance.id,
+                'parent_id': instance.parent_id,
+            },
+        }),
+    )
+
+
+# --- Full-text search document (see search.py) ---
+@receiver(post_save, sender=StatusPost, dispatch_uid="search_vector_post_save_signal")
+def index_post_for_search(sender, instance, created, update_fields=None, **kwargs):
+    if update_fields is not None and "content" not in update_fields: return
+    # Cached searches matching the old or the new text are stale (see search_cache.py).
+    stale = set() if created else search_cache.matching_post_queries(instance.pk)
+    update_search_vector(instance)
+    search_cache.invalidate(search_cache.POSTS, stale | search_cache.matching_post_queries(instance.pk))
+
+@receiver(pre_save, sender=User, dispatch_uid="search_vector_username_check_signal")
+def remember_username_change(sender, instance, update_fields=None, **kwargs):
+    instance._username_changed = False
+    if instance.pk is None or (update_fields is not None and "username" not in update_fields): return
+    old_username = User.objects.filter(pk=instance.pk).values_list("username", flat=True).first()
+    instance._username_changed = old_username is not None and old_username != instance.username
+
+@receiver(post_save, sender=User, dispatch_uid="search_vector_username_signal")
+def reindex_posts_for_username(sender, instance, **kwargs):
+    if getattr(instance, "_username_changed", False):
+        update_search_vectors_for_author(instance)
+        search_cache.invalidate_all(search_cache.POSTS)
+
+
+@receiver(post_save, sender=Group, dispatch_uid="search_vector_group_save_signal")
+def index_group_for_search(sender, instance, update_fields=None, **kwargs):
+    if update_fields is not None and not {"name", "description"} & set(update_fields): return
+    update_group_search_vector(instance)
+
+
+# --- Group member_count (see counters.py) ---
+@receiver(m2m_changed, sender=Group.members.through, dispatch_uid="group_member_count_signal")
+def update_member_count(sender, instance, action, reverse, pk_set, **kwargs):
+    if action == "pre_clear" and reverse:
+        # The user's memberships are gone by post_clear; remember the groups.
+        instance._cleared_group_ids = list(instance.joined_groups.values_list("pk", flat=True))
+        return
+    if action == "post_add":
+        # pk_set only lists the rows that were actually inserted.
+        if not pk_set: return
+        if reverse:
+            adjust_member_count(pk_set, 1)
+        else:
+            adjust_member_count([instance.pk], len(pk_set))
+    elif action == "post_remove":
+        # pk_set also lists users who were not members, so recount.
+        refresh_member_counts(pk_set if reverse else [instance.pk])
+    elif action == "post_clear":
+        refresh_member_counts(getattr(instance, "_cleared_group_ids", []) if reverse else [instance.pk])
+
+@receiver(pre_delete, sender=User, dispatch_uid="group_member_count_user_check_signal")
+def remember_joined_groups(sender, instance, **kwargs):
+    # Deleting a user cascades to their memberships without m2m_changed.
+    instance._joined_group_ids = list(instance.joined_groups.values_list("pk", flat=True))
+
+@receiver(post_delete, sender=User, dispatch_uid="group_member_count_user_delete_signal")
+def recount_groups_of_deleted_user(sender, instance, **kwargs):
+    if getattr(instance, "_joined_group_ids", None):
+        refresh_member_counts(instance._joined_group_ids)
+
+
+# --- People search document (see search.py) ---
+@receiver(pre_save, sender=UserProfile, dispatch_uid="people_search_profile_signal")
+def build_people_search_document(sender, instance, **kwargs):
+    instance.search_document = people_search_document(instance.user, instance)
+    search_cache.invalidate(search_cache.PEOPLE, search_cache.matching_people_queries(
+        None if instance._state.adding else instance.pk, [instance.search_document],
+    ))
+
+@receiver(post_save, sender=User, dispatch_uid="people_search_user_signal")
+def refresh_people_search_document_for_user(sender, instance, created, update_fields=None, **kwargs):
+    if created: return  # The new profile builds its document on save.
+    if update_fields is not None and not set(update_fields) & set(PEOPLE_SEARCH_USER_FIELDS): return
+    stale = search_cache.matching_people_queries(instance.pk)
+    refresh_people_search_document(instance)
+    search_cache.invalidate(search_cache.PEOPLE, stale | search_cache.matching_people_queries(instance.pk))
+
+
+# --- Autocomplete prefix index (see autocomplete.py) ---
+AUTOCOMPLETE_USER_FIELDS = {"username", "first_name", "last_name", "is_active"}
+
+@receiver(post_save, sender=User, dispatch_uid="autocomplete_user_save_signal")
+@receiver(post_save, sender=UserProfile, dispatch_uid="autocomplete_profile_save_signal")
+def reindex_user_for_autocomplete(sender, instance, update_fields=None, **kwargs):
+    if not autocomplete.index.is_built: return
+    if sender is User and update_fields is not None and not set(update_fields) & AUTOCOMPLETE_USER_FIELDS: return
+    user = instance.user if sender is UserProfile else instance
+    transaction.on_commit(lambda: autocomplete.sync_user(user))
+
+@receiver(post_delete, sender=User, dispatch_uid="autocomplete_user_delete_signal")
+def unindex_user_for_autocomplete(sender, instance, **kwargs):
+    if autocomplete.index.is_built:
+        user_id = instance.pk
+        transaction.on_commit(lambda: autocomplete.index.remove(user_id))
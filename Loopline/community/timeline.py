@@ -0,0 +1,190 @@
+# community/timeline.py
+"""
+Fan-out-on-write home timelines.
+
+Every new StatusPost is copied (as a post ID) into the TimelineEntry rows of
+its author and the author's followers, so FeedListView only has to read a
+bounded, pre-filtered set of IDs instead of rebuilding the feed from the
+follow graph on every request.
+
+Only the author's own entry is written in the request. The followers'
+entries are written after commit on a background thread of the realtime
+dispatcher, so a post by an author with many followers does not hold up the
+response. Fan-out does not trim: the trim_timelines command (run it
+periodically) cuts timelines that grew beyond TIMELINE_MAX_LENGTH.
+"""
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, F, Q, Window
+from django.db.models.functions import RowNumber
+
+from .models import Follow, Group, StatusPost, TimelineEntry
+from .realtime import dispatcher
+
+# How many entries each user's timeline keeps. Older entries are trimmed.
+TIMELINE_MAX_LENGTH = getattr(settings, "TIMELINE_MAX_LENGTH", 800)
+
+# Followers are processed in chunks so one huge fan-out never builds a
+# single gigantic INSERT or DELETE statement.
+FANOUT_BATCH_SIZE = getattr(settings, "TIMELINE_FANOUT_BATCH_SIZE", 1000)
+
+# Set to False to fan out inline, in the request (e.g. in tests, where the
+# transaction never commits).
+FANOUT_IN_BACKGROUND = getattr(settings, "TIMELINE_FANOUT_IN_BACKGROUND", True)
+
+
+def _chunks(items, size):
+    for start in range(0, len(items), size):
+        yield items[start : start + size]
+
+
+def trim_timelines(owner_ids):
+    """
+    Deletes every entry beyond TIMELINE_MAX_LENGTH for the given owners.
+    Only the owners over the limit are scanned by the window query.
+    """
+    over_limit = list(
+        TimelineEntry.objects.filter(owner_id__in=owner_ids)
+        .values("owner_id")
+        .annotate(entries=Count("id"))
+        .filter(entries__gt=TIMELINE_MAX_LENGTH)
+        .values_list("owner_id", flat=True)
+    )
+    if not over_limit:
+        return 0
+    overflow_ids = list(
+        TimelineEntry.objects.filter(owner_id__in=over_limit)
+        .annotate(
+            position=Window(
+                RowNumber(),
+                partition_by=[F("owner_id")],
+                order_by=[F("created_at").desc(), F("post_id").desc()],
+            )
+        )
+        .filter(position__gt=TIMELINE_MAX_LENGTH)
+        .values_list("id", flat=True)
+    )
+    if overflow_ids:
+        TimelineEntry.objects.filter(id__in=overflow_ids).delete()
+    return len(overflow_ids)
+
+
+def fan_out_post(post):
+    """
+    Pushes a newly created post into the timelines of its author and, after
+    commit and in the background, of the author's followers.
+    """
+    TimelineEntry.objects.bulk_create(
+        [TimelineEntry(owner_id=post.author_id, post=post, created_at=post.created_at)],
+        ignore_conflicts=True,
+    )
+    trim_timelines([post.author_id])
+
+    if not FANOUT_IN_BACKGROUND:
+        fan_out_to_followers(post.pk)
+        return
+    transaction.on_commit(
+        lambda: dispatcher.enqueue_later(
+            f"timeline-fan-out:{post.pk}", 0, lambda: fan_out_to_followers(post.pk)
+        )
+    )
+
+
+def fan_out_to_followers(post_id):
+    """
+    Writes a post into the timelines of its author's followers.
+    """
+    post = (
+        StatusPost.objects.filter(pk=post_id)
+        .values("author_id", "created_at")
+        .first()
+    )
+    if post is None:
+        # Deleted before the fan-out ran.
+        return
+    follower_ids = list(
+        Follow.objects.filter(following_id=post["author_id"]).values_list(
+            "follower_id", flat=True
+        )
+    )
+    for owner_batch in _chunks(follower_ids, FANOUT_BATCH_SIZE):
+        TimelineEntry.objects.bulk_create(
+            [
+                TimelineEntry(owner_id=owner_id, post_id=post_id, created_at=post["created_at"])
+                for owner_id in owner_batch
+            ],
+            ignore_conflicts=True,
+        )
+
+
+def add_author_to_timeline(owner_id, author_id):
+    """
+    Copies an author's most recent posts into a timeline, e.g. after a follow.
+    """
+    recent_posts = StatusPost.objects.filter(author_id=author_id).order_by(
+        "-created_at", "-id"
+    )[:TIMELINE_MAX_LENGTH]
+    TimelineEntry.objects.bulk_create(
+        [
+            TimelineEntry(owner_id=owner_id, post_id=post_id, created_at=created_at)
+            for post_id, created_at in recent_posts.values_list("id", "created_at")
+        ],
+        ignore_conflicts=True,
+    )
+    trim_timelines([owner_id])
+
+
+def remove_author_from_timeline(owner_id, author_id):
+    """
+    Drops an author's posts from a timeline, e.g. after an unfollow.
+    """
+    TimelineEntry.objects.filter(owner_id=owner_id, post__author_id=author_id).delete()
+
+
+def rebuild_timeline(user):
+    """
+    Recomputes a user's timeline from scratch using the follow graph.
+
+    Returns the number of entries written.
+    """
+    author_ids = list(user.following.values_list("following_id", flat=True))
+    author_ids.append(user.id)
+
+    recent_posts = StatusPost.objects.filter(author_id__in=author_ids).order_by(
+        "-created_at", "-id"
+    )[:TIMELINE_MAX_LENGTH]
+    entries = [
+        TimelineEntry(owner_id=user.id, post_id=post_id, created_at=created_at)
+        for post_id, created_at in recent_posts.values_list("id", "created_at")
+    ]
+
+    TimelineEntry.objects.filter(owner_id=user.id).delete()
+    TimelineEntry.objects.bulk_create(entries, batch_size=FANOUT_BATCH_SIZE)
+    return len(entries)
+
+
+def visible_post_filter(user):
+    """
+    The feed privacy rule as a Q object.
+
+    A post is visible if it has no group, its group is public, or the user is
+    a member of its (private) group. Membership is checked with a subquery
+    rather than a join so the result needs no DISTINCT.
+    """
+    return (
+        Q(group__isnull=True)
+        | Q(group__privacy_level="public")
+        | Q(group_id__in=Group.objects.filter(members=user).values("id"))
+    )
+
+
+def get_timeline_queryset(user):
+    """
+    Returns the user's visible timeline posts, newest first.
+    """
+    return (
+        StatusPost.objects.filter(timeline_entries__owner=user)
+        .filter(visible_post_filter(user))
+        .order_by("-created_at", "-id")
+    )
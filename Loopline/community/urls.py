@@ -71,6 +71,11 @@ urlpatterns = [
         name="user-accept-request",
     ),
     path("search/users/", views.UserSearchAPIView.as_view(), name="user-search"),
+    path(
+        "search/users/autocomplete/",
+        views.UserAutocompleteAPIView.as_view(),
+        name="user-autocomplete",
+    ),
     path(
         "search/content/", views.ContentSearchAPIView.as_view(), name="content-search"
     ),
@@ -79,6 +84,11 @@ urlpatterns = [
         views.StatusPostListCreateView.as_view(),
         name="statuspost-list-create",
     ),
+    path(
+        "posts/batch/",
+        views.StatusPostBatchView.as_view(),
+        name="statuspost-batch",
+    ),
     path(
         "posts/<int:pk>/",
         views.StatusPostRetrieveUpdateDestroyView.as_view(),
@@ -190,6 +200,21 @@ urlpatterns = [
     ),
     path("posts/saved/", views.SavedPostListView.as_view(), name="saved-post-list"),
     path("health-check/", views.health_check_view, name="health-check"),
+    path(
+        "metrics/post-cache/",
+        views.post_cache_stats_view,
+        name="post-cache-stats",
+    ),
+    path(
+        "metrics/realtime/",
+        views.realtime_metrics_view,
+        name="realtime-metrics",
+    ),
+    path(
+        "metrics/realtime-dispatch/",
+        views.realtime_dispatch_stats_view,
+        name="realtime-dispatch-stats",
+    ),
 ]
 
 urlpatterns += router.urls
@@ -3,10 +3,21 @@
 import re
 from django.contrib.auth import get_user_model
 from django.contrib.contenttypes.models import ContentType
-from .models import Notification, Comment
+from .models import Notification, Comment, StatusPost
+from .notifications import announce_bulk_created
 
 User = get_user_model()
 
+# "@name" followed by Django's username characters; a trailing "." or "-"
+# is punctuation ("thanks @ann."), not part of the name.
+MENTION_PATTERN = re.compile(r"@([\w.+-]*\w)")
+
+
+def parse_mentions(content_text):
+    """Returns the set of usernames mentioned in `content_text`."""
+    return set(MENTION_PATTERN.findall(content_text or ""))
+
+
 def process_mentions(actor, target_object, content_text):
     """
     Parses content text for @mentions and creates notifications.
@@ -14,46 +25,71 @@ def process_mentions(actor, target_object, content_text):
     - actor: The user who wrote the content (the one doing the mentioning).
     - target_object: The instance of the post or comment where the mention occurred.
     - content_text: The raw text of the post/comment to be parsed.
-    """
-    if not content_text:
-        return
-
-    # Regex to find all words prefixed with @
-    # Using a set ensures we only process each unique username once.
-    mentioned_usernames = set(re.findall(r'@([\w.-]+)', content_text))
 
+    This is the only mention pipeline: it runs from the post_save signal for
+    new posts/comments and from StatusPostSerializer.update for edits. All
+    mentioned users are resolved in one query, users who were already
+    notified about `target_object` are skipped with one more, and the rest
+    get their notifications in one bulk_create and one batched realtime
+    dispatch. Returns the created notifications.
+    """
+    mentioned_usernames = parse_mentions(content_text)
     if not mentioned_usernames:
-        return
+        return []
 
-    # Find all valid User objects that match the mentioned usernames.
     # Exclude the actor so users don't get notifications for mentioning themselves.
-    mentioned_users = User.objects.filter(username__in=mentioned_usernames).exclude(pk=actor.pk)
-
-    notifications_to_create = []
-    
-    for user_to_notify in mentioned_users:
-        # Determine the parent object author to avoid redundant notifications.
-        # e.g., Don't notify if you're mentioned in a reply to your own post.
-        parent_author = None
-        if isinstance(target_object, Comment) and target_object.content_object:
-            # If the mention is in a comment, the parent is the post/comment being replied to.
-            parent_author = getattr(target_object.content_object, 'author', None)
-        
-        # If the user being notified is the author of the parent content, skip.
-        # They will already get a "comment" or "reply" notification.
-        if user_to_notify == parent_author:
-            continue
-
-        notification = Notification(
+    excluded_ids = {actor.pk}
+
+    # A mention in a comment points at the post, so the user gets context.
+    if isinstance(target_object, Comment):
+        verb = "mentioned you in a reply" if target_object.parent_id else "mentioned you in a comment"
+        target = target_object.content_object
+        # The user who gets the reply/comment notification (the parent
+        # comment's author, or the post author for a top-level comment) is
+        # not also notified about the mention.
+        if target_object.parent_id:
+            recipient_id = target_object.parent.author_id
+        else:
+            recipient_id = getattr(target, "author_id", None)
+        if recipient_id is not None:
+            excluded_ids.add(recipient_id)
+    else:
+        verb = "mentioned you in a post" if isinstance(target_object, StatusPost) else (
+            f"mentioned you in a {target_object.__class__.__name__.lower()}"
+        )
+        target = target_object
+
+    mentioned_users = list(
+        User.objects.filter(username__in=mentioned_usernames).exclude(pk__in=excluded_ids)
+    )
+    if not mentioned_users:
+        return []
+
+    action_object_content_type = ContentType.objects.get_for_model(target_object)
+    already_notified = set(
+        Notification.objects.filter(
+            recipient__in=mentioned_users,
+            actor=actor,
+            action_object_content_type=action_object_content_type,
+            action_object_object_id=target_object.pk,
+        ).values_list("recipient_id", flat=True)
+    )
+
+    notifications_to_create = [
+        Notification(
             recipient=user_to_notify,
             actor=actor,
-            verb=f"mentioned you in a {target_object.__class__.__name__.lower()}",
+            verb=verb,
             notification_type=Notification.MENTION,
-            target=target_object
+            target=target,
+            action_object=target_object,
         )
-        notifications_to_create.append(notification)
+        for user_to_notify in mentioned_users
+        if user_to_notify.pk not in already_notified
+    ]
+    if not notifications_to_create:
+        return []
 
-    if notifications_to_create:
-        # bulk_create is efficient. ignore_conflicts prevents errors if a similar notification
-        # was somehow created in the same transaction.
-        Notification.objects.bulk_create(notifications_to_create, ignore_conflicts=True)
\ No newline at end of file
+    created = Notification.objects.bulk_create(notifications_to_create)
+    announce_bulk_created(created)
+    return created
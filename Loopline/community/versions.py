@@ -0,0 +1,76 @@
+# community/versions.py
+"""
+Cheap, cache-backed version counters.
+
+Signals bump a counter whenever something that affects a response changes
+(a post's likes, a profile's skills, a group's members, a user's follow
+graph...). Views fold these counters into ETags so they can answer
+304 Not Modified without serializing anything.
+
+Counters start from the current time in nanoseconds rather than from zero,
+so a counter that was evicted from the cache never comes back with a value
+a client has already seen. That also lets counters expire: each
+one is dropped VERSION_TTL seconds after it was created and recreated on
+next use, which only costs clients one full response.
+
+Bumps happen at once and again when the transaction commits: a request that
+read the pre-commit rows under the first bump caches them under a version
+the second bump retires.
+"""
+
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+KEY_PREFIX = "version"
+VERSION_TTL = getattr(settings, "VERSION_CACHE_TTL", 7 * 24 * 60 * 60)
+
+# Scopes in use. Each is paired with the primary key it is keyed by.
+POST = "post"  # StatusPost.pk
+PROFILE = "profile"  # User.pk of the profile owner
+GROUP = "group"  # Group.pk
+FOLLOW_GRAPH = "follow-graph"  # User.pk of the follower
+MEMBERSHIPS = "memberships"  # User.pk of the group member
+
+
+def _key(scope, pk):
+    return f"{KEY_PREFIX}:{scope}:{pk}"
+
+
+def get_versions(scope, pks):
+    """
+    Returns {pk: version} for every pk, creating missing counters.
+    """
+    keys = {pk: _key(scope, pk) for pk in pks}
+    found = cache.get_many(list(keys.values()))
+
+    versions = {}
+    for pk, key in keys.items():
+        if key not in found:
+            cache.add(key, time.time_ns(), timeout=VERSION_TTL)
+            found[key] = cache.get(key)
+        versions[pk] = found[key]
+    return versions
+
+
+def get_version(scope, pk):
+    return get_versions(scope, [pk])[pk]
+
+
+def _bump(scope, pks):
+    for pk in pks:
+        key = _key(scope, pk)
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.add(key, time.time_ns(), timeout=VERSION_TTL)
+
+
+def bump_versions(scope, pks):
+    pks = {pk for pk in pks if pk is not None}
+    if not pks:
+        return
+    _bump(scope, pks)
+    transaction.on_commit(lambda: _bump(scope, pks))
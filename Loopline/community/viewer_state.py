@@ -0,0 +1,110 @@
+# community/viewer_state.py
+"""
+Page-level resolvers for the viewer-specific fields of StatusPostSerializer
+and GroupSerializer.
+
+Serializing a list of posts one by one costs several queries per post
+(is_liked_by_user, is_saved, poll tallies, user_vote). This module fetches
+each of those facts for a whole page in ONE query per kind and returns them
+as serializer context. StatusPostSerializer and
+PollSerializer read from that context when it is present and fall back to
+their per-object queries otherwise (e.g. for single-post responses).
+
+resolve_group_viewer_state() does the same for GroupSerializer's
+membership_status on group lists.
+"""
+
+from django.contrib.contenttypes.models import ContentType
+from django.db.models import Count
+
+from .models import Group, GroupBlock, GroupJoinRequest, Like, PollVote, StatusPost, UserProfile
+
+
+def resolve_post_viewer_state(posts, user):
+    """
+    Returns a dict of serializer-context entries for the given posts.
+
+    Keys:
+    - liked_post_ids:    set of post IDs the user has liked
+    - saved_post_ids:    set of post IDs the user has saved
+    - poll_vote_counts:  {option_id: number of votes}
+    - viewer_poll_votes: {poll_id: option_id the user voted for}
+    """
+    post_ids = [post.pk for post in posts]
+    poll_ids = [post.poll.pk for post in posts if hasattr(post, "poll")]
+    post_content_type = ContentType.objects.get_for_model(StatusPost)
+
+    state = {
+        "liked_post_ids": set(),
+        "saved_post_ids": set(),
+        "poll_vote_counts": {},
+        "viewer_poll_votes": {},
+    }
+    if not post_ids:
+        return state
+
+    if poll_ids:
+        state["poll_vote_counts"] = dict(
+            PollVote.objects.filter(poll_id__in=poll_ids)
+            .values("option_id")
+            .annotate(count=Count("id"))
+            .values_list("option_id", "count")
+        )
+
+    if user is None or not user.is_authenticated:
+        return state
+
+    state["liked_post_ids"] = set(
+        Like.objects.filter(
+            user=user, content_type=post_content_type, object_id__in=post_ids
+        ).values_list("object_id", flat=True)
+    )
+    state["saved_post_ids"] = set(
+        UserProfile.saved_posts.through.objects.filter(
+            userprofile_id=user.pk, statuspost_id__in=post_ids
+        ).values_list("statuspost_id", flat=True)
+    )
+    if poll_ids:
+        state["viewer_poll_votes"] = dict(
+            PollVote.objects.filter(user=user, poll_id__in=poll_ids).values_list(
+                "poll_id", "option_id"
+            )
+        )
+
+    return state
+
+
+def resolve_group_viewer_state(groups, user):
+    """
+    Returns a dict of serializer-context entries for the given groups.
+
+    Keys:
+    - blocked_group_ids: set of group IDs the user is blocked from
+    - member_group_ids:  set of group IDs the user is a member of
+    - pending_group_ids: set of group IDs the user has a pending join request for
+    """
+    group_ids = [group.pk for group in groups]
+    state = {
+        "blocked_group_ids": set(),
+        "member_group_ids": set(),
+        "pending_group_ids": set(),
+    }
+    if not group_ids or user is None or not user.is_authenticated:
+        return state
+
+    state["blocked_group_ids"] = set(
+        GroupBlock.objects.filter(user=user, group_id__in=group_ids).values_list(
+            "group_id", flat=True
+        )
+    )
+    state["member_group_ids"] = set(
+        Group.members.through.objects.filter(
+            user_id=user.pk, group_id__in=group_ids
+        ).values_list("group_id", flat=True)
+    )
+    state["pending_group_ids"] = set(
+        GroupJoinRequest.objects.filter(
+            user=user, group_id__in=group_ids, status="pending"
+        ).values_list("group_id", flat=True)
+    )
+    return state
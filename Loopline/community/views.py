@@ -1,15 +1,21 @@
 # community/views.py
+import base64
+import binascii
+import hashlib
+
 from allauth.account.views import ConfirmEmailView
-from django.db.models import Q, Count
+from django.db.models import Count, Max, Q
 from django.conf import settings
 from django.contrib.auth import get_user_model
 from django.contrib.auth import logout as django_logout
 from django.shortcuts import get_object_or_404, redirect
 from django.contrib.contenttypes.models import ContentType
-from django.http import Http404
-from django.db.models import Q, Count, Value, CharField, Case, When
+from django.http import Http404, HttpResponse
 from django.db import transaction
 from django.utils import timezone
+from django.utils.cache import patch_vary_headers
+from django.utils.dateparse import parse_datetime
+from django.utils.http import http_date, parse_etags, quote_etag
 
 from channels.layers import get_channel_layer
 from asgiref.sync import async_to_sync
@@ -32,10 +38,12 @@ from rest_framework.response import Response
 
 from rest_framework.views import APIView
 from rest_framework.pagination import (
+    BasePagination,
     PageNumberPagination,
     CursorPagination,
 )  # NEW: Import CursorPagination
-from rest_framework.filters import SearchFilter
+from rest_framework.exceptions import NotFound
+from rest_framework.utils.urls import remove_query_param, replace_query_param
 from rest_framework.authentication import TokenAuthentication
 from rest_framework.decorators import api_view, permission_classes, action
 
@@ -70,6 +78,7 @@ from .serializers import (
     UserProfileUpdateSerializer,
     StatusPostSerializer,
     GroupSerializer,
+    GroupListSerializer,
     GroupJoinRequestSerializer,
     CommentSerializer,
     ConversationSerializer,
@@ -84,6 +93,22 @@ from .serializers import (
     EducationSerializer,
     ExperienceSerializer,
 )
+from .timeline import get_timeline_queryset, visible_post_filter
+from .viewer_state import resolve_group_viewer_state, resolve_post_viewer_state
+from .autocomplete import complete_users
+from .search import GroupSearchFilter, PostFullTextSearchFilter, headlines_for
+from . import search_cache
+from .post_cache import get_fragment_cache_stats
+from .realtime import get_dispatch_stats
+from .notifications import (
+    get_unread_count,
+    mark_as_read,
+    resolve_latest_actors,
+    with_related_objects,
+)
+from . import instrumentation
+from . import versions
+from .versions import get_version
 from .permissions import (
     IsOwnerOrReadOnly,
     IsGroupMember,
@@ -106,6 +131,79 @@ class StandardResultsSetPagination(PageNumberPagination):
     max_page_size = 50
 
 
+class NoCountPageNumberPagination(StandardResultsSetPagination):
+    """
+    Page-number pagination without COUNT(*): one extra row is fetched to
+    tell whether a next page exists. Responses have no "count".
+    """
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        page_size = self.get_page_size(request)
+        try:
+            self.page_number = int(request.query_params.get(self.page_query_param, 1))
+        except ValueError:
+            self.page_number = 0
+        if self.page_number < 1:
+            raise NotFound(self.invalid_page_message)
+
+        rows, self.has_next = self.get_page(queryset, page_size, view)
+        return rows
+
+    def get_page(self, queryset, page_size, view):
+        """Returns (rows of the current page, whether a next page exists)."""
+        offset = (self.page_number - 1) * page_size
+        rows = list(queryset[offset : offset + page_size + 1])
+        return rows[:page_size], len(rows) > page_size
+
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+        return replace_query_param(
+            self.request.build_absolute_uri(), self.page_query_param, self.page_number + 1
+        )
+
+    def get_previous_link(self):
+        if self.page_number <= 1:
+            return None
+        url = self.request.build_absolute_uri()
+        if self.page_number == 2:
+            return remove_query_param(url, self.page_query_param)
+        return replace_query_param(url, self.page_query_param, self.page_number - 1)
+
+    def get_paginated_response(self, data):
+        return Response(
+            {
+                "next": self.get_next_link(),
+                "previous": self.get_previous_link(),
+                "results": data,
+            }
+        )
+
+    def get_paginated_response_schema(self, schema):
+        response_schema = super().get_paginated_response_schema(schema)
+        response_schema["properties"].pop("count", None)
+        response_schema["required"] = ["results"]
+        return response_schema
+
+
+class CachedSearchPagination(NoCountPageNumberPagination):
+    """
+    NoCountPageNumberPagination for the search endpoints. The page's result
+    IDs come from the shared cache in community/search_cache.py (views set
+    search_kind and get_search_text()); the rows are then loaded from the
+    view's queryset, which carries the viewer's privacy rule, so a page may
+    hold fewer than page_size rows.
+    """
+
+    def get_page(self, queryset, page_size, view):
+        ids, has_next = search_cache.get_page_ids(
+            view.search_kind, view.get_search_text(), self.page_number, page_size
+        )
+        rows = queryset.in_bulk(ids) if ids else {}
+        return [rows[pk] for pk in ids if pk in rows], has_next
+
+
 # NEW: CursorPagination for dynamic feeds (Main Feed, Group Feeds)
 class PostCursorPagination(CursorPagination):
     page_size = 10
@@ -116,14 +214,243 @@ class PostCursorPagination(CursorPagination):
     page_size_query_param = "page_size"  # Allow client to specify page size
 
 
+class NotificationKeysetPagination(BasePagination):
+    """
+    Keyset pagination on (timestamp, id), newest first, for the notification
+    inbox. A page is one indexed range scan of page_size + 1 rows: no
+    COUNT(*) and no OFFSET, so deep pages cost the same as the first.
+
+    ?cursor=<token>  rows older than the token (the "next" link).
+    ?since=<token>   rows newer than the token, for cheap polling. Up to
+                     page_size rows are returned, oldest-new first, so
+                     repeating the poll with the returned "since" catches
+                     up without gaps. Aggregated notifications move their
+                     timestamp forward and so come back here when they grow.
+
+    Every response carries "since", the token of the newest row the client
+    has seen, to use for the next poll.
+    """
+
+    page_size = 10
+    page_size_query_param = "page_size"
+    max_page_size = 50
+    invalid_cursor_message = "Invalid cursor"
+
+    def encode_cursor(self, item):
+        raw = f"{item.timestamp.isoformat()}|{item.pk}"
+        return base64.urlsafe_b64encode(raw.encode()).decode()
+
+    def decode_cursor(self, token):
+        try:
+            timestamp, pk = base64.urlsafe_b64decode(token.encode()).decode().split("|")
+            position = parse_datetime(timestamp), int(pk)
+        except (binascii.Error, UnicodeDecodeError, ValueError):
+            raise NotFound(self.invalid_cursor_message)
+        if position[0] is None:
+            raise NotFound(self.invalid_cursor_message)
+        return position
+
+    def get_page_size(self, request):
+        try:
+            size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        return min(max(size, 1), self.max_page_size)
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.page_size_for_request = self.get_page_size(request)
+        since = request.query_params.get("since")
+        cursor = request.query_params.get("cursor")
+        self.since_mode = since is not None
+
+        if self.since_mode:
+            timestamp, pk = self.decode_cursor(since)
+            queryset = queryset.filter(
+                Q(timestamp__gt=timestamp) | Q(timestamp=timestamp, pk__gt=pk)
+            ).order_by("timestamp", "id")
+        else:
+            queryset = queryset.order_by("-timestamp", "-id")
+            if cursor is not None:
+                timestamp, pk = self.decode_cursor(cursor)
+                queryset = queryset.filter(
+                    Q(timestamp__lt=timestamp) | Q(timestamp=timestamp, pk__lt=pk)
+                )
+
+        rows = list(queryset[: self.page_size_for_request + 1])
+        self.has_more = len(rows) > self.page_size_for_request
+        self.page = rows[: self.page_size_for_request]
+        if self.since_mode:
+            newest = self.page[-1] if self.page else None
+            self.since = self.encode_cursor(newest) if newest else since
+            self.page.reverse()
+        else:
+            self.since = self.encode_cursor(self.page[0]) if self.page and cursor is None else None
+        return self.page
+
+    def get_next_link(self):
+        if not self.has_more:
+            return None
+        url = self.request.build_absolute_uri()
+        if self.since_mode:
+            return replace_query_param(url, "since", self.since)
+        return replace_query_param(url, "cursor", self.encode_cursor(self.page[-1]))
+
+    def get_paginated_response(self, data):
+        return Response(
+            {
+                "next": self.get_next_link(),
+                "previous": None,
+                "since": self.since,
+                "results": data,
+            }
+        )
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            "type": "object",
+            "required": ["results"],
+            "properties": {
+                "next": {"type": "string", "nullable": True, "format": "uri"},
+                "previous": {"type": "string", "nullable": True, "format": "uri"},
+                "since": {"type": "string", "nullable": True},
+                "results": schema,
+            },
+        }
+
+
+# ==================================
+# Shared View Mixins
+# ==================================
+class PostViewerStateMixin:
+    """
+    For list views of StatusPosts: resolves the viewer-specific fields
+    (likes, saves, comment counts, poll tallies and votes) for the whole page
+    in one query per kind and hands them to the serializer via its context.
+    """
+
+    def get_serializer(self, *args, **kwargs):
+        if kwargs.get("many") and args:
+            posts = list(args[0])
+            context = kwargs.setdefault("context", self.get_serializer_context())
+            context.update(resolve_post_viewer_state(posts, self.request.user))
+            args = (posts, *args[1:])
+        return super().get_serializer(*args, **kwargs)
+
+
+class SearchHeadlineMixin:
+    """
+    For full-text searches over StatusPosts: adds a highlighted
+    "search_headline" to each post of the page. Headlines are computed for
+    the page only (see search.headlines_for), never for the whole match set.
+    """
+
+    search_text_param = "q"
+
+    def get_search_text(self):
+        return self.request.query_params.get(self.search_text_param, "").strip()
+
+    def get_serializer(self, *args, **kwargs):
+        if kwargs.get("many") and args:
+            self.page_posts = list(args[0])
+            args = (self.page_posts, *args[1:])
+        return super().get_serializer(*args, **kwargs)
+
+    def list(self, request, *args, **kwargs):
+        response = super().list(request, *args, **kwargs)
+        text = self.get_search_text()
+        if text and isinstance(response.data, dict):
+            headlines = headlines_for(getattr(self, "page_posts", []), text)
+            for item in response.data.get("results", []):
+                item["search_headline"] = headlines.get(item["id"])
+        return response
+
+
+class ConditionalGetMixin:
+    """
+    Answers GET requests with 304 Not Modified when the client's
+    If-None-Match still matches. Views provide get_version_token(), a cheap
+    tuple that changes whenever the response could change (built from the
+    counters in community/versions.py), so a match costs no serialization.
+
+    The ETag also covers the viewer and the full URL because responses carry
+    viewer-specific fields and may be paginated. Last-Modified is sent for
+    information only: likes and saves change responses without touching
+    updated_at, so revalidation relies on the ETag.
+    """
+
+    def get_version_token(self):
+        """Return a tuple identifying the current response, or None to skip."""
+        return None
+
+    def get_last_modified(self):
+        return None
+
+    def get_object(self):
+        # Memoized so computing the token and serializing share one lookup.
+        if not hasattr(self, "_conditional_object"):
+            self._conditional_object = super().get_object()
+        return self._conditional_object
+
+    def check_conditional_permissions(self):
+        """
+        Runs, before a 304 is sent, the object permission checks a full
+        response would run. Detail views check get_object(); list views
+        rely on their view-level permissions.
+        """
+        lookup_url_kwarg = getattr(self, "lookup_url_kwarg", None) or getattr(self, "lookup_field", None)
+        if lookup_url_kwarg in self.kwargs:
+            self.get_object()
+
+    def get_etag(self, request):
+        token = self.get_version_token()
+        if token is None:
+            return None
+        raw = repr((request.user.pk, request.get_full_path(), *token))
+        return quote_etag(hashlib.sha1(raw.encode()).hexdigest())
+
+    def get(self, request, *args, **kwargs):
+        etag = self.get_etag(request)
+        if etag is None:
+            return super().get(request, *args, **kwargs)
+
+        client_etags = [
+            value.removeprefix("W/")
+            for value in parse_etags(request.META.get("HTTP_IF_NONE_MATCH", ""))
+        ]
+        if etag in client_etags or "*" in client_etags:
+            # A matching ETag (or "*") is only honored for a viewer who may
+            # see the object; otherwise this raises 403/404.
+            self.check_conditional_permissions()
+            response = Response(status=status.HTTP_304_NOT_MODIFIED)
+        else:
+            response = super().get(request, *args, **kwargs)
+            last_modified = self.get_last_modified()
+            if last_modified and response.status_code == status.HTTP_200_OK:
+                response["Last-Modified"] = http_date(last_modified.timestamp())
+
+        if response.status_code in (status.HTTP_200_OK, status.HTTP_304_NOT_MODIFIED):
+            response["ETag"] = etag
+            response["Cache-Control"] = "private, no-cache"
+            patch_vary_headers(response, ["Authorization"])
+        return response
+
+
 # ==================================
 # User Profile & Follower Views
 # ==================================
-class UserProfileDetailView(generics.RetrieveUpdateAPIView):
+class UserProfileDetailView(ConditionalGetMixin, generics.RetrieveUpdateAPIView):
     queryset = UserProfile.objects.select_related("user").all()
     lookup_field = "user__username"
     lookup_url_kwarg = "username"
 
+    def get_version_token(self):
+        profile = self.get_object()
+        return (profile.updated_at, get_version(versions.PROFILE, profile.user_id))
+
+    def get_last_modified(self):
+        return self.get_object().updated_at
+
     def get_serializer_class(self):
         return (
             UserProfileUpdateSerializer
@@ -237,7 +564,7 @@ class SkillViewSet(BaseProfileSectionViewSet):
     serializer_class = SkillSerializer
 
 
-class UserPostListView(generics.ListAPIView):
+class UserPostListView(PostViewerStateMixin, generics.ListAPIView):
     serializer_class = StatusPostSerializer
     permission_classes = [AllowAny]
     pagination_class = PageNumberPagination  # KEEP: Offset pagination is fine for a user's own post list
@@ -247,7 +574,7 @@ class UserPostListView(generics.ListAPIView):
         return (
             StatusPost.objects.filter(author=user)
             .select_related("author__profile")
-            .prefetch_related("likes", "media", "poll__options", "poll__votes")
+            .prefetch_related("media", "poll__options")
             .order_by("-created_at")
         )
 
@@ -556,53 +883,64 @@ class AcceptConnectionRequestView(APIView):
 class UserSearchAPIView(generics.ListAPIView):
     serializer_class = UserSerializer
     permission_classes = [IsAuthenticated]
-    pagination_class = (
-        StandardResultsSetPagination  # KEEP: Offset pagination for search results
-    )
+    # Result IDs come from the shared search cache; see search_cache.py.
+    pagination_class = CachedSearchPagination
+    search_kind = search_cache.PEOPLE
+
+    def get_search_text(self):
+        return self.request.query_params.get("q", "").strip()
 
     def get_queryset(self):
-        query = self.request.query_params.get("q", None)
-        if not query or not query.strip():
-            return User.objects.none()
-
-        search_filter = (
-            Q(username__icontains=query)
-            | Q(first_name__icontains=query)
-            | Q(last_name__icontains=query)
-        )
+        # The pagination picks the page's users from this queryset by ID
+        # (trigram matches on UserProfile.search_document, see search.py).
+        return User.objects.select_related("profile")
 
-        queryset = (
-            User.objects.filter(search_filter)
-            .annotate(
-                priority=Case(When(username__istartswith=query, then=1), default=2)
-            )
-            .distinct()
-        )
 
-        return queryset.order_by("priority", "username")
+class UserAutocompleteAPIView(APIView):
+    """
+    Prefix completion for @mentions and the search box, served from the
+    in-process index in community/autocomplete.py. The caller's follows and
+    connections come first.
+    """
+
+    permission_classes = [IsAuthenticated]
+    max_limit = 20
+
+    def get(self, request, format=None):
+        query = request.query_params.get("q", "").lstrip("@")
+        try:
+            limit = min(max(int(request.query_params.get("limit", 10)), 1), self.max_limit)
+        except ValueError:
+            limit = 10
+
+        picture_storage = UserProfile._meta.get_field("picture").storage
+        results = []
+        for user_id, entry in complete_users(request.user, query, limit=limit):
+            picture = entry.pop("picture")
+            entry["id"] = user_id
+            entry["picture"] = (
+                request.build_absolute_uri(picture_storage.url(picture)) if picture else None
+            )
+            results.append(entry)
+        return Response({"results": results})
 
 
-class ContentSearchAPIView(generics.ListAPIView):
+class ContentSearchAPIView(SearchHeadlineMixin, PostViewerStateMixin, generics.ListAPIView):
     serializer_class = StatusPostSerializer
     permission_classes = [IsAuthenticated]
-    pagination_class = (
-        StandardResultsSetPagination  # KEEP: Offset pagination for search results
-    )
+    # Ranked full-text matches come from the shared search cache as IDs;
+    # see search_cache.py.
+    pagination_class = CachedSearchPagination
+    search_kind = search_cache.POSTS
 
     def get_queryset(self):
-        query = self.request.query_params.get("q", None)
-        if not query or not query.strip():
-            return StatusPost.objects.none()
-
-        queryset = (
-            StatusPost.objects.filter(content__icontains=query)
-            .select_related("author__profile")
-            .prefetch_related("media", "likes", "poll__options", "poll__votes")
-            .order_by("-created_at")
+        # The feed's privacy rule is applied here, after the cached IDs.
+        return (
+            StatusPost.objects.select_related("author__profile")
+            .prefetch_related("media", "poll__options")
+            .filter(visible_post_filter(self.request.user))
         )
 
-        return queryset
-
     def get_serializer_context(self):
         return {"request": self.request}
 
@@ -610,16 +948,17 @@ class ContentSearchAPIView(generics.ListAPIView):
 # ==================================
 # Status Post Views
 # ==================================
-class StatusPostListCreateView(generics.ListCreateAPIView):
+class StatusPostListCreateView(SearchHeadlineMixin, generics.ListCreateAPIView):
     queryset = (
         StatusPost.objects.select_related("author__profile", "group__creator")
-        .prefetch_related("likes", "media", "poll__options", "poll__votes")
+        .prefetch_related("media", "poll__options")
         .order_by("-created_at")
     )
     serializer_class = StatusPostSerializer
     pagination_class = PageNumberPagination  # KEEP: This view handles both list (paginated) and create (not paginated)
-    filter_backends = [SearchFilter]
-    search_fields = ["content", "author__username"]
+    # ?search= runs a full-text search (content and author username).
+    filter_backends = [PostFullTextSearchFilter]
+    search_text_param = "search"
 
     def get_permissions(self):
         if self.request.method == "POST":
@@ -639,16 +978,79 @@ class StatusPostListCreateView(generics.ListCreateAPIView):
         return {"request": self.request}
 
 
-class StatusPostRetrieveUpdateDestroyView(generics.RetrieveUpdateDestroyAPIView):
+class StatusPostRetrieveUpdateDestroyView(ConditionalGetMixin, generics.RetrieveUpdateDestroyAPIView):
     queryset = (
         StatusPost.objects.select_related("author__profile")
-        .prefetch_related("likes", "media", "poll__options", "poll__votes")
+        .prefetch_related("media", "poll__options")
         .all()
     )
     serializer_class = StatusPostSerializer
     permission_classes = [IsAuthenticatedOrReadOnly, IsOwnerOrReadOnly]
     lookup_field = "pk"
 
+    def get_version_token(self):
+        post = self.get_object()
+        # The author's name and picture are part of the response.
+        return (
+            post.updated_at,
+            get_version(versions.POST, post.pk),
+            get_version(versions.PROFILE, post.author_id),
+        )
+
+    def get_last_modified(self):
+        return self.get_object().updated_at
+
+    def get_serializer_context(self):
+        return {"request": self.request}
+
+
+class StatusPostBatchView(PostViewerStateMixin, generics.ListAPIView):
+    """
+    Returns many posts in one round trip, e.g. to hydrate the IDs pushed by
+    live 'new_post' events: GET /api/posts/batch/?ids=12,9,7
+
+    Posts that do not exist or that the user may not see (private groups)
+    are left out; the rest keep the order of the requested IDs.
+    """
+
+    serializer_class = StatusPostSerializer
+    permission_classes = [IsAuthenticated]
+    pagination_class = None
+    max_ids = 50
+
+    def get_requested_ids(self):
+        raw_ids = self.request.query_params.get("ids", "")
+        try:
+            ids = [int(value) for value in raw_ids.split(",") if value.strip()]
+        except ValueError:
+            raise serializers.ValidationError(
+                {"ids": "Must be a comma-separated list of post IDs."}
+            )
+        if not ids:
+            raise serializers.ValidationError({"ids": "At least one post ID is required."})
+        if len(ids) > self.max_ids:
+            raise serializers.ValidationError(
+                {"ids": f"At most {self.max_ids} post IDs can be requested at once."}
+            )
+        # Drop duplicates but keep the first-seen order.
+        return list(dict.fromkeys(ids))
+
+    def get_queryset(self):
+        return (
+            StatusPost.objects.filter(visible_post_filter(self.request.user))
+            .select_related("author__profile", "group")
+            .prefetch_related("media", "poll__options")
+        )
+
+    def list(self, request, *args, **kwargs):
+        requested_ids = self.get_requested_ids()
+        posts_by_id = {
+            post.id: post for post in self.get_queryset().filter(id__in=requested_ids)
+        }
+        posts = [posts_by_id[post_id] for post_id in requested_ids if post_id in posts_by_id]
+        serializer = self.get_serializer(posts, many=True)
+        return Response(serializer.data)
+
     def get_serializer_context(self):
         return {"request": self.request}
 
@@ -679,8 +1081,15 @@ class LikeToggleAPIView(APIView):
         # The 'else' block is now empty. A Django signal is responsible for creating
         # the notification and sending the real-time message. This prevents duplicates.
 
+        # Signals keep the denormalized counter current; re-read it after the toggle.
+        if hasattr(target_object, "like_count"):
+            target_object.refresh_from_db(fields=["like_count"])
+            like_count = target_object.like_count
+        else:
+            like_count = target_object.likes.count()
+
         return Response(
-            {"liked": created, "like_count": target_object.likes.count()},
+            {"liked": created, "like_count": like_count},
             status=status.HTTP_200_OK,
         )
 
@@ -753,15 +1162,25 @@ class GroupListView(generics.ListCreateAPIView):
         StandardResultsSetPagination  # KEEP: Offset pagination for group discovery
     )
 
-    filter_backends = [SearchFilter]
-    search_fields = ["name", "description", "slug"]
+    # ?search= runs an indexed search ranked by relevance and member_count.
+    filter_backends = [GroupSearchFilter]
 
     def get_queryset(self):
-        return (
-            Group.objects.select_related("creator__profile")
-            .prefetch_related("members")
-            .all()
-        )
+        # member_count is a column, so the members are never loaded here.
+        return Group.objects.select_related("creator__profile").all()
+
+    def get_serializer_class(self):
+        if self.request.method == "GET":
+            return GroupListSerializer
+        return GroupSerializer
+
+    def get_serializer(self, *args, **kwargs):
+        if kwargs.get("many") and args:
+            groups = list(args[0])
+            context = kwargs.setdefault("context", self.get_serializer_context())
+            context.update(resolve_group_viewer_state(groups, self.request.user))
+            args = (groups, *args[1:])
+        return super().get_serializer(*args, **kwargs)
 
     def get_serializer_context(self):
         """
@@ -773,9 +1192,11 @@ class GroupListView(generics.ListCreateAPIView):
     def perform_create(self, serializer):
         group = serializer.save(creator=self.request.user)
         group.members.add(self.request.user)
+        # The membership signal updated member_count in the database only.
+        group.refresh_from_db(fields=["member_count"])
 
 
-class GroupRetrieveAPIView(generics.RetrieveUpdateDestroyAPIView):
+class GroupRetrieveAPIView(ConditionalGetMixin, generics.RetrieveUpdateDestroyAPIView):
     queryset = Group.objects.prefetch_related(
         "members__profile", "creator__profile"
     ).all()
@@ -783,6 +1204,24 @@ class GroupRetrieveAPIView(generics.RetrieveUpdateDestroyAPIView):
     permission_classes = [IsGroupMemberOrPublicReadOnly]  # <-- THIS IS THE FIX
     lookup_field = "slug"
 
+    def get_plain_group(self):
+        # A plain lookup, so a 304 does not pay for the member prefetch above.
+        if not hasattr(self, "_plain_group"):
+            self._plain_group = Group.objects.filter(slug=self.kwargs["slug"]).first()
+        return self._plain_group
+
+    def get_version_token(self):
+        group = self.get_plain_group()
+        if group is None:
+            return None
+        return (get_version(versions.GROUP, group.pk),)
+
+    def check_conditional_permissions(self):
+        group = self.get_plain_group()
+        if group is None:
+            raise Http404
+        self.check_object_permissions(self.request, group)
+
 
 # PASTE THIS ENTIRE CLASS TO REPLACE THE OLD ONE
 
@@ -889,7 +1328,7 @@ class GroupMembershipView(APIView):
         return Response({"status": "member removed"}, status=status.HTTP_204_NO_CONTENT)
 
 
-class GroupPostListView(generics.ListAPIView):
+class GroupPostListView(PostViewerStateMixin, generics.ListAPIView):
     serializer_class = StatusPostSerializer
     permission_classes = [AllowAny]
     pagination_class = PostCursorPagination  # NEW: Use cursor pagination here
@@ -902,7 +1341,7 @@ class GroupPostListView(generics.ListAPIView):
         return (
             StatusPost.objects.filter(group__slug=group_slug)
             .select_related("author__profile", "group")
-            .prefetch_related("media", "likes", "poll__options", "poll__votes")
+            .prefetch_related("media", "poll__options")
             .order_by("-created_at")
         )  # IMPORTANT: Must match cursor pagination ordering
 
@@ -964,39 +1403,36 @@ class CommentRetrieveUpdateDestroyAPIView(generics.RetrieveUpdateDestroyAPIView)
 # ==================================
 # Feed View
 # ==================================
-class FeedListView(generics.ListAPIView):
+class FeedListView(ConditionalGetMixin, PostViewerStateMixin, generics.ListAPIView):
     serializer_class = StatusPostSerializer
     permission_classes = [IsAuthenticated]
     pagination_class = PostCursorPagination
     authentication_classes = [TokenAuthentication]
 
-    # THIS IS THE NEW, FIXED CODE
-    def get_queryset(self):
+    def get_version_token(self):
+        # New, edited or removed timeline posts change the aggregate; follows,
+        # unfollows and group joins/leaves change the viewer's versions.
+        # Engagement counts on feed cards are refreshed by live events.
         user = self.request.user
-
-        # 1. Get the authors for the feed (unchanged)
-        following_user_ids = list(user.following.values_list("following_id", flat=True))
-        user_ids_for_feed = following_user_ids + [user.id]
-
-        # 2. Define the privacy filter using Q objects
-        # A post is visible in the feed if:
-        # - It has no group (it's a personal, public wall post), OR
-        # - Its group is public, OR
-        # - Its group is private AND the current user is a member of that group.
-        privacy_q = (
-            Q(group__isnull=True)
-            | Q(group__privacy_level="public")
-            | Q(group__members=user)
+        timeline = get_timeline_queryset(user).aggregate(
+            newest_id=Max("id"), total=Count("id"), last_edit=Max("updated_at")
+        )
+        return (
+            timeline["newest_id"],
+            timeline["total"],
+            timeline["last_edit"],
+            get_version(versions.FOLLOW_GRAPH, user.pk),
+            get_version(versions.MEMBERSHIPS, user.pk),
         )
 
-        # 3. Combine the filters and return the final queryset
+    def get_queryset(self):
+        # The candidate posts come from the user's precomputed timeline
+        # (see community/timeline.py), which is filled on post creation.
+        # Privacy is still applied here, at read time.
         return (
-            StatusPost.objects.filter(author_id__in=user_ids_for_feed)
-            .filter(privacy_q)
+            get_timeline_queryset(self.request.user)
             .select_related("author__profile", "group")
-            .prefetch_related("media", "likes", "poll__options", "poll__votes")
-            .order_by("-created_at", "-id")
-            .distinct()
+            .prefetch_related("media", "poll__options")
         )
 
     def get_serializer_context(self):
@@ -1027,7 +1463,7 @@ class SavedPostToggleView(APIView):
         return Response(serializer.data, status=status.HTTP_200_OK)
 
 
-class SavedPostListView(generics.ListAPIView):
+class SavedPostListView(PostViewerStateMixin, generics.ListAPIView):
     """
     Returns a paginated list of posts saved by the currently authenticated user.
     """
@@ -1042,7 +1478,7 @@ class SavedPostListView(generics.ListAPIView):
         user = self.request.user
         return (
             user.profile.saved_posts.select_related("author__profile", "group")
-            .prefetch_related("media", "likes", "poll__options", "poll__votes")
+            .prefetch_related("media", "poll__options")
             .order_by("-created_at")
         )  # Order by most recently saved first, or by post creation date
 
@@ -1118,25 +1554,27 @@ class SendMessageView(APIView):
 class NotificationListAPIView(generics.ListAPIView):
     serializer_class = NotificationSerializer
     permission_classes = [IsAuthenticated]
-    pagination_class = (
-        StandardResultsSetPagination  # KEEP: Offset pagination for notifications
-    )
+    pagination_class = NotificationKeysetPagination
 
     def get_queryset(self):
-        return self.request.user.notifications_received.all().order_by("-timestamp")
+        return with_related_objects(
+            self.request.user.notifications_received.all()
+        )
+
+    def get_serializer(self, *args, **kwargs):
+        if kwargs.get("many") and args:
+            notifications = list(args[0])
+            context = kwargs.setdefault("context", self.get_serializer_context())
+            context.update(resolve_latest_actors(notifications))
+            args = (notifications, *args[1:])
+        return super().get_serializer(*args, **kwargs)
 
 
 class UnreadNotificationCountAPIView(APIView):
     permission_classes = [IsAuthenticated]
 
     def get(self, request, format=None):
-        return Response(
-            {
-                "unread_count": request.user.notifications_received.filter(
-                    is_read=False
-                ).count()
-            }
-        )
+        return Response({"unread_count": get_unread_count(request.user.pk)})
 
 
 class MarkNotificationAsReadAPIView(APIView):
@@ -1144,16 +1582,13 @@ class MarkNotificationAsReadAPIView(APIView):
 
     def post(self, request, pk, format=None):
         notification = get_object_or_404(request.user.notifications_received, pk=pk)
-
-        if not notification.is_read:
-            notification.is_read = True
-            notification.save()
-
-        new_unread_count = request.user.notifications_received.filter(
-            is_read=False
-        ).count()
-
-        return Response({"unread_count": new_unread_count}, status=status.HTTP_200_OK)
+        # The cached counter is only decremented on commit, so read it first
+        # and subtract what this request changed.
+        unread_count = get_unread_count(request.user.pk)
+        updated = mark_as_read(request.user, Notification.objects.filter(pk=notification.pk))
+        return Response(
+            {"unread_count": max(unread_count - updated, 0)}, status=status.HTTP_200_OK
+        )
 
 
 class MarkMultipleNotificationsAsReadAPIView(APIView):
@@ -1161,9 +1596,9 @@ class MarkMultipleNotificationsAsReadAPIView(APIView):
 
     def post(self, request, format=None):
         ids = request.data.get("notification_ids", [])
-        updated_count = request.user.notifications_received.filter(
-            id__in=ids, is_read=False
-        ).update(is_read=True)
+        updated_count = mark_as_read(
+            request.user, request.user.notifications_received.filter(id__in=ids)
+        )
         return Response({"detail": f"{updated_count} notification(s) marked as read."})
 
 
@@ -1171,9 +1606,7 @@ class MarkAllNotificationsAsReadAPIView(APIView):
     permission_classes = [IsAuthenticated]
 
     def post(self, request, format=None):
-        updated_count = request.user.notifications_received.filter(
-            is_read=False
-        ).update(is_read=True)
+        updated_count = mark_as_read(request.user, request.user.notifications_received.all())
         return Response({"detail": f"{updated_count} notification(s) marked as read."})
 
 
@@ -1234,7 +1667,7 @@ class GroupTransferOwnershipView(APIView):
 
         # 3. --- Perform the Transfer ---
         group.creator = new_owner
-        group.save()
+        group.save(update_fields=["creator"])
 
         return Response(
             {"detail": f"Ownership successfully transferred to {new_owner.username}."},
@@ -1411,6 +1844,38 @@ class ForcefulLogoutView(APIView):
         return response
 
 
+@api_view(["GET"])
+@permission_classes([permissions.IsAdminUser])
+def post_cache_stats_view(request):
+    """
+    Hit/miss counters of the per-post serialized fragment cache.
+    """
+    return Response(get_fragment_cache_stats(), status=status.HTTP_200_OK)
+
+
+@api_view(["GET"])
+@permission_classes([permissions.IsAdminUser])
+def realtime_metrics_view(request):
+    """
+    Realtime pipeline counters and histograms of this process, in the
+    Prometheus text format. Empty unless METRICS_ENABLED is set.
+    """
+    return HttpResponse(
+        instrumentation.render_prometheus(),
+        content_type="text/plain; version=0.0.4; charset=utf-8",
+    )
+
+
+@api_view(["GET"])
+@permission_classes([permissions.IsAdminUser])
+def realtime_dispatch_stats_view(request):
+    """
+    Queue depth, lag and send counters of the realtime broadcast dispatcher
+    for the process that serves the request.
+    """
+    return Response(get_dispatch_stats(), status=status.HTTP_200_OK)
+
+
 @api_view(["GET"])
 @permission_classes([AllowAny])
 def health_check_view(request):
@@ -36,6 +36,7 @@ INSTALLED_APPS = [
     "django.contrib.messages",
     "django.contrib.staticfiles",
     "django.contrib.sites",
+    "django.contrib.postgres",
 
     # Third-party
     "channels",
@@ -161,6 +162,37 @@ REST_FRAMEWORK = {
     ],
 }
 
+# -------------------------------------------------
+# CACHE
+# -------------------------------------------------
+# Shared Redis cache when CACHE_URL is set, per-process memory otherwise.
+CACHE_URL = os.getenv("CACHE_URL")
+if CACHE_URL:
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.redis.RedisCache",
+            "LOCATION": CACHE_URL,
+        }
+    }
+else:
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        }
+    }
+
+# Seconds a serialized post fragment may live in the cache.
+POST_FRAGMENT_CACHE_TTL = int(os.getenv("POST_FRAGMENT_CACHE_TTL", "300"))
+
+# Seconds an ETag version counter lives before it is recreated.
+VERSION_CACHE_TTL = int(os.getenv("VERSION_CACHE_TTL", str(7 * 24 * 60 * 60)))
+
+# -------------------------------------------------
+# HOME TIMELINE (fan-out-on-write feed)
+# -------------------------------------------------
+# Fan-out does not trim; run `manage.py trim_timelines` periodically.
+TIMELINE_MAX_LENGTH = int(os.getenv("TIMELINE_MAX_LENGTH", "800"))
+
 # -------------------------------------------------
 # CORS
 # -------------------------------------------------
@@ -178,6 +210,70 @@ CHANNEL_LAYERS = {
     }
 }
 
+# Realtime broadcasts are sent by a background worker thread after commit.
+# Disable to send them inline (needed with the in-memory channel layer).
+REALTIME_DISPATCH_IN_BACKGROUND = (
+    os.getenv("REALTIME_DISPATCH_IN_BACKGROUND", "True").lower() == "true"
+)
+REALTIME_BATCH_MAX_EVENTS = int(os.getenv("REALTIME_BATCH_MAX_EVENTS", "100"))
+REALTIME_SEND_CONCURRENCY = int(os.getenv("REALTIME_SEND_CONCURRENCY", "200"))
+
+# Likes and follows on the same target fold into one unread notification
+# created within this many seconds ("X and 24 others liked your post").
+NOTIFICATION_AGGREGATION_WINDOW = int(os.getenv("NOTIFICATION_AGGREGATION_WINDOW", "86400"))
+NOTIFICATION_LATEST_ACTORS = 3
+# A growing aggregate is re-pushed over the socket at most this often.
+NOTIFICATION_UPDATE_PUSH_INTERVAL = int(os.getenv("NOTIFICATION_UPDATE_PUSH_INTERVAL", "30"))
+# Lifetime of the cached unread-notification counter; it is rebuilt from the
+# database on the next read after it expires.
+NOTIFICATION_UNREAD_COUNT_TTL = int(os.getenv("NOTIFICATION_UNREAD_COUNT_TTL", "86400"))
+
+# Text search configuration for the full-text post search (community/search.py).
+# Stored search vectors are built with it (migrations 0010 and 0012 backfill
+# with this value), so changing it later needs the vectors rebuilt.
+SEARCH_CONFIG = os.getenv("SEARCH_CONFIG", "english")
+# Group search multiplies relevance by 1 + weight * ln(1 + member_count).
+GROUP_SEARCH_ACTIVITY_WEIGHT = float(os.getenv("GROUP_SEARCH_ACTIVITY_WEIGHT", "0.1"))
+# Result-ID pages of user and content searches are shared through the cache
+# for this many seconds (community/search_cache.py); the warm_search_cache
+# command keeps the first page of the most searched queries filled. The
+# command needs CACHE_URL: it cannot reach a per-process memory cache.
+SEARCH_CACHE_TTL = int(os.getenv("SEARCH_CACHE_TTL", "60"))
+SEARCH_CACHE_TOP_QUERIES = int(os.getenv("SEARCH_CACHE_TOP_QUERIES", "50"))
+
+# The in-process autocomplete index (community/autocomplete.py) is rebuilt
+# in the background once it is this many seconds old, to pick up changes
+# made by other processes.
+AUTOCOMPLETE_REBUILD_INTERVAL = int(os.getenv("AUTOCOMPLETE_REBUILD_INTERVAL", "600"))
+AUTOCOMPLETE_CIRCLE_TTL = 60
+
+# Realtime pipeline metrics (exported at /api/metrics/realtime/). Disabled,
+# they cost one boolean check per call site. Debug logs of individual events
+# are sampled at this rate.
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "False").lower() == "true"
+REALTIME_DEBUG_SAMPLE_RATE = float(os.getenv("REALTIME_DEBUG_SAMPLE_RATE", "0.01"))
+
+# Skip realtime events for users without an open socket. Presence is kept in
+# the cache, so it is only on by default with a shared cache (CACHE_URL);
+# enable it explicitly when one process serves both HTTP and WebSockets.
+PRESENCE_ENABLED = os.getenv("PRESENCE_ENABLED", str(bool(CACHE_URL))).lower() == "true"
+PRESENCE_TTL = int(os.getenv("PRESENCE_TTL", "90"))
+PRESENCE_HEARTBEAT_INTERVAL = int(os.getenv("PRESENCE_HEARTBEAT_INTERVAL", "30"))
+
+# Sockets opened with ?coalesce_ms=N get their events in one frame per N ms.
+WS_COALESCE_DEFAULT_MS = int(os.getenv("WS_COALESCE_DEFAULT_MS", "0"))
+WS_COALESCE_MAX_MS = int(os.getenv("WS_COALESCE_MAX_MS", "1000"))
+
+# How many post_<id> / group_<slug> topics one socket may subscribe to.
+WS_MAX_TOPICS_PER_CONNECTION = int(os.getenv("WS_MAX_TOPICS_PER_CONNECTION", "50"))
+
+# Live like/comment/poll counters reach post_<id> subscribers at most once
+# per this many seconds per post.
+ENGAGEMENT_UPDATE_INTERVAL = float(os.getenv("ENGAGEMENT_UPDATE_INTERVAL", "1.0"))
+
+# Seconds a WebSocket token -> user lookup is cached (dropped on logout).
+WS_TOKEN_USER_CACHE_TTL = int(os.getenv("WS_TOKEN_USER_CACHE_TTL", "300"))
+
 # -------------------------------------------------
 # ALLAUTH / AUTH
 # -------------------------------------------------
@@ -0,0 +1,83 @@
+import pytest
+from django.core.cache import cache
+
+from community import autocomplete
+from community.models import Follow
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture(autouse=True)
+def fresh_index(monkeypatch):
+    monkeypatch.setattr(autocomplete, "BUILD_IN_BACKGROUND", False)
+    cache.clear()
+    autocomplete.index.reset()
+    yield
+    autocomplete.index.reset()
+    cache.clear()
+
+
+def complete(client, query):
+    return [user["username"] for user in client.get("/api/search/users/autocomplete/", {"q": query}).json()["results"]]
+
+
+def test_completes_usernames_and_display_names(user_factory, api_client_factory):
+    user_factory(username="annabel")
+    lee = user_factory(username="klee")
+    lee.profile.display_name = "Annika Lee"
+    lee.profile.save()
+    client = api_client_factory(user=user_factory(username="viewer"))
+
+    assert complete(client, "ann") == ["annabel", "klee"]
+    assert complete(client, "@lee") == ["klee"]
+    assert complete(client, "zz") == []
+
+
+def test_followed_users_come_first(user_factory, api_client_factory):
+    viewer = user_factory(username="viewer")
+    user_factory(username="anna")
+    followed = user_factory(username="annz")
+    Follow.objects.create(follower=viewer, following=followed)
+
+    assert complete(api_client_factory(user=viewer), "ann") == ["annz", "anna"]
+
+
+def test_index_follows_renames_without_queries(
+    user_factory, django_capture_on_commit_callbacks, django_assert_num_queries
+):
+    user = user_factory(username="oldhandle")
+    autocomplete.index.build()
+
+    with django_capture_on_commit_callbacks(execute=True):
+        user.username = "newhandle"
+        user.save()
+
+    with django_assert_num_queries(0):
+        assert [entry["username"] for _, entry in autocomplete.index.complete("newh")] == ["newhandle"]
+        assert autocomplete.index.complete("oldh") == []
+
+
+def test_lookups_use_the_database_until_the_background_build_finishes(
+    user_factory, api_client_factory, monkeypatch
+):
+    monkeypatch.setattr(autocomplete, "BUILD_IN_BACKGROUND", True)
+    started = []
+
+    class RecordingThread:
+        def __init__(self, target, **kwargs):
+            self.target = target
+
+        def start(self):
+            started.append(self.target)
+
+    monkeypatch.setattr(autocomplete.threading, "Thread", RecordingThread)
+    viewer = user_factory(username="viewer")
+    user_factory(username="anna")
+    followed = user_factory(username="annz")
+    Follow.objects.create(follower=viewer, following=followed)
+    client = api_client_factory(user=viewer)
+
+    assert complete(client, "ann") == ["annz", "anna"]
+    assert complete(client, "ann") == ["annz", "anna"]
+    assert len(started) == 1  # The second lookup did not start another build.
+    assert not autocomplete.index.is_built
@@ -0,0 +1,127 @@
+import pytest
+from django.contrib.contenttypes.models import ContentType
+from rest_framework import status
+
+from community import versions
+from community.models import Follow, Group, StatusPost
+
+pytestmark = pytest.mark.django_db
+
+
+def _revalidate(client, url, response):
+    return client.get(url, HTTP_IF_NONE_MATCH=response["ETag"])
+
+
+def test_post_detail_returns_304_until_post_is_liked(user_factory, api_client_factory):
+    author = user_factory()
+    post = StatusPost.objects.create(author=author, content="Hello.")
+    client = api_client_factory(user=author)
+    url = f"/api/posts/{post.id}/"
+
+    first = client.get(url)
+    assert first.status_code == status.HTTP_200_OK
+    assert first["ETag"]
+    assert first["Last-Modified"]
+
+    unchanged = _revalidate(client, url, first)
+    assert unchanged.status_code == status.HTTP_304_NOT_MODIFIED
+    assert unchanged["ETag"] == first["ETag"]
+
+    post_type = ContentType.objects.get_for_model(StatusPost)
+    client.post(f"/api/content/{post_type.id}/{post.id}/like/")
+
+    changed = _revalidate(client, url, first)
+    assert changed.status_code == status.HTTP_200_OK
+    assert changed["ETag"] != first["ETag"]
+    assert changed.json()["like_count"] == 1
+
+
+def test_etag_differs_per_viewer(user_factory, api_client_factory):
+    author = user_factory()
+    post = StatusPost.objects.create(author=author, content="Hello.")
+    url = f"/api/posts/{post.id}/"
+
+    first = api_client_factory(user=author).get(url)
+    second = api_client_factory(user=user_factory()).get(url, HTTP_IF_NONE_MATCH=first["ETag"])
+
+    assert second.status_code == status.HTTP_200_OK
+    assert second["ETag"] != first["ETag"]
+
+
+def test_feed_etag_changes_on_new_post_and_follow(user_factory, api_client_factory):
+    viewer = user_factory()
+    author = user_factory()
+    StatusPost.objects.create(author=viewer, content="Mine.")
+    client = api_client_factory(user=viewer)
+
+    first = client.get("/api/feed/")
+    assert _revalidate(client, "/api/feed/", first).status_code == status.HTTP_304_NOT_MODIFIED
+
+    Follow.objects.create(follower=viewer, following=author)
+    after_follow = _revalidate(client, "/api/feed/", first)
+    assert after_follow.status_code == status.HTTP_200_OK
+
+    StatusPost.objects.create(author=author, content="New from a followee.")
+    after_post = _revalidate(client, "/api/feed/", after_follow)
+    assert after_post.status_code == status.HTTP_200_OK
+    assert len(after_post.json()["results"]) == 2
+
+
+def test_profile_etag_changes_when_followed(user_factory, api_client_factory):
+    owner = user_factory()
+    client = api_client_factory(user=user_factory())
+    url = f"/api/profiles/{owner.username}/"
+
+    first = client.get(url)
+    assert _revalidate(client, url, first).status_code == status.HTTP_304_NOT_MODIFIED
+
+    Follow.objects.create(follower=user_factory(), following=owner)
+    assert _revalidate(client, url, first).status_code == status.HTTP_200_OK
+
+
+def test_group_etag_changes_when_member_joins(user_factory, api_client_factory):
+    creator = user_factory()
+    group = Group.objects.create(creator=creator, name="Readers", privacy_level="public")
+    client = api_client_factory(user=creator)
+    url = f"/api/groups/{group.slug}/"
+
+    first = client.get(url)
+    assert _revalidate(client, url, first).status_code == status.HTTP_304_NOT_MODIFIED
+
+    group.members.add(user_factory())
+    assert _revalidate(client, url, first).status_code == status.HTTP_200_OK
+
+
+def test_wildcard_is_only_honored_for_existing_objects(user_factory, api_client_factory):
+    client = api_client_factory(user=user_factory())
+
+    assert client.get("/api/groups/no-such-group/", HTTP_IF_NONE_MATCH="*").status_code == status.HTTP_404_NOT_FOUND
+    assert client.get("/api/posts/999999/", HTTP_IF_NONE_MATCH="*").status_code == status.HTTP_404_NOT_FOUND
+
+
+def test_post_and_group_etags_change_when_a_shown_profile_changes(user_factory, api_client_factory):
+    author = user_factory()
+    post = StatusPost.objects.create(author=author, content="Hello.")
+    group = Group.objects.create(creator=user_factory(), name="Writers", privacy_level="public")
+    group.members.add(author)
+    client = api_client_factory(user=user_factory())
+    post_url, group_url = f"/api/posts/{post.id}/", f"/api/groups/{group.slug}/"
+    first_post, first_group = client.get(post_url), client.get(group_url)
+
+    author.first_name = "Renamed"
+    author.save()
+
+    assert _revalidate(client, post_url, first_post).status_code == status.HTTP_200_OK
+    assert _revalidate(client, group_url, first_group).status_code == status.HTTP_200_OK
+
+
+def test_versions_are_bumped_again_on_commit(django_capture_on_commit_callbacks):
+    before = versions.get_version(versions.POST, 1)
+    with django_capture_on_commit_callbacks(execute=False) as callbacks:
+        versions.bump_versions(versions.POST, [1])
+    bumped = versions.get_version(versions.POST, 1)
+    assert bumped != before
+
+    for callback in callbacks:
+        callback()
+    assert versions.get_version(versions.POST, 1) != bumped
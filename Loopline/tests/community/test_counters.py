@@ -0,0 +1,81 @@
+import pytest
+from django.contrib.contenttypes.models import ContentType
+from django.core.management import call_command
+
+from community.models import Comment, Like, StatusPost
+
+pytestmark = pytest.mark.django_db
+
+
+def test_like_and_unlike_keep_post_like_count_current(user_factory):
+    author = user_factory()
+    liker = user_factory()
+    post = StatusPost.objects.create(author=author, content="Count my likes.")
+
+    like = Like.objects.create(user=liker, content_object=post)
+    post.refresh_from_db()
+    assert post.like_count == 1
+
+    like.delete()
+    post.refresh_from_db()
+    assert post.like_count == 0
+
+
+def test_comments_update_post_comment_count_and_comment_like_count(user_factory):
+    author = user_factory()
+    commenter = user_factory()
+    post = StatusPost.objects.create(author=author, content="Count my comments.")
+
+    comment = Comment.objects.create(author=commenter, content_object=post, content="First!")
+    Comment.objects.create(author=author, content_object=post, content="Reply.", parent=comment)
+    Like.objects.create(user=author, content_object=comment)
+
+    post.refresh_from_db()
+    comment.refresh_from_db()
+    assert post.comment_count == 2
+    assert comment.like_count == 1
+
+    # Deleting the parent cascades to its reply.
+    comment.delete()
+    post.refresh_from_db()
+    assert post.comment_count == 0
+
+
+def test_like_toggle_endpoint_returns_denormalized_count(user_factory, api_client_factory):
+    author = user_factory()
+    liker = user_factory()
+    post = StatusPost.objects.create(author=author, content="Toggle me.")
+    client = api_client_factory(user=liker)
+    content_type = ContentType.objects.get_for_model(StatusPost)
+    url = f"/api/content/{content_type.id}/{post.id}/like/"
+
+    assert client.post(url).json() == {"liked": True, "like_count": 1}
+    assert client.post(url).json() == {"liked": False, "like_count": 0}
+
+
+def test_reconcile_counters_repairs_drift(user_factory):
+    author = user_factory()
+    liker = user_factory()
+    post = StatusPost.objects.create(author=author, content="Drifting.")
+    Like.objects.create(user=liker, content_object=post)
+    StatusPost.objects.filter(pk=post.pk).update(like_count=42, comment_count=7)
+
+    call_command("reconcile_counters", "--batch-size", "1")
+
+    post.refresh_from_db()
+    assert post.like_count == 1
+    assert post.comment_count == 0
+
+
+def test_editing_a_post_keeps_counters_updated_meanwhile(user_factory):
+    author = user_factory()
+    post = StatusPost.objects.create(author=author, content="Before.")
+    stale = StatusPost.objects.get(pk=post.pk)
+    Like.objects.create(user=user_factory(), content_object=post)
+    Comment.objects.create(author=author, content_object=post, content="Hi.")
+
+    stale.content = "After."
+    stale.save()
+
+    post.refresh_from_db()
+    assert (post.content, post.like_count, post.comment_count) == ("After.", 1, 1)
@@ -0,0 +1,79 @@
+import json
+
+import pytest
+from django.core.cache import cache
+
+from community import engagement
+from community.models import Comment, Like, Poll, PollOption, PollVote, StatusPost
+
+pytestmark = pytest.mark.django_db
+
+
+class RecordingDispatcher:
+    def __init__(self, sent):
+        self.sent = sent
+
+    def enqueue(self, group_names, message):
+        self.sent.append((group_names, json.loads(message["text"])))
+
+
+@pytest.fixture
+def sent_events(monkeypatch):
+    """Flushes run in the test thread; sent events are recorded instead of dispatched."""
+    sent = []
+    aggregator = engagement.EngagementAggregator()
+    monkeypatch.setattr(aggregator, "_ensure_worker", lambda: None)
+    monkeypatch.setattr(engagement, "aggregator", aggregator)
+    monkeypatch.setattr(engagement, "dispatcher", RecordingDispatcher(sent))
+    return sent
+
+
+def test_burst_of_engagement_yields_one_update_per_post(
+    user_factory, sent_events, django_capture_on_commit_callbacks
+):
+    author = user_factory()
+    post = StatusPost.objects.create(author=author, content="Vote!")
+    poll = Poll.objects.create(post=post, question="Vote!")
+    yes, no = (PollOption.objects.create(poll=poll, text=text) for text in ("Yes", "No"))
+
+    with django_capture_on_commit_callbacks(execute=True):
+        for _ in range(3):
+            fan = user_factory()
+            Like.objects.create(user=fan, content_object=post)
+            Comment.objects.create(author=fan, content_object=post, content="Hi")
+            PollVote.objects.create(user=fan, poll=poll, option=yes)
+
+    assert engagement.aggregator.flush() == [post.id]
+    assert sent_events == [
+        (
+            [f"topic.post.{post.id}"],
+            {
+                "type": "engagement",
+                "payload": {
+                    "post_id": post.id,
+                    "like_count": 3,
+                    "comment_count": 3,
+                    "poll": {"id": poll.id, "option_votes": {str(yes.id): 3}, "total_votes": 3},
+                },
+            },
+        )
+    ]
+
+
+def test_post_announced_within_interval_waits_for_next_tick(
+    user_factory, sent_events, django_capture_on_commit_callbacks
+):
+    post = StatusPost.objects.create(author=user_factory(), content="Hot post.")
+
+    with django_capture_on_commit_callbacks(execute=True):
+        Like.objects.create(user=user_factory(), content_object=post)
+    assert engagement.aggregator.flush() == [post.id]
+
+    with django_capture_on_commit_callbacks(execute=True):
+        Like.objects.create(user=user_factory(), content_object=post)
+    assert engagement.aggregator.flush() == []
+    assert len(sent_events) == 1
+
+    cache.delete(f"{engagement.THROTTLE_KEY_PREFIX}:{post.id}")  # The interval passes.
+    assert engagement.aggregator.flush() == [post.id]
+    assert sent_events[-1][1]["payload"]["like_count"] == 2
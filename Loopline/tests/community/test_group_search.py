@@ -0,0 +1,111 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from community.counters import reconcile_group_counters
+from community.models import Group
+
+pytestmark = pytest.mark.django_db
+
+
+def search(client, query):
+    return client.get("/api/groups/", {"search": query}).json()
+
+
+def names(data):
+    return [group["name"] for group in data["results"]]
+
+
+def member_count(group):
+    group.refresh_from_db(fields=["member_count"])
+    return group.member_count
+
+
+def test_member_count_follows_membership_changes(user_factory):
+    ann, bob, cy = user_factory(), user_factory(), user_factory()
+    group = Group.objects.create(creator=ann, name="Counted")
+
+    group.members.add(ann, bob)
+    group.members.add(bob)  # Already a member.
+    assert member_count(group) == 2
+
+    cy.joined_groups.add(group)
+    group.members.remove(bob, user_factory())  # The second user never joined.
+    assert member_count(group) == 2
+
+    cy.delete()
+    assert member_count(group) == 1
+
+    ann.joined_groups.clear()
+    assert member_count(group) == 0
+
+
+def test_reconcile_repairs_member_count(user_factory):
+    user = user_factory()
+    group = Group.objects.create(creator=user, name="Drifted")
+    group.members.add(user)
+    Group.objects.filter(pk=group.pk).update(member_count=7)
+
+    assert reconcile_group_counters() == 1
+    assert member_count(group) == 1
+
+
+def test_search_matches_words_partial_names_and_descriptions(user_factory, api_client_factory):
+    user = user_factory()
+    Group.objects.create(creator=user, name="Python Devs")
+    Group.objects.create(creator=user, name="Gardening", description="Growing tomatoes on balconies")
+    Group.objects.create(creator=user, name="Django Fans")
+    client = api_client_factory(user=user)
+
+    assert names(search(client, "python")) == ["Python Devs"]
+    assert names(search(client, "pyth")) == ["Python Devs"]
+    assert names(search(client, "tomato")) == ["Gardening"]
+
+
+def test_search_prefers_active_groups_among_equal_matches(user_factory, api_client_factory):
+    user = user_factory()
+    quiet = Group.objects.create(creator=user, name="Chess Club")
+    busy = Group.objects.create(creator=user, name="Chess Club")
+    busy.members.add(*(user_factory() for _ in range(5)))
+    quiet.members.add(user)
+    client = api_client_factory(user=user)
+
+    results = search(client, "chess")["results"]
+
+    assert [group["id"] for group in results] == [busy.pk, quiet.pk]
+    assert [group["member_count"] for group in results] == [5, 1]
+
+
+def test_list_does_not_load_members(user_factory, api_client_factory):
+    user = user_factory()
+    client = api_client_factory(user=user)
+
+    def list_queries(group_count):
+        for index in range(group_count):
+            group = Group.objects.create(creator=user, name=f"Group {index}")
+            group.members.add(user, user_factory(), user_factory())
+        with CaptureQueriesContext(connection) as queries:
+            data = client.get("/api/groups/").json()
+        return data, len(queries.captured_queries)
+
+    _, few = list_queries(2)
+    data, more = list_queries(4)
+
+    assert few == more
+    assert "members" not in data["results"][0]
+    assert data["results"][0]["member_count"] == 3
+    assert data["results"][0]["membership_status"] == "creator"
+
+
+def test_full_save_does_not_write_back_a_stale_member_count(user_factory, api_client_factory):
+    user = user_factory()
+    group = Group.objects.create(creator=user, name="Editors")
+    stale = Group.objects.get(pk=group.pk)
+    group.members.add(user, user_factory())
+
+    stale.description = "Edited while members joined."
+    stale.save()
+    assert member_count(group) == 2
+
+    api_client_factory(user=user).patch(f"/api/groups/{group.slug}/", {"name": "Editors 2"})
+    assert member_count(group) == 2
@@ -0,0 +1,56 @@
+import pytest
+from rest_framework import status
+
+from community import instrumentation
+
+
+@pytest.fixture
+def metrics(monkeypatch):
+    monkeypatch.setattr(instrumentation, "ENABLED", True)
+    instrumentation.reset()
+    yield instrumentation
+    instrumentation.reset()
+
+
+def test_disabled_metrics_record_nothing(monkeypatch):
+    monkeypatch.setattr(instrumentation, "ENABLED", False)
+    instrumentation.reset()
+
+    instrumentation.incr("realtime_group_sends_total", 5)
+    instrumentation.observe("realtime_fanout_width", 10)
+
+    assert instrumentation.snapshot() == {"counters": {}, "histograms": {}}
+
+
+def test_counters_and_histograms_are_exported(metrics):
+    metrics.incr("ws_frames_sent_total", format="json")
+    metrics.incr("ws_frames_sent_total", 2, format="json")
+    metrics.observe("realtime_fanout_width", 3)
+    metrics.observe("realtime_fanout_width", 700)
+
+    snapshot = metrics.snapshot()
+    assert snapshot["counters"] == {'ws_frames_sent_total{format="json"}': 3}
+    histogram = snapshot["histograms"]["realtime_fanout_width"]
+    assert histogram["count"] == 2
+    assert histogram["sum"] == 703
+    assert histogram["buckets"]["5"] == 1
+    assert histogram["buckets"]["1000"] == 1
+
+    text = metrics.render_prometheus()
+    assert 'ws_frames_sent_total{format="json"} 3' in text
+    assert 'realtime_fanout_width_bucket{le="5"} 1' in text
+    assert 'realtime_fanout_width_bucket{le="+Inf"} 2' in text
+    assert "realtime_fanout_width_count 2" in text
+
+
+@pytest.mark.django_db
+def test_metrics_endpoint_is_admin_only(user_factory, api_client_factory, metrics):
+    metrics.incr("notifications_created_total", type="like")
+
+    regular = api_client_factory(user=user_factory())
+    assert regular.get("/api/metrics/realtime/").status_code == status.HTTP_403_FORBIDDEN
+
+    admin = api_client_factory(user=user_factory(is_staff=True))
+    response = admin.get("/api/metrics/realtime/")
+    assert response.status_code == status.HTTP_200_OK
+    assert 'notifications_created_total{type="like"} 1' in response.content.decode()
@@ -0,0 +1,101 @@
+import json
+
+import pytest
+from django.contrib.contenttypes.models import ContentType
+from django.core.cache import cache
+
+from community import notifications
+from community.models import Comment, Notification, StatusPost
+from community.utils import parse_mentions, process_mentions
+
+pytestmark = pytest.mark.django_db
+
+
+class RecordingDispatcher:
+    def __init__(self, sent):
+        self.sent = sent
+
+    def enqueue(self, group_names, message, user_ids=()):
+        self.sent.append((list(user_ids), json.loads(message["text"])))
+
+
+def test_parse_mentions_drops_trailing_punctuation():
+    assert parse_mentions("Thanks @ann. And @bob.smith-jr, @carol!") == {"ann", "bob.smith-jr", "carol"}
+
+
+def test_mentions_resolve_dedupe_and_insert_in_three_queries(
+    user_factory, django_assert_num_queries
+):
+    author = user_factory()
+    mentioned = [user_factory() for _ in range(3)]
+    post = StatusPost.objects.create(author=author, content="No mentions yet.")
+    ContentType.objects.get_for_model(StatusPost)  # Warms the content type cache.
+    text = " ".join(f"@{user.username}" for user in mentioned) + f" @nobody @{author.username}"
+
+    with django_assert_num_queries(3):
+        created = process_mentions(author, post, text)
+
+    assert {notification.recipient_id for notification in created} == {user.id for user in mentioned}
+    assert all(notification.target == post for notification in created)
+
+
+def test_post_author_mentioned_in_a_comment_only_gets_the_comment_notification(user_factory):
+    author, commenter = user_factory(), user_factory()
+    post = StatusPost.objects.create(author=author, content="Thoughts?")
+
+    Comment.objects.create(author=commenter, content_object=post, content=f"Agreed, @{author.username}!")
+
+    assert list(
+        Notification.objects.filter(recipient=author).values_list("notification_type", flat=True)
+    ) == [Notification.COMMENT]
+
+
+def test_post_author_mentioned_in_a_reply_gets_a_mention(user_factory):
+    author, commenter, replier = user_factory(), user_factory(), user_factory()
+    post = StatusPost.objects.create(author=author, content="Thoughts?")
+    comment = Comment.objects.create(author=commenter, content_object=post, content="Hmm.")
+
+    Comment.objects.create(
+        author=replier, content_object=post, parent=comment, content=f"Ask @{author.username}."
+    )
+
+    assert set(
+        Notification.objects.filter(recipient=author).values_list("notification_type", flat=True)
+    ) == {Notification.COMMENT, Notification.MENTION}
+    assert Notification.objects.filter(
+        recipient=commenter, notification_type=Notification.REPLY
+    ).exists()
+
+
+def test_mentions_are_pushed_in_one_batch(
+    user_factory, monkeypatch, django_capture_on_commit_callbacks
+):
+    sent = []
+    monkeypatch.setattr(notifications, "dispatcher", RecordingDispatcher(sent))
+    monkeypatch.setattr(notifications, "is_online", lambda user_id: False)
+    author = user_factory()
+    first, second = user_factory(), user_factory()
+
+    with django_capture_on_commit_callbacks(execute=True):
+        StatusPost.objects.create(author=author, content=f"Hi @{first.username} and @{second.username}")
+
+    pushed = [(user_ids, event) for user_ids, event in sent if event["type"] == "new_notification"]
+    assert sorted(user_ids[0] for user_ids, _ in pushed) == sorted([first.id, second.id])
+    assert all(event["payload"]["verb"] == "mentioned you in a post" for _, event in pushed)
+    assert notifications.get_unread_count(first.id) == 1
+
+
+def test_post_created_and_edited_through_api_notifies_each_user_once(
+    user_factory, api_client_factory
+):
+    author, first, second = user_factory(), user_factory(), user_factory()
+    client = api_client_factory(user=author)
+
+    response = client.post("/api/posts/", {"content": f"Hello @{first.username}"})
+    client.patch(
+        f"/api/posts/{response.json()['id']}/",
+        {"content": f"Hello @{first.username} and @{second.username}"},
+    )
+
+    mentions = Notification.objects.filter(notification_type=Notification.MENTION)
+    assert sorted(mentions.values_list("recipient_id", flat=True)) == sorted([first.id, second.id])
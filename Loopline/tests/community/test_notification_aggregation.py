@@ -0,0 +1,116 @@
+import json
+
+import pytest
+
+from community import notifications, realtime
+from community.models import Comment, Follow, Like, Notification, StatusPost
+
+pytestmark = pytest.mark.django_db
+
+
+def test_likes_on_same_post_collapse_into_one_notification(user_factory):
+    author = user_factory()
+    post = StatusPost.objects.create(author=author, content="Popular.")
+    likers = [user_factory() for _ in range(5)]
+    for liker in likers:
+        Like.objects.create(user=liker, content_object=post)
+
+    notification = Notification.objects.get(recipient=author, notification_type=Notification.LIKE)
+    assert notification.actor_count == 5
+    assert notification.actor == likers[-1]
+    assert notification.latest_actor_ids == [liker.id for liker in reversed(likers)][:3]
+
+
+def test_repeat_actor_is_counted_once(user_factory):
+    author = user_factory()
+    post = StatusPost.objects.create(author=author, content="Popular.")
+    first = user_factory()
+    Like.objects.create(user=first, content_object=post)
+    for liker in [user_factory() for _ in range(3)]:
+        Like.objects.create(user=liker, content_object=post)
+
+    # `first` has scrolled out of latest_actor_ids; unliking and liking again
+    # must not count them twice.
+    Like.objects.filter(user=first).delete()
+    Like.objects.create(user=first, content_object=post)
+
+    notification = Notification.objects.get(recipient=author, notification_type=Notification.LIKE)
+    assert notification.actor_count == 4
+    assert notification.latest_actor_ids[0] == first.id
+    assert notification.actor_links.count() == 4
+
+
+def test_read_aggregate_starts_a_new_notification(user_factory):
+    author = user_factory()
+    post = StatusPost.objects.create(author=author, content="Popular.")
+    Like.objects.create(user=user_factory(), content_object=post)
+    Notification.objects.filter(recipient=author).update(is_read=True)
+
+    Like.objects.create(user=user_factory(), content_object=post)
+
+    assert Notification.objects.filter(recipient=author, notification_type=Notification.LIKE).count() == 2
+
+
+def test_follows_aggregate_but_comments_do_not(user_factory):
+    author = user_factory()
+    post = StatusPost.objects.create(author=author, content="Talk to me.")
+    for _ in range(3):
+        fan = user_factory()
+        Follow.objects.create(follower=fan, following=author)
+        Comment.objects.create(author=fan, content_object=post, content="Hello")
+
+    follows = Notification.objects.get(recipient=author, notification_type=Notification.FOLLOW)
+    assert follows.actor_count == 3
+    assert Notification.objects.filter(recipient=author, notification_type=Notification.COMMENT).count() == 3
+
+
+def test_notification_list_shows_aggregate(user_factory, api_client_factory):
+    author = user_factory()
+    post = StatusPost.objects.create(author=author, content="Popular.")
+    likers = [user_factory() for _ in range(4)]
+    for liker in likers:
+        Like.objects.create(user=liker, content_object=post)
+
+    results = api_client_factory(user=author).get("/api/notifications/").json()["results"]
+
+    assert len(results) == 1
+    assert results[0]["actor_count"] == 4
+    assert [actor["id"] for actor in results[0]["latest_actors"]] == [
+        likers[3].id, likers[2].id, likers[1].id,
+    ]
+
+
+class RecordingDispatcher:
+    def __init__(self):
+        self.sent, self.scheduled = [], {}
+
+    def enqueue(self, group_names, message, user_ids=()):
+        self.sent.append((list(user_ids), json.loads(message["text"])))
+
+    def enqueue_later(self, key, delay, send):
+        self.scheduled.setdefault(key, send)
+
+
+def test_growth_inside_the_push_interval_gets_a_trailing_push(
+    user_factory, monkeypatch, django_capture_on_commit_callbacks
+):
+    recorder = RecordingDispatcher()
+    monkeypatch.setattr(notifications, "dispatcher", recorder)
+    monkeypatch.setattr(realtime, "dispatcher", recorder)
+    author = user_factory()
+    post = StatusPost.objects.create(author=author, content="Popular.")
+
+    with django_capture_on_commit_callbacks(execute=True):
+        for _ in range(4):
+            Like.objects.create(user=user_factory(), content_object=post)
+
+    # The second like pushes at once; the third and fourth only schedule
+    # one trailing push, which sends the final state.
+    updates = [event for _, event in recorder.sent if event["type"] == "notification_updated"]
+    assert [event["payload"]["actor_count"] for event in updates] == [2]
+    assert len(recorder.scheduled) == 1
+
+    next(iter(recorder.scheduled.values()))()
+
+    updates = [event for _, event in recorder.sent if event["type"] == "notification_updated"]
+    assert [event["payload"]["actor_count"] for event in updates] == [2, 4]
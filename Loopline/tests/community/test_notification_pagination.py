@@ -0,0 +1,61 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework import status
+
+from community.models import Notification
+
+pytestmark = pytest.mark.django_db
+
+
+def notify(recipient, actor, count):
+    return [
+        Notification.objects.create(
+            recipient=recipient, actor=actor, verb=f"mentioned you ({index})",
+            notification_type=Notification.MENTION,
+        )
+        for index in range(count)
+    ]
+
+
+def test_pages_walk_every_notification_once_without_count(user_factory, api_client_factory):
+    recipient, actor = user_factory(), user_factory()
+    created = notify(recipient, actor, 8)
+    # Ties on timestamp are broken by id.
+    Notification.objects.filter(recipient=recipient).update(timestamp=timezone.now())
+    client = api_client_factory(user=recipient)
+
+    seen, url = [], "/api/notifications/?page_size=3"
+    with CaptureQueriesContext(connection) as queries:
+        while url:
+            data = client.get(url).json()
+            seen.extend(item["id"] for item in data["results"])
+            url = data["next"]
+
+    assert seen == [notification.id for notification in reversed(created)]
+    assert not any("COUNT(" in query["sql"] for query in queries.captured_queries)
+
+
+def test_since_returns_only_newer_notifications(user_factory, api_client_factory):
+    recipient, actor = user_factory(), user_factory()
+    notify(recipient, actor, 2)
+    client = api_client_factory(user=recipient)
+    since = client.get("/api/notifications/").json()["since"]
+
+    newer = notify(recipient, actor, 2)
+    data = client.get("/api/notifications/", {"since": since}).json()
+
+    assert [item["id"] for item in data["results"]] == [newer[1].id, newer[0].id]
+    assert data["next"] is None
+    polled_again = client.get("/api/notifications/", {"since": data["since"]}).json()
+    assert polled_again["results"] == []
+    assert polled_again["since"] == data["since"]
+
+
+def test_invalid_cursor_is_rejected(user_factory, api_client_factory):
+    client = api_client_factory(user=user_factory())
+
+    response = client.get("/api/notifications/", {"cursor": "not-a-cursor"})
+
+    assert response.status_code == status.HTTP_404_NOT_FOUND
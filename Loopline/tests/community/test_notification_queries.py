@@ -0,0 +1,47 @@
+import pytest
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from community.models import Comment, Follow, Like, StatusPost
+
+pytestmark = pytest.mark.django_db
+
+
+def create_activity(recipient, user_factory):
+    """Comment, like (aggregated), comment-like and follow notifications for `recipient`."""
+    post = StatusPost.objects.create(author=recipient, content="Look at this.")
+    commenter, liker, follower = user_factory(), user_factory(), user_factory()
+    Comment.objects.create(author=commenter, content_object=post, content="Nice post!")
+    for post_liker in (user_factory(), liker, commenter):
+        Like.objects.create(user=post_liker, content_object=post)
+
+    other_post = StatusPost.objects.create(author=commenter, content="Elsewhere.")
+    own_comment = Comment.objects.create(author=recipient, content_object=other_post, content="Reply.")
+    Like.objects.create(user=liker, content_object=own_comment)
+    Follow.objects.create(follower=follower, following=recipient)
+
+
+def count_page_queries(client):
+    with CaptureQueriesContext(connection) as queries:
+        response = client.get("/api/notifications/?page_size=50")
+    return len(queries), response.json()["results"]
+
+
+def test_notification_page_cost_does_not_grow_with_page_size(user_factory, api_client_factory):
+    recipient = user_factory()
+    client = api_client_factory(user=recipient)
+    create_activity(recipient, user_factory)
+    count_page_queries(client)  # Warms the content type cache.
+
+    small_cost, small_page = count_page_queries(client)
+    for _ in range(4):
+        create_activity(recipient, user_factory)
+    large_cost, large_page = count_page_queries(client)
+
+    assert len(large_page) > 3 * len(small_page)
+    assert large_cost == small_cost
+    liked_post = next(item for item in large_page if item["notification_type"] == "like"
+                      and item["actor_count"] == 3)
+    assert liked_post["context_snippet"] == '"Look at this."'
+    assert len(liked_post["latest_actors"]) == 3
@@ -0,0 +1,58 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+pytestmark = pytest.mark.django_db
+
+
+def search(client, query, **params):
+    return client.get("/api/search/users/", {"q": query, **params}).json()
+
+
+def usernames(data):
+    return [user["username"] for user in data["results"]]
+
+
+def test_search_tolerates_typos_and_covers_profile_fields(user_factory, api_client_factory):
+    jonathan = user_factory(username="jonathan")
+    staff = user_factory(username="kim")
+    staff.profile.display_name = "Kim Lee"
+    staff.profile.headline = "Staff Engineer at Loopline"
+    staff.profile.save()
+    client = api_client_factory(user=user_factory())
+
+    assert usernames(search(client, "jonathn")) == [jonathan.username]
+    assert usernames(search(client, "staff engineer")) == [staff.username]
+
+
+def test_username_prefix_matches_rank_first(user_factory, api_client_factory):
+    user_factory(username="annabel", first_name="Zoe")
+    user_factory(username="zed", first_name="Anna")
+    client = api_client_factory(user=user_factory())
+
+    assert usernames(search(client, "anna")) == ["annabel", "zed"]
+
+
+def test_renamed_user_is_found_under_new_name(user_factory, api_client_factory):
+    user = user_factory(username="before")
+    user.first_name = "Marguerite"
+    user.save()
+    client = api_client_factory(user=user_factory())
+
+    assert usernames(search(client, "marguerite")) == ["before"]
+
+
+def test_pages_without_count(user_factory, api_client_factory):
+    for index in range(3):
+        user_factory(username=f"pager_{index}")
+    client = api_client_factory(user=user_factory())
+
+    with CaptureQueriesContext(connection) as queries:
+        first = search(client, "pager", page_size=2)
+    second = client.get(first["next"]).json()
+
+    assert "count" not in first
+    assert usernames(first) == ["pager_0", "pager_1"]
+    assert usernames(second) == ["pager_2"]
+    assert second["next"] is None
+    assert not any("COUNT(" in query["sql"] for query in queries.captured_queries)
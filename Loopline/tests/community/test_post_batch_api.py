@@ -0,0 +1,40 @@
+import pytest
+from rest_framework import status
+
+from community.models import Group, StatusPost
+
+pytestmark = pytest.mark.django_db
+
+
+def test_batch_returns_posts_in_requested_order(user_factory, api_client_factory):
+    user = user_factory()
+    first, second, third = (
+        StatusPost.objects.create(author=user, content=f"Post {i}") for i in range(3)
+    )
+    client = api_client_factory(user=user)
+
+    response = client.get(f"/api/posts/batch/?ids={second.id},{third.id},{first.id},{second.id}")
+
+    assert response.status_code == status.HTTP_200_OK
+    assert [post["id"] for post in response.json()] == [second.id, third.id, first.id]
+
+
+def test_batch_omits_private_group_posts_and_missing_ids(user_factory, api_client_factory):
+    viewer = user_factory()
+    author = user_factory()
+    private_group = Group.objects.create(creator=author, name="Secret", privacy_level="private")
+    public_post = StatusPost.objects.create(author=author, content="Public.")
+    private_post = StatusPost.objects.create(author=author, content="Private.", group=private_group)
+    client = api_client_factory(user=viewer)
+
+    response = client.get(f"/api/posts/batch/?ids={private_post.id},{public_post.id},999999")
+
+    assert response.status_code == status.HTTP_200_OK
+    assert [post["id"] for post in response.json()] == [public_post.id]
+
+
+@pytest.mark.parametrize("ids", ["", "1,abc", ",".join(str(i) for i in range(1, 52))])
+def test_batch_rejects_invalid_id_lists(user_factory, api_client_factory, ids):
+    client = api_client_factory(user=user_factory())
+    response = client.get(f"/api/posts/batch/?ids={ids}")
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
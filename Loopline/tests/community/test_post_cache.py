@@ -0,0 +1,49 @@
+import pytest
+from django.core.cache import cache
+
+from community import post_cache
+from community.models import Like, Poll, PollOption, PollVote, StatusPost
+
+pytestmark = pytest.mark.django_db
+
+
+def test_cached_fragment_gets_per_viewer_overlay(user_factory, api_client_factory):
+    author = user_factory()
+    liker = user_factory()
+    post = StatusPost.objects.create(author=author, content="Shared fragment.")
+    Like.objects.create(user=liker, content_object=post)
+
+    author_view = api_client_factory(user=author).get(f"/api/users/{author.username}/posts/")
+    liker_view = api_client_factory(user=liker).get(f"/api/users/{author.username}/posts/")
+
+    assert author_view.json()["results"][0]["is_liked_by_user"] is False
+    assert liker_view.json()["results"][0]["is_liked_by_user"] is True
+    assert liker_view.json()["results"][0]["like_count"] == 1
+    assert post_cache.get_fragment_cache_stats() == {"hits": 1, "misses": 1, "hit_ratio": 0.5}
+
+
+def test_poll_vote_invalidates_cached_fragment(user_factory, api_client_factory):
+    author = user_factory()
+    voter = user_factory()
+    post = StatusPost.objects.create(author=author, content="Tabs or spaces?")
+    poll = Poll.objects.create(post=post, question="Tabs or spaces?")
+    option = PollOption.objects.create(poll=poll, text="Spaces")
+    client = api_client_factory(user=author)
+    url = f"/api/users/{author.username}/posts/"
+
+    assert client.get(url).json()["results"][0]["poll"]["total_votes"] == 0
+    assert cache.get(post_cache.fragment_key(post.pk)) is not None
+
+    PollVote.objects.create(user=voter, poll=poll, option=option)
+    assert cache.get(post_cache.fragment_key(post.pk)) is None
+    assert client.get(url).json()["results"][0]["poll"]["total_votes"] == 1
+
+
+def test_post_cache_stats_requires_admin(user_factory, api_client_factory):
+    regular_user = user_factory()
+    admin_user = user_factory(is_staff=True)
+
+    assert api_client_factory(user=regular_user).get("/api/metrics/post-cache/").status_code == 403
+    response = api_client_factory(user=admin_user).get("/api/metrics/post-cache/")
+    assert response.status_code == 200
+    assert set(response.json()) == {"hits", "misses", "hit_ratio"}
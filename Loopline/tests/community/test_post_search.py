@@ -0,0 +1,54 @@
+import pytest
+
+from community.models import Group, StatusPost
+
+pytestmark = pytest.mark.django_db
+
+
+def test_content_search_ranks_matches_and_highlights(user_factory, api_client_factory):
+    author = user_factory()
+    StatusPost.objects.create(author=author, content="We are hiring a remote Python engineer.")
+    StatusPost.objects.create(author=author, content="Python tips: Python generators and Python typing.")
+    StatusPost.objects.create(author=author, content="Nothing to see here.")
+
+    response = api_client_factory(user=user_factory()).get("/api/search/content/", {"q": "python"})
+
+    results = response.json()["results"]
+    assert len(results) == 2
+    assert results[0]["content"].startswith("Python tips")
+    assert "<mark>Python</mark>" in results[0]["search_headline"]
+
+
+def test_edited_content_is_reindexed(user_factory, api_client_factory):
+    author = user_factory()
+    post = StatusPost.objects.create(author=author, content="Old announcement.")
+    post.content = "Conference keynote tomorrow."
+    post.save()
+    client = api_client_factory(user=user_factory())
+
+    assert client.get("/api/search/content/", {"q": "announcement"}).json()["results"] == []
+    assert [item["id"] for item in client.get("/api/search/content/", {"q": "keynote"}).json()["results"]] == [post.id]
+
+
+def test_search_hides_private_group_posts_from_non_members(user_factory, api_client_factory):
+    owner, outsider = user_factory(), user_factory()
+    group = Group.objects.create(name="Secret club", creator=owner, privacy_level="private")
+    group.members.add(owner)
+    StatusPost.objects.create(author=owner, group=group, content="Secret roadmap.")
+
+    def search(user):
+        return api_client_factory(user=user).get("/api/posts/", {"search": "roadmap"}).json()["results"]
+
+    assert search(outsider) == []
+    assert len(search(owner)) == 1
+
+
+def test_posts_are_found_by_author_username_after_rename(user_factory, api_client_factory):
+    author = user_factory(username="oldname")
+    post = StatusPost.objects.create(author=author, content="Hello world.")
+    author.username = "newname"
+    author.save()
+
+    results = api_client_factory(user=user_factory()).get("/api/posts/", {"search": "newname"}).json()["results"]
+
+    assert [item["id"] for item in results] == [post.id]
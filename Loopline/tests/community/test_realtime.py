@@ -0,0 +1,135 @@
+import json
+
+import pytest
+from asgiref.sync import async_to_sync
+from django.core.cache import cache
+
+from community import presence, realtime
+from community.models import Follow, StatusPost
+
+pytestmark = pytest.mark.django_db
+
+
+class RecordingChannelLayer:
+    def __init__(self):
+        self.sent = []
+
+    async def group_send(self, group, message):
+        self.sent.append((group, message))
+
+
+def go_online(user):
+    async_to_sync(presence.connection_opened)(user.id)
+
+
+@pytest.fixture
+def channel_layer(monkeypatch):
+    layer = RecordingChannelLayer()
+    monkeypatch.setattr(realtime, "get_channel_layer", lambda: layer)
+    return layer
+
+
+def test_new_post_is_broadcast_only_after_commit(
+    user_factory, channel_layer, django_capture_on_commit_callbacks
+):
+    author = user_factory()
+    followers = [user_factory() for _ in range(3)]
+    for follower in followers:
+        Follow.objects.create(follower=follower, following=author)
+        go_online(follower)
+
+    with django_capture_on_commit_callbacks(execute=True) as callbacks:
+        post = StatusPost.objects.create(author=author, content="Hello, followers.")
+        assert channel_layer.sent == []
+    assert callbacks
+    assert realtime.dispatcher.flush()
+
+    new_post_sends = [
+        (group, json.loads(message["text"]))
+        for group, message in channel_layer.sent
+        if message["type"] == "send_live_post"
+    ]
+    assert sorted(group for group, _ in new_post_sends) == sorted(
+        f"user_{follower.id}" for follower in followers
+    )
+    assert all(message["type"] == "new_post" for _, message in new_post_sends)
+    assert all(message["payload"]["id"] == post.id for _, message in new_post_sends)
+
+
+def test_rolled_back_post_is_not_broadcast(user_factory, channel_layer, django_capture_on_commit_callbacks):
+    author = user_factory()
+    Follow.objects.create(follower=user_factory(), following=author)
+
+    with django_capture_on_commit_callbacks(execute=False):
+        StatusPost.objects.create(author=author, content="Never committed.")
+
+    assert realtime.dispatcher.flush()
+    assert channel_layer.sent == []
+
+
+def test_dispatcher_reports_queue_and_send_stats(channel_layer):
+    before = realtime.get_dispatch_stats()
+
+    realtime.dispatcher.enqueue(["user_1", "user_2"], {"type": "send_live_post"})
+    assert realtime.dispatcher.flush()
+
+    stats = realtime.get_dispatch_stats()
+    assert stats["queue_depth"] == 0
+    assert stats["dispatched_events"] == before["dispatched_events"] + 1
+    assert stats["sent_messages"] == before["sent_messages"] + 2
+    assert stats["last_lag_ms"] is not None
+    assert [group for group, _ in channel_layer.sent] == ["user_1", "user_2"]
+
+
+def test_offline_followers_are_skipped(user_factory, channel_layer, django_capture_on_commit_callbacks):
+    author = user_factory()
+    online_follower, offline_follower = user_factory(), user_factory()
+    for follower in (online_follower, offline_follower):
+        Follow.objects.create(follower=follower, following=author)
+    go_online(online_follower)
+    skipped_before = realtime.get_dispatch_stats()["skipped_offline"]
+
+    with django_capture_on_commit_callbacks(execute=True):
+        StatusPost.objects.create(author=author, content="Only for those online.")
+    assert realtime.dispatcher.flush()
+
+    assert [group for group, _ in channel_layer.sent] == [f"user_{online_follower.id}"]
+    assert realtime.get_dispatch_stats()["skipped_offline"] == skipped_before + 1
+
+
+def test_presence_counts_connections_per_user():
+    async_to_sync(presence.connection_opened)(1)
+    async_to_sync(presence.connection_opened)(1)
+    epoch = async_to_sync(presence.connection_opened)(2)
+    assert presence.online_user_ids([1, 2, 3]) == {1, 2}
+
+    async_to_sync(presence.connection_closed)(1)
+    assert presence.is_online(1)
+
+    async_to_sync(presence.connection_closed)(1)
+    async_to_sync(presence.heartbeat)(2, epoch)
+    assert presence.online_user_ids([1, 2, 3]) == {2}
+
+
+def test_heartbeats_recount_every_socket_after_expiry():
+    first = async_to_sync(presence.connection_opened)(1)
+    second = async_to_sync(presence.connection_opened)(1)
+    cache.clear()  # The presence keys expire while both sockets stay open.
+
+    first = async_to_sync(presence.heartbeat)(1, first)
+    second = async_to_sync(presence.heartbeat)(1, second)
+    assert async_to_sync(presence.heartbeat)(1, first) == first
+
+    async_to_sync(presence.connection_closed)(1)
+    assert presence.is_online(1)
+    async_to_sync(presence.connection_closed)(1)
+    assert not presence.is_online(1)
+
+
+def test_encode_event_produces_compact_json_text():
+    event = realtime.encode_event("send_live_post", {"type": "post_deleted", "payload": {"post_id": 5}})
+
+    assert event == {
+        "type": "send_live_post",
+        "text": '{"type":"post_deleted","payload":{"post_id":5}}',
+    }
@@ -0,0 +1,101 @@
+import pytest
+from django.core.cache import cache
+from django.core.management import CommandError, call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from community import search_cache
+from community.models import Group, StatusPost
+
+pytestmark = pytest.mark.django_db
+
+
+def search_content(client, query):
+    return [item["id"] for item in client.get("/api/search/content/", {"q": query}).json()["results"]]
+
+
+def search_users(client, query):
+    return [user["username"] for user in client.get("/api/search/users/", {"q": query}).json()["results"]]
+
+
+def test_result_ids_are_shared_between_viewers(user_factory, api_client_factory):
+    author = user_factory()
+    post = StatusPost.objects.create(author=author, content="Kubernetes tips")
+    assert search_content(api_client_factory(user=user_factory()), "Kubernetes") == [post.id]
+
+    with CaptureQueriesContext(connection) as queries:
+        # Same normalized query from someone else: served from the cache.
+        assert search_content(api_client_factory(user=user_factory()), "  kubernetes ") == [post.id]
+
+    assert not any("ts_rank" in query["sql"] for query in queries.captured_queries)
+
+
+def test_privacy_is_applied_after_the_cache(user_factory, api_client_factory):
+    owner, outsider = user_factory(), user_factory()
+    group = Group.objects.create(name="Secret club", creator=owner, privacy_level="private")
+    group.members.add(owner)
+    post = StatusPost.objects.create(author=owner, group=group, content="Secret roadmap")
+
+    assert search_content(api_client_factory(user=owner), "roadmap") == [post.id]
+    assert search_content(api_client_factory(user=outsider), "roadmap") == []
+
+
+def test_new_and_edited_posts_invalidate_matching_queries(user_factory, api_client_factory):
+    author = user_factory()
+    client = api_client_factory(user=user_factory())
+    first = StatusPost.objects.create(author=author, content="Rust meetup tonight")
+    assert search_content(client, "rust") == [first.id]
+    assert search_content(client, "gardening") == []
+
+    second = StatusPost.objects.create(author=author, content="Rust workshop notes")
+    assert set(search_content(client, "rust")) == {first.id, second.id}
+
+    first.content = "Gardening meetup tonight"
+    first.save()
+    assert search_content(client, "rust") == [second.id]
+    assert search_content(client, "gardening") == [first.id]
+
+
+def test_unrelated_posts_keep_cached_pages(user_factory, api_client_factory):
+    author = user_factory()
+    StatusPost.objects.create(author=author, content="Rust meetup tonight")
+    search_content(api_client_factory(user=user_factory()), "rust")
+    version = cache.get(f"search-version:{search_cache.POSTS}:{search_cache._digest('rust')}")
+
+    StatusPost.objects.create(author=author, content="Nothing in common")
+
+    assert cache.get(f"search-version:{search_cache.POSTS}:{search_cache._digest('rust')}") == version
+
+
+def test_new_profiles_invalidate_people_queries(user_factory, api_client_factory):
+    client = api_client_factory(user=user_factory())
+    user_factory(username="marigold")
+    assert search_users(client, "marigold") == ["marigold"]
+
+    user_factory(username="marigolds")
+
+    assert search_users(client, "marigold") == ["marigold", "marigolds"]
+
+
+def test_popular_queries_are_warmed(user_factory, api_client_factory):
+    author = user_factory()
+    post = StatusPost.objects.create(author=author, content="Rust and Python")
+    client = api_client_factory(user=user_factory())
+    for _ in range(3):
+        search_content(client, "python")
+    search_content(client, "rust")
+
+    assert search_cache.popular_queries(search_cache.POSTS, limit=1) == ["python"]
+
+    cache.delete(search_cache._page_key(search_cache.POSTS, search_cache._digest("python"), 1, 10))
+    assert search_cache.warm_popular_searches(page_size=10, limit=1) == 1
+    with CaptureQueriesContext(connection) as queries:
+        assert search_content(client, "python") == [post.id]
+    assert not any("ts_rank" in query["sql"] for query in queries.captured_queries)
+
+
+def test_warm_command_refuses_a_per_process_cache(settings):
+    settings.CACHES = {"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}}
+
+    with pytest.raises(CommandError, match="CACHE_URL"):
+        call_command("warm_search_cache")
@@ -0,0 +1,113 @@
+import pytest
+from django.core.management import call_command
+from rest_framework import status
+
+from community import timeline
+from community.models import Follow, Group, StatusPost, TimelineEntry
+
+pytestmark = pytest.mark.django_db
+
+
+def test_new_post_is_fanned_out_to_author_and_followers(user_factory):
+    author = user_factory()
+    follower = user_factory()
+    stranger = user_factory()
+    Follow.objects.create(follower=follower, following=author)
+
+    post = StatusPost.objects.create(author=author, content="Fan me out.")
+
+    owners = set(
+        TimelineEntry.objects.filter(post=post).values_list("owner_id", flat=True)
+    )
+    assert owners == {author.id, follower.id}
+    assert stranger.id not in owners
+
+
+def test_follow_backfills_and_unfollow_removes_author_posts(user_factory):
+    author = user_factory()
+    follower = user_factory()
+    old_post = StatusPost.objects.create(author=author, content="Written before the follow.")
+
+    follow = Follow.objects.create(follower=follower, following=author)
+    assert TimelineEntry.objects.filter(owner=follower, post=old_post).exists()
+
+    follow.delete()
+    assert not TimelineEntry.objects.filter(owner=follower, post=old_post).exists()
+
+
+def test_timeline_is_trimmed_to_max_length(user_factory, monkeypatch):
+    monkeypatch.setattr(timeline, "TIMELINE_MAX_LENGTH", 3)
+    user = user_factory()
+
+    posts = [StatusPost.objects.create(author=user, content=f"Post {i}") for i in range(5)]
+
+    kept_ids = set(
+        TimelineEntry.objects.filter(owner=user).values_list("post_id", flat=True)
+    )
+    assert kept_ids == {post.id for post in posts[-3:]}
+
+
+def test_followers_are_fanned_out_in_the_background_after_commit(
+    user_factory, monkeypatch, django_capture_on_commit_callbacks
+):
+    monkeypatch.setattr(timeline, "FANOUT_IN_BACKGROUND", True)
+    scheduled = []
+    monkeypatch.setattr(
+        timeline.dispatcher, "enqueue_later", lambda key, delay, send: scheduled.append(send)
+    )
+    author = user_factory()
+    follower = user_factory()
+    Follow.objects.create(follower=follower, following=author)
+
+    with django_capture_on_commit_callbacks(execute=True):
+        post = StatusPost.objects.create(author=author, content="Later for followers.")
+        assert set(TimelineEntry.objects.filter(post=post).values_list("owner_id", flat=True)) == {author.id}
+
+    assert len(scheduled) == 1
+    scheduled[0]()
+    owners = set(TimelineEntry.objects.filter(post=post).values_list("owner_id", flat=True))
+    assert owners == {author.id, follower.id}
+
+
+def test_trim_command_cuts_long_follower_timelines(user_factory, monkeypatch):
+    monkeypatch.setattr(timeline, "TIMELINE_MAX_LENGTH", 2)
+    author = user_factory()
+    follower = user_factory()
+    Follow.objects.create(follower=follower, following=author)
+    posts = [StatusPost.objects.create(author=author, content=f"Post {i}") for i in range(4)]
+    assert TimelineEntry.objects.filter(owner=follower).count() == 4
+
+    call_command("trim_timelines")
+
+    kept_ids = set(TimelineEntry.objects.filter(owner=follower).values_list("post_id", flat=True))
+    assert kept_ids == {post.id for post in posts[-2:]}
+
+
+def test_private_group_post_hidden_until_user_joins(user_factory, api_client_factory):
+    viewer = user_factory()
+    author = user_factory()
+    Follow.objects.create(follower=viewer, following=author)
+    private_group = Group.objects.create(creator=author, name="Inner Circle", privacy_level="private")
+    private_post = StatusPost.objects.create(author=author, content="Members only.", group=private_group)
+
+    client = api_client_factory(user=viewer)
+    response = client.get("/api/feed/")
+    assert private_post.id not in [post["id"] for post in response.json()["results"]]
+
+    private_group.members.add(viewer)
+    response = client.get("/api/feed/")
+    assert response.status_code == status.HTTP_200_OK
+    assert private_post.id in [post["id"] for post in response.json()["results"]]
+
+
+def test_rebuild_timelines_command_backfills_missing_entries(user_factory):
+    user = user_factory()
+    followed = user_factory()
+    Follow.objects.create(follower=user, following=followed)
+    post = StatusPost.objects.create(author=followed, content="Lost then found.")
+    TimelineEntry.objects.all().delete()
+
+    call_command("rebuild_timelines", "--username", user.username)
+
+    assert TimelineEntry.objects.filter(owner=user, post=post).exists()
+    assert not TimelineEntry.objects.filter(owner=followed).exists()
@@ -0,0 +1,102 @@
+import json
+
+import pytest
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from community import notifications
+from community.models import Comment, Notification, StatusPost
+from community.notifications import count_unread, get_unread_count, unread_count_key
+
+pytestmark = pytest.mark.django_db
+
+
+class RecordingDispatcher:
+    def __init__(self, sent):
+        self.sent = sent
+
+    def enqueue(self, group_names, message, user_ids=()):
+        self.sent.append((list(user_ids), json.loads(message["text"])))
+
+
+@pytest.fixture
+def pushed_counts(monkeypatch):
+    sent = []
+    monkeypatch.setattr(notifications, "is_online", lambda user_id: True)
+    monkeypatch.setattr(notifications, "dispatcher", RecordingDispatcher(sent))
+    return sent
+
+
+def comment_on(post, author, count, capture):
+    with capture(execute=True):
+        for _ in range(count):
+            Comment.objects.create(author=author, content_object=post, content="Hi")
+
+
+def test_counter_follows_create_read_and_delete(
+    user_factory, api_client_factory, django_capture_on_commit_callbacks
+):
+    author = user_factory()
+    post = StatusPost.objects.create(author=author, content="Talk to me.")
+    assert get_unread_count(author.id) == 0  # Warms the counter.
+
+    comment_on(post, user_factory(), 4, django_capture_on_commit_callbacks)
+    assert cache.get(unread_count_key(author.id)) == 4
+
+    client = api_client_factory(user=author)
+    first, second, third, fourth = Notification.objects.filter(recipient=author).order_by("id")
+    with django_capture_on_commit_callbacks(execute=True), CaptureQueriesContext(connection) as queries:
+        response = client.post(f"/api/notifications/{first.id}/mark-as-read/")
+    assert response.json()["unread_count"] == 3
+    assert not any("COUNT(" in query["sql"] for query in queries.captured_queries)
+
+    with django_capture_on_commit_callbacks(execute=True):
+        client.post("/api/notifications/mark-as-read/", {"notification_ids": [first.id, second.id]})
+    assert cache.get(unread_count_key(author.id)) == 2
+
+    with django_capture_on_commit_callbacks(execute=True):
+        third.delete()
+    assert cache.get(unread_count_key(author.id)) == 1
+
+    with django_capture_on_commit_callbacks(execute=True):
+        client.post("/api/notifications/mark-all-as-read/")
+    assert cache.get(unread_count_key(author.id)) == 0 == count_unread(author.id)
+
+
+def test_unread_count_endpoint_reads_the_counter(user_factory, api_client_factory):
+    user = user_factory()
+    cache.set(unread_count_key(user.id), 7)
+
+    response = api_client_factory(user=user).get("/api/notifications/unread-count/")
+
+    assert response.json() == {"unread_count": 7}
+
+
+def test_changes_are_pushed_to_the_recipient(
+    user_factory, pushed_counts, django_capture_on_commit_callbacks
+):
+    author = user_factory()
+    post = StatusPost.objects.create(author=author, content="Talk to me.")
+
+    comment_on(post, user_factory(), 2, django_capture_on_commit_callbacks)
+
+    assert pushed_counts[-1] == (
+        [author.id],
+        {"type": "notification_count", "payload": {"unread_count": 2}},
+    )
+
+
+def test_reconcile_counters_repairs_drifted_unread_count(user_factory):
+    author = user_factory()
+    untouched = user_factory()
+    Notification.objects.create(
+        recipient=author, actor=untouched, verb="mentioned you", notification_type=Notification.MENTION
+    )
+    cache.set(unread_count_key(author.id), 40)
+
+    call_command("reconcile_counters", "--batch-size", "1")
+
+    assert cache.get(unread_count_key(author.id)) == 1
+    assert cache.get(unread_count_key(untouched.id)) is None
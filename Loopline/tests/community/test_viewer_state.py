@@ -0,0 +1,65 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from community.models import Comment, Like, Poll, PollOption, PollVote, StatusPost
+
+pytestmark = pytest.mark.django_db
+
+
+def _create_poll_post(author, question="Best language?"):
+    post = StatusPost.objects.create(author=author, content=question)
+    poll = Poll.objects.create(post=post, question=question)
+    options = [PollOption.objects.create(poll=poll, text=text) for text in ("Python", "Go")]
+    return post, poll, options
+
+
+def test_feed_returns_batched_viewer_state(user_factory, api_client_factory):
+    viewer = user_factory()
+    other = user_factory()
+    liked_post = StatusPost.objects.create(author=viewer, content="Liked and saved.")
+    plain_post = StatusPost.objects.create(author=viewer, content="Untouched.")
+    poll_post, poll, options = _create_poll_post(viewer)
+
+    Like.objects.create(user=viewer, content_object=liked_post)
+    viewer.profile.saved_posts.add(liked_post)
+    Comment.objects.create(author=other, content_object=liked_post, content="One.")
+    Comment.objects.create(author=other, content_object=liked_post, content="Two.")
+    PollVote.objects.create(user=viewer, poll=poll, option=options[1])
+    PollVote.objects.create(user=other, poll=poll, option=options[1])
+
+    client = api_client_factory(user=viewer)
+    results = {post["id"]: post for post in client.get("/api/feed/").json()["results"]}
+
+    assert results[liked_post.id]["is_liked_by_user"] is True
+    assert results[liked_post.id]["is_saved"] is True
+    assert results[liked_post.id]["comment_count"] == 2
+    assert results[plain_post.id]["is_liked_by_user"] is False
+    assert results[plain_post.id]["is_saved"] is False
+    assert results[plain_post.id]["comment_count"] == 0
+
+    poll_data = results[poll_post.id]["poll"]
+    assert poll_data["user_vote"] == options[1].id
+    assert poll_data["total_votes"] == 2
+    assert {o["id"]: o["vote_count"] for o in poll_data["options"]} == {
+        options[0].id: 0,
+        options[1].id: 2,
+    }
+
+
+def test_feed_query_count_does_not_grow_with_page_size(user_factory, api_client_factory):
+    viewer = user_factory()
+    client = api_client_factory(user=viewer)
+
+    for i in range(2):
+        _create_poll_post(viewer, question=f"Question {i}?")
+    client.get("/api/feed/")  # Warm the ContentType cache.
+    with CaptureQueriesContext(connection) as small_page:
+        client.get("/api/feed/")
+
+    for i in range(6):
+        _create_poll_post(viewer, question=f"Another question {i}?")
+    with CaptureQueriesContext(connection) as large_page:
+        client.get("/api/feed/")
+
+    assert len(large_page.captured_queries) == len(small_page.captured_queries)
@@ -0,0 +1,64 @@
+import pytest
+from channels.db import database_sync_to_async
+from channels.testing import WebsocketCommunicator
+from rest_framework.authtoken.models import Token
+
+from community import middleware
+from community.middleware import get_user
+from config.asgi import application
+
+pytestmark = pytest.mark.django_db(transaction=True)
+
+
+@database_sync_to_async
+def create_token(user_factory):
+    user = user_factory()
+    return Token.objects.create(user=user)
+
+
+@database_sync_to_async
+def delete_token(token):
+    token.delete()
+
+
+@pytest.mark.asyncio
+async def test_token_lookup_is_cached_until_token_is_deleted(user_factory, monkeypatch):
+    token = await create_token(user_factory)
+    db_lookups = []
+    original_lookup = middleware.get_user_from_db
+
+    async def counting_lookup(token_key):
+        db_lookups.append(token_key)
+        return await original_lookup(token_key)
+
+    monkeypatch.setattr(middleware, "get_user_from_db", counting_lookup)
+
+    key = token.key  # Deleting the token clears its pk (the key).
+    assert (await get_user(key)).pk == token.user_id
+    assert (await get_user(key)).pk == token.user_id
+    assert len(db_lookups) == 1
+
+    await delete_token(token)
+    assert not (await get_user(key)).is_authenticated
+
+
+@pytest.mark.asyncio
+async def test_unknown_token_is_rejected():
+    assert not (await get_user("not-a-real-token")).is_authenticated
+    assert not (await get_user(None)).is_authenticated
+    assert not (await get_user("")).is_authenticated
+
+    communicator = WebsocketCommunicator(application, "/ws/activity/?token=not-a-real-token")
+    connected, _ = await communicator.connect()
+    assert not connected
+
+
+@pytest.mark.asyncio
+async def test_socket_connects_with_cached_user(user_factory):
+    token = await create_token(user_factory)
+    await get_user(token.key)
+
+    communicator = WebsocketCommunicator(application, f"/ws/activity/?token={token.key}")
+    connected, _ = await communicator.connect()
+    assert connected
+    await communicator.disconnect()
@@ -0,0 +1,95 @@
+import msgpack
+import pytest
+from channels.db import database_sync_to_async
+from channels.layers import get_channel_layer
+from channels.testing import WebsocketCommunicator
+from django.contrib.auth import get_user_model
+from rest_framework.authtoken.models import Token
+
+from community.consumers import coalesce_events
+from community.realtime import encode_event
+from config.asgi import application
+
+
+def new_post(post_id):
+    return {"type": "new_post", "payload": {"id": post_id}}
+
+
+def test_new_posts_collapse_to_id_list_newest_first():
+    events = [new_post(1), {"type": "new_notification", "payload": {"id": 7}}, new_post(2), new_post(2)]
+
+    assert coalesce_events(events) == [
+        {"type": "new_posts", "payload": {"post_ids": [2, 1]}},
+        {"type": "new_notification", "payload": {"id": 7}},
+    ]
+
+
+def test_posts_deleted_in_same_window_are_not_announced():
+    events = [new_post(1), new_post(2), {"type": "post_deleted", "payload": {"post_id": 1}}]
+
+    assert coalesce_events(events) == [
+        {"type": "new_posts", "payload": {"post_ids": [2]}},
+        {"type": "post_deleted", "payload": {"post_id": 1}},
+    ]
+
+
+def test_only_latest_count_update_is_kept():
+    events = [
+        {"type": "notification_count", "payload": {"unread_count": 1}},
+        {"type": "notification_count", "payload": {"unread_count": 3}},
+    ]
+
+    assert coalesce_events(events) == [
+        {"type": "notification_count", "payload": {"unread_count": 3}},
+    ]
+
+
+@database_sync_to_async
+def create_token(username):
+    user = get_user_model().objects.create_user(username=username, password="password123")
+    return user, Token.objects.create(user=user).key
+
+
+@pytest.mark.django_db(transaction=True)
+@pytest.mark.asyncio
+async def test_coalescing_socket_receives_one_batch_frame():
+    user, token = await create_token("coalescing_user")
+    communicator = WebsocketCommunicator(application, f"/ws/activity/?token={token}&coalesce_ms=100")
+    connected, _ = await communicator.connect()
+    assert connected
+
+    channel_layer = get_channel_layer()
+    for post_id in (10, 11, 12):
+        await channel_layer.group_send(
+            f"user_{user.id}", {"type": "send_live_post", "message": new_post(post_id)}
+        )
+
+    frame = await communicator.receive_json_from(timeout=1)
+    assert frame == {
+        "type": "batch",
+        "events": [{"type": "new_posts", "payload": {"post_ids": [12, 11, 10]}}],
+    }
+    assert await communicator.receive_nothing(timeout=0.2)
+
+    await communicator.disconnect()
+
+
+@pytest.mark.django_db(transaction=True)
+@pytest.mark.asyncio
+async def test_msgpack_subprotocol_gets_binary_frames():
+    user, token = await create_token("msgpack_user")
+    communicator = WebsocketCommunicator(
+        application, f"/ws/activity/?token={token}", subprotocols=["loopline.msgpack"]
+    )
+    connected, subprotocol = await communicator.connect()
+    assert connected
+    assert subprotocol == "loopline.msgpack"
+
+    await get_channel_layer().group_send(
+        f"user_{user.id}", encode_event("send_live_post", new_post(42))
+    )
+
+    frame = await communicator.receive_from(timeout=1)
+    assert msgpack.unpackb(frame) == new_post(42)
+
+    await communicator.disconnect()
@@ -0,0 +1,115 @@
+import pytest
+from channels.db import database_sync_to_async
+from channels.testing import WebsocketCommunicator
+from django.contrib.auth import get_user_model
+from rest_framework.authtoken.models import Token
+
+from community import consumers
+from community.models import Comment, Group, StatusPost
+from config.asgi import application
+
+pytestmark = [pytest.mark.django_db(transaction=True), pytest.mark.asyncio]
+
+
+@database_sync_to_async
+def create_user_with_token(username):
+    user = get_user_model().objects.create_user(username=username, password="password123")
+    return user, Token.objects.create(user=user).key
+
+
+@database_sync_to_async
+def create_post(author, group=None):
+    return StatusPost.objects.create(author=author, content="Watch this.", group=group)
+
+
+@database_sync_to_async
+def create_group(creator, privacy_level):
+    return Group.objects.create(creator=creator, name=f"{privacy_level} group", privacy_level=privacy_level)
+
+
+@database_sync_to_async
+def create_comment(author, post):
+    return Comment.objects.create(author=author, content_object=post, content="Nice!")
+
+
+async def connect(token):
+    communicator = WebsocketCommunicator(application, f"/ws/activity/?token={token}")
+    connected, _ = await communicator.connect()
+    assert connected
+    return communicator
+
+
+async def test_post_topic_receives_new_comments():
+    author, _ = await create_user_with_token("topic_author")
+    viewer, viewer_token = await create_user_with_token("topic_viewer")
+    post = await create_post(author)
+    communicator = await connect(viewer_token)
+
+    await communicator.send_json_to({"action": "subscribe", "topic": f"post_{post.id}"})
+    assert await communicator.receive_json_from(timeout=1) == {
+        "type": "subscribed",
+        "topic": f"post_{post.id}",
+    }
+
+    comment = await create_comment(author, post)
+    event = await communicator.receive_json_from(timeout=1)
+    assert event == {
+        "type": "new_comment",
+        "payload": {"post_id": post.id, "comment_id": comment.id, "parent_id": None},
+    }
+
+    await communicator.send_json_to({"action": "unsubscribe", "topic": f"post_{post.id}"})
+    assert (await communicator.receive_json_from(timeout=1))["type"] == "unsubscribed"
+    await create_comment(author, post)
+    assert await communicator.receive_nothing(timeout=0.3)
+
+    await communicator.disconnect()
+
+
+async def test_private_group_topic_is_refused_to_non_members():
+    creator, _ = await create_user_with_token("private_creator")
+    _, outsider_token = await create_user_with_token("outsider")
+    group = await create_group(creator, "private")
+    communicator = await connect(outsider_token)
+
+    await communicator.send_json_to({"action": "subscribe", "topic": f"group_{group.slug}"})
+    response = await communicator.receive_json_from(timeout=1)
+    assert response["type"] == "error"
+    assert response["topic"] == f"group_{group.slug}"
+
+    await communicator.disconnect()
+
+
+async def test_topic_limit_per_connection(monkeypatch):
+    monkeypatch.setattr(consumers, "MAX_TOPICS_PER_CONNECTION", 1)
+    author, token = await create_user_with_token("limited_user")
+    first, second = await create_post(author), await create_post(author)
+    communicator = await connect(token)
+
+    await communicator.send_json_to({"action": "subscribe", "topic": f"post_{first.id}"})
+    assert (await communicator.receive_json_from(timeout=1))["type"] == "subscribed"
+    await communicator.send_json_to({"action": "subscribe", "topic": f"post_{second.id}"})
+    assert (await communicator.receive_json_from(timeout=1))["type"] == "error"
+
+    await communicator.disconnect()
+
+
+async def test_removed_member_loses_private_group_topic():
+    creator, _ = await create_user_with_token("removing_creator")
+    member, member_token = await create_user_with_token("removed_member")
+    group = await create_group(creator, "private")
+    await database_sync_to_async(group.members.add)(member)
+    communicator = await connect(member_token)
+
+    await communicator.send_json_to({"action": "subscribe", "topic": f"group_{group.slug}"})
+    assert (await communicator.receive_json_from(timeout=1))["type"] == "subscribed"
+
+    await database_sync_to_async(group.members.remove)(member)
+    assert await communicator.receive_json_from(timeout=1) == {
+        "type": "unsubscribed",
+        "topic": f"group_{group.slug}",
+    }
+    await create_post(creator, group)
+    assert await communicator.receive_nothing(timeout=0.3)
+
+    await communicator.disconnect()
@@ -4,12 +4,28 @@ import pytest
 from django.contrib.auth import get_user_model
 from rest_framework.test import APIClient
 from rest_framework.authtoken.models import Token
+from community import presence, timeline
 from community.models import Group, GroupJoinRequest
 from channels.layers import get_channel_layer
 from allauth.account.models import EmailAddress  # <--- 1. ADD THIS IMPORT
 
 User = get_user_model()
 
+@pytest.fixture(autouse=True)
+def presence_enabled(monkeypatch):
+    """
+    Presence is off by default without CACHE_URL, but the tests run in one
+    process, so the memory cache is shared and presence works.
+    """
+    monkeypatch.setattr(presence, "PRESENCE_ENABLED", True)
+
+
+@pytest.fixture(autouse=True)
+def inline_timeline_fan_out(monkeypatch):
+    """Test transactions never commit, so fan out within the request."""
+    monkeypatch.setattr(timeline, "FANOUT_IN_BACKGROUND", False)
+
+
 @pytest.fixture
 def user_factory(db):
     """
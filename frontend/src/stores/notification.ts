@@ -29,9 +29,9 @@ export interface Notification {
   context_snippet: string | null 
 }
 export interface PaginatedNotificationResponse {
-  count: number
   next: string | null
   previous: string | null
+  since: string | null
   results: Notification[]
 }
 
@@ -52,7 +52,6 @@ export const useNotificationStore = defineStore('notification', () => {
     totalPages: 0,
     pageSize: 10,
   })
-  const ITEMS_PER_PAGE_NOTIFICATIONS = 10
   const hasLoadedInitialList = ref<boolean>(false)
 
   async function fetchUnreadCount() {
@@ -84,21 +83,22 @@ export const useNotificationStore = defineStore('notification', () => {
       notifications.value = []
     }
     try {
-      const response = await axiosInstance.get<PaginatedNotificationResponse>('/notifications/', {
-        params: { page: page },
-      })
+      // The inbox is cursor-paginated: later pages follow the 'next' link.
+      const nextUrl = page > 1 ? pagination.value.next : null
+      const response = await axiosInstance.get<PaginatedNotificationResponse>(
+        nextUrl || '/notifications/',
+      )
       const data = response.data
       if (page === 1) {
         notifications.value = data.results
       } else {
         notifications.value.push(...data.results)
       }
-      pagination.value.count = data.count
+      pagination.value.count = notifications.value.length
       pagination.value.next = data.next
       pagination.value.previous = data.previous
       pagination.value.currentPage = page
-      pagination.value.totalPages =
-        data.count > 0 ? Math.ceil(data.count / ITEMS_PER_PAGE_NOTIFICATIONS) : 0
+      pagination.value.totalPages = data.next ? page + 1 : page
         
       hasLoadedInitialList.value = true
 